@@ -0,0 +1,563 @@
+import os
+import json
+import logging
+import sqlite3
+from dotenv import load_dotenv
+from cache import ResultCache, make_cache_key
+from transcript_parser import parse_docx, MIN_CONFIDENCE
+from catalog import CatalogError, get_catalog
+from evaluator import evaluate
+from extraction import UnsupportedDocument, UploadTooLarge, detect_document_type, document_hash, extract_document_text
+from gateway import LLMGateway, GatewayOverloaded
+from jsonstream import IncrementalJSONParser, repair_json
+from metrics import (CACHE_REQUESTS, GEMINI_ESCALATIONS, LOCAL_PARSER_RESULTS, PROMPT_TOKENS, SEMESTER_BLOCKS,
+                     STORE_LOOKUPS, stage)
+from prompts import SYSTEM_MESSAGE, build_semester_prompt, prepare_prompt, split_semesters
+from schema import normalize_semester, validate_extraction, validate_semester
+from store import AnalysisStore, DEFAULT_STORE_PATH
+
+# Transkript analiz hattı: metin çıkarma, yerel ayrıştırma, önbellek, Gemini çağrısı ve kural değerlendirmesi.
+# Flask rotaları ve toplu işler (batch.py) aynı fonksiyonları kullanır.
+# Modülü içe aktarmak hızlıdır: Gemini istemcisi ve önbellek veritabanı ilk kullanımda oluşturulur.
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+
+# GEMINI_MODELS değerini kademe listesine çevir; boş veya yalnızca virgüllerden oluşan değer varsayılan modele düşer
+def parse_model_tiers(value):
+    tiers = tuple(name.strip() for name in (value or "").split(",") if name.strip())
+    if not tiers:
+        logging.warning(f"GEMINI_MODELS geçerli bir model içermiyor ({value!r}), varsayılan model kullanılıyor: {DEFAULT_MODEL}")
+        return (DEFAULT_MODEL,)
+    return tiers
+
+
+# Model kademeleri (virgülle ayrılmış, ucuzdan güçlüye): istekler önce ilk modele gider, yanıtı şemaya
+# uymayanlar sıradaki modele aktarılır. Varsayılan tek kademedir.
+MODEL_TIERS = parse_model_tiers(os.getenv("GEMINI_MODELS", DEFAULT_MODEL))
+MODEL_NAME = MODEL_TIERS[0]
+# Önbellek anahtarlarındaki model bilgisi; kademe listesi değişince eski sonuçlar kullanılmaz
+MODEL_KEY = ",".join(MODEL_TIERS)
+# Modelin JSON modunu (response_mime_type=application/json) kullan; yanıt kod bloğu veya açıklama içermez
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "1") == "1"
+# langchain-google-genai 1.0.3 istemcisinde response_mime_type alanı yoktur (kurucuya verilirse yok sayılır);
+# JSON modu her çağrıda generation_config ile istenir, istemci bunu _prepare_params içinde birleştirir
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+# Prompt değiştiğinde bu sürümü artırın; önbellekteki eski sonuçlar böylece geçersiz olur
+PROMPT_VERSION = "2"
+
+
+# Kullanıcıya döndürülecek mesajı ve HTTP durum kodunu taşıyan hata
+class AnalysisError(Exception):
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Verilen model için Gemini API istemcisini kur (ağ geçidi her model için ilk istekte bir kez çağırır)
+def create_llm(model=MODEL_NAME):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if not google_api_key:
+        logging.error("Google API anahtarı bulunamadı!")
+        raise AnalysisError("Google API anahtarı .env dosyasında mevcut değil", 500)
+    llm = ChatGoogleGenerativeAI(model=model, google_api_key=google_api_key, temperature=0, max_tokens=4000)
+    if GEMINI_JSON_MODE:
+        # bind ile verilen ayar ağ geçidinin her ainvoke/astream çağrısına eklenir
+        llm = llm.bind(generation_config=JSON_GENERATION_CONFIG)
+    logging.info(f"Google Gemini istemcisi başarıyla başlatıldı ({model})")
+    return llm
+
+
+# Tüm Gemini çağrıları bu ağ geçidinden geçer (eşzamanlılık, kota ve yeniden deneme yönetimi)
+gateway = LLMGateway(create_llm, MODEL_TIERS)
+
+# Gemini sonuçları için kalıcı önbellek (tüm worker'lar aynı SQLite dosyasını paylaşır)
+result_cache = ResultCache(
+    path=os.getenv("RESULT_CACHE_PATH", "backend/cache.sqlite3"),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+)
+
+# Tamamlanan analizlerin deposu; aynı belge tekrar yüklendiğinde metin çıkarma ve Gemini atlanır
+analysis_store = AnalysisStore(os.getenv("ANALYSIS_STORE_PATH", DEFAULT_STORE_PATH))
+ANALYSIS_STORE_ENABLED = os.getenv("ANALYSIS_STORE_ENABLED", "1") == "1"
+
+# Prompt'ta tam metin yerine yalnızca yarıyıl/ders tablolarını gönder
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "1") == "1"
+# Çıkarma modu: "single" (tek istek), "chunked" (yarıyıl başına eşzamanlı istekler) veya
+# "incremental" (yalnızca daha önce görülmemiş yarıyıl blokları Gemini'ye gönderilir)
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "single")
+# Önbellek anahtarı, gönderilen prompt biçimini de kapsamalı
+PROMPT_VARIANT = f"{PROMPT_VERSION}-compact" if PROMPT_COMPACTION else PROMPT_VERSION
+if EXTRACTION_MODE in ("chunked", "incremental"):
+    PROMPT_VARIANT += "-chunked"
+# Yarıyıl bloğu özetleri ve blok önbelleği anahtarları için prompt sürümü
+SEMESTER_PROMPT_VARIANT = f"{PROMPT_VERSION}-semester"
+# Depodaki çıkarılmış verinin kaynağı; yalnızca anahtarı güncel olan veri yeniden kullanılır
+EXTRACTION_KEY = f"{PROMPT_VARIANT}/{MODEL_KEY}"
+LOCAL_EXTRACTION_KEY = "local"
+# Depodaki çıkarılmış verinin yeniden kullanılabileceği süre (sonuç önbelleğiyle aynı varsayılan)
+ANALYSIS_STORE_TTL_SECONDS = int(os.getenv("ANALYSIS_STORE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+# Çıkarma sorunluyken (kesilmiş veya şemaya uymayan yanıt) mezuniyet kararı yerine verilen mesaj
+INCOMPLETE_EXTRACTION_MESSAGE = ("Transkript eksiksiz okunamadı (Gemini yanıtı kesilmiş veya beklenen yapıya uymuyor); "
+                                 "mezuniyet değerlendirmesi yapılamadı. Lütfen dosyayı tekrar yükleyin.")
+
+# Kural tabanlı yerel ayrıştırıcı ayarları
+LOCAL_PARSER_ENABLED = os.getenv("LOCAL_PARSER_ENABLED", "1") == "1"
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSER_MIN_CONFIDENCE", str(MIN_CONFIDENCE)))
+
+
+# Standart transkript biçimi için yerel ayrıştırıcıyı dene (ağ ve LLM gerektirmez)
+def parse_locally(source):
+    if not LOCAL_PARSER_ENABLED:
+        return None
+    try:
+        with stage("local_parse"):
+            local_data, confidence = parse_docx(source)
+    except Exception as e:
+        LOCAL_PARSER_RESULTS.inc(result="error")
+        logging.warning(f"Yerel ayrıştırma hatası: {str(e)}")
+        return None
+    if confidence >= LOCAL_PARSER_MIN_CONFIDENCE:
+        LOCAL_PARSER_RESULTS.inc(result="accepted")
+        logging.info(f"Transkript yerel ayrıştırıcı ile işlendi (güven: {confidence:.2f})")
+        return local_data
+    LOCAL_PARSER_RESULTS.inc(result="low_confidence")
+    logging.info(f"Yerel ayrıştırıcı güveni düşük ({confidence:.2f}), Gemini kullanılacak")
+    return None
+
+
+# Transkript dosyasından (.docx veya .pdf; yol veya dosya nesnesi) temizlenmiş metni çıkar
+def extract_text(source, kind=None):
+    try:
+        # Okuma ve temizleme tek geçişte yapıldığından tek aşama olarak ölçülür
+        with stage("extract_text"):
+            text = extract_document_text(source, kind)
+        logging.debug(f"Çıkarılmış metin: {len(text)} karakter")
+        return text
+    except (UploadTooLarge, UnsupportedDocument):
+        raise
+    except Exception as e:
+        logging.error(f"Metin çıkarma hatası: {str(e)}")
+        raise AnalysisError(f"Metin çıkarma hatası: {str(e)}", 500)
+
+
+# Belgenin yeniden kullanılabilir kayıtlı analizini bul: sorunsuz çıkarılmış, anahtarı güncel ve süresi
+# dolmamış olmalı (depo kapalıysa veya okunamıyorsa None)
+def find_stored(digest):
+    if not ANALYSIS_STORE_ENABLED:
+        return None
+    try:
+        with stage("store_lookup"):
+            stored = analysis_store.find_extraction(digest, (EXTRACTION_KEY, LOCAL_EXTRACTION_KEY),
+                                                    ANALYSIS_STORE_TTL_SECONDS)
+    except (sqlite3.Error, ValueError) as e:
+        STORE_LOOKUPS.inc(result="error")
+        logging.warning(f"Analiz deposu okuma hatası: {str(e)}")
+        return None
+    STORE_LOOKUPS.inc(result="hit" if stored is not None else "miss")
+    return stored
+
+
+# Hattın CPU'ya bağlı kısmı (yerel ayrıştırma veya metin çıkarma); süreç havuzunda çalıştırılabilir.
+# Daha önce analiz edilmiş belgelerin kayıtlı verisi kullanılır.
+def prepare_file(source):
+    kind = detect_document_type(source)
+    digest = document_hash(source)
+    stored = find_stored(digest)
+    if stored is not None:
+        logging.info(f"Kayıtlı analiz kullanıldı: {digest}")
+        return {"data": stored["data"], "text": None, "document_hash": digest, "stored": stored,
+                "extraction_key": stored["extraction_key"], "extracted_at": stored["extracted_at"]}
+    # Yerel ayrıştırıcı .docx tablo yapısını okur; diğer türler doğrudan metin çıkarmaya gider
+    data = parse_locally(source) if kind == "docx" else None
+    if data is not None:
+        return {"data": data, "text": None, "document_hash": digest, "stored": None,
+                "extraction_key": LOCAL_EXTRACTION_KEY, "extracted_at": None}
+    return {"data": None, "text": extract_text(source, kind), "document_hash": digest, "stored": None,
+            "extraction_key": EXTRACTION_KEY, "extracted_at": None}
+
+
+# Çıkarma sorunluysa sonucu eksik olarak işaretle: sorunlar "extraction_problems" alanına yazılır ve kısmi
+# veriden (ör. kesilmiş yanıtta görünmeyen yarıyıllar) kesin bir mezuniyet kararı verilmez
+def mark_incomplete(result, problems):
+    if problems:
+        result["extraction_problems"] = list(problems)
+        result["can_graduate"] = False
+        result["graduation_message"] = INCOMPLETE_EXTRACTION_MESSAGE
+    return result
+
+
+# Değerlendirilmiş sonucu depoya yaz; kayıtlı sonuç aynen geçerliyse yazma atlanır. Çıkarma sorunlu
+# (eksik, kesilmiş veya şemaya uymayan) ya da boşsa (yarıyıl yok) sonuç saklanmaz; önbellekle aynı kural
+# uygulanır ve boş kayıtlar raporlara girmez. Depo hataları analizi başarısız kılmaz.
+def record_analysis(prepared, catalog, result, student_id=None, file_name=None, problems=None):
+    result["document_hash"] = prepared["document_hash"]
+    if not ANALYSIS_STORE_ENABLED:
+        return
+    if problems:
+        logging.warning(f"Çıkarma sorunlu olduğu için analiz depoya yazılmadı: {prepared['document_hash']}")
+        return
+    if not result.get("semesters"):
+        logging.warning(f"Çıkarmada yarıyıl bulunmadığı için analiz depoya yazılmadı: {prepared['document_hash']}")
+        return
+    stored = prepared.get("stored")
+    if (stored is not None and stored["program"] == catalog.program and stored["result"] == result
+            and student_id in (None, stored["student_id"])):
+        return
+    try:
+        with stage("store_save"):
+            analysis_store.save(prepared["document_hash"], catalog, result, student_id, file_name,
+                                prepared.get("extraction_key"), prepared.get("extracted_at"))
+    except sqlite3.Error as e:
+        logging.warning(f"Analiz deposu yazma hatası: {str(e)}")
+
+
+# Gemini yanıtını JSON olarak ayrıştır. Geçerli JSON değilse (kod bloğu, öncesinde açıklama veya kesilmiş
+# yanıt) ilk JSON nesnesi alınır ve açık kalan dizi/nesneler son tamamlanmış değerden sonra kapatılır.
+# Eksik kalan alanları şema doğrulaması yakalar.
+def parse_response(ai_msg):
+    logging.debug(f"Gemini API yanıtı: {len(ai_msg.content or '')} karakter")
+
+    response_content = (ai_msg.content or "").strip()
+    if not response_content:
+        logging.error("Gemini API yanıtı boş!")
+        raise AnalysisError("Gemini API yanıtı boş!", 500)
+
+    # JSON modu kapalıysa yanıt genellikle ```json bloğu içinde gelir
+    content = response_content
+    if content.startswith('```json'):
+        content = content[7:]
+    if content.endswith('```'):
+        content = content[:-3]
+    try:
+        with stage("json_parse"):
+            return json.loads(content)
+    except json.JSONDecodeError as e:
+        logging.debug(f"JSON ayrıştırma hatası: {str(e)}. Yanıt onarılıyor...")
+    try:
+        with stage("json_repair"):
+            data = repair_json(response_content)
+    except ValueError as e:
+        logging.error(f"Gemini API yanıtını ayrıştırma hatası: {str(e)} (yanıt {len(response_content)} karakter)")
+        raise AnalysisError(f"Gemini API yanıtını ayrıştırma hatası (geçerli JSON değil): {str(e)}", 500)
+    if data is None:
+        logging.error("Gemini API yanıtında JSON nesnesi yok")
+        raise AnalysisError("Gemini API yanıtını ayrıştırma hatası (geçerli JSON değil)", 500)
+    return data
+
+
+# Şemaya uymayan yanıtı bir üst modele aktarmadan önce kaydet
+def _escalate(model, next_model, problems):
+    GEMINI_ESCALATIONS.inc(model=model)
+    logging.warning(f"{model} yanıtı şemaya uymuyor ({problems[0]}; toplam {len(problems)} sorun), "
+                    f"istek {next_model} modeline aktarılıyor")
+
+
+# Mesaj listelerini model kademelerinden geçir: hepsi önce ilk modele eşzamanlı gönderilir, ayrıştırılamayan
+# veya şemaya uymayan yanıtlar sıradaki modele aktarılır. Son modelde şemaya uymayan veri uyarıyla kabul
+# edilir, ayrıştırılamayan yanıt AnalysisError fırlatır. validate, (normalize edilmiş veri, sorunlar) döndürür.
+# Sonuç: mesaj listeleriyle aynı sırada (veri, sorunlar) çiftleri; sorunlu veri önbelleğe yazılmaz.
+def route_requests(message_lists, validate, models=None):
+    models = models or MODEL_TIERS
+    results = [None] * len(message_lists)
+    pending = list(range(len(message_lists)))
+    for tier, model in enumerate(models):
+        last = tier == len(models) - 1
+        futures = [(index, gateway.submit(message_lists[index], model)) for index in pending]
+        # Süre, kuyrukta bekleme ve yeniden denemeleri de kapsar
+        with stage("gemini"):
+            responses = [(index, future.result()) for index, future in futures]
+        pending = []
+        for index, ai_msg in responses:
+            try:
+                data = parse_response(ai_msg)
+            except AnalysisError as e:
+                if last:
+                    raise
+                problems = [str(e)]
+            else:
+                data, problems = validate(data)
+                if not problems or last:
+                    if problems:
+                        logging.warning(f"{model} yanıtı şemaya tam uymuyor, yine de kullanılıyor: {problems[0]}")
+                    results[index] = (data, problems)
+                    continue
+            _escalate(model, models[tier + 1], problems)
+            pending.append(index)
+        if not pending:
+            break
+    return results
+
+
+# Tek çağrılık çıkarma için sohbet mesajlarını hazırla
+def build_messages(text):
+    with stage("prompt_build"):
+        prompt, tokens_before, tokens_after = prepare_prompt(text, compact=PROMPT_COMPACTION)
+    PROMPT_TOKENS.observe(tokens_after)
+    logging.info(f"Prompt boyutu (yaklaşık): {tokens_before} -> {tokens_after} token")
+    return [
+        ("system", SYSTEM_MESSAGE),
+        ("human", prompt)
+    ]
+
+
+# Tüm transkripti tek bir Gemini çağrısıyla çıkar; (veri, sorunlar) döndürür
+def extract_single(text):
+    return route_requests([build_messages(text)], validate_extraction)[0]
+
+
+# Yarıyıl bloklarını ayrı ve eşzamanlı Gemini çağrılarıyla çıkar; (blok, yanıt sözlüğü, sorunlar) üçlüleri döndürür.
+# Toplam süre en yavaş yarıyıl kadardır ve her yanıt küçük olduğu için kesilme riski düşüktür.
+def _extract_semester_blocks(semesters):
+    chunks = route_requests([
+        [("system", SYSTEM_MESSAGE), ("human", build_semester_prompt(semester["text"]))]
+        for semester in semesters
+    ], validate_semester)
+    return [(semester, chunk, problems) for semester, (chunk, problems) in zip(semesters, chunks)]
+
+
+# Yarıyıl parçalarını tek yapıda birleştir; parts: (split_semesters bloğu, {"courses", "akts", "gpa"}) çiftleri.
+# Bloğun özeti varsa yarıyıla "block_hash" olarak eklenir (artımlı çıkarma sonraki sürümde bunu kullanır).
+def merge_semesters(parts):
+    merged = []
+    gpa = None
+    last_number = 0
+    for semester, chunk in parts:
+        entry = {
+            "semester": semester["semester"],
+            "courses": chunk.get("courses") or [],
+            "akts": chunk.get("akts")
+        }
+        if semester.get("hash"):
+            entry["block_hash"] = semester["hash"]
+        merged.append(entry)
+        # Genel ortalama, en yüksek numaralı yarıyılın sonundaki değerdir
+        number = int(semester["semester"].split('.')[0])
+        semester_gpa = semester["gpa"] if semester["gpa"] is not None else chunk.get("gpa")
+        if number >= last_number and semester_gpa is not None:
+            gpa = semester_gpa
+            last_number = number
+    merged.sort(key=lambda sem: int(sem["semester"].split('.')[0]))
+    return {"semesters": merged, "gpa": gpa if gpa is not None else 0.0}
+
+
+# Her yarıyılı ayrı ve eşzamanlı bir Gemini çağrısıyla çıkar, sonuçları tek yapıda birleştir; (veri, sorunlar)
+def extract_chunked(semesters):
+    logging.info(f"Parçalı çıkarma: {len(semesters)} yarıyıl için eşzamanlı istek gönderildi")
+    parts = _extract_semester_blocks(semesters)
+    return (merge_semesters([(semester, chunk) for semester, chunk, _ in parts]),
+            [problem for _, _, problems in parts for problem in problems])
+
+
+# Temizlenmiş metnin yarıyıl blokları; her bloğun özeti (prompt sürümü ve model dahil) blok önbelleği anahtarıdır
+def semester_blocks(text):
+    return [dict(semester, hash=make_cache_key(semester["text"], SEMESTER_PROMPT_VARIANT, MODEL_KEY))
+            for semester in split_semesters(text)]
+
+
+# Öğrencinin bu programdaki son kayıtlı analizinin yarıyılları: blok özeti -> yarıyıl
+def previous_semesters(student_id, program):
+    if not student_id or not ANALYSIS_STORE_ENABLED:
+        return {}
+    try:
+        previous = analysis_store.latest_for_student(student_id, program)
+    except (sqlite3.Error, ValueError) as e:
+        logging.warning(f"Analiz deposu okuma hatası: {str(e)}")
+        return {}
+    if previous is None:
+        return {}
+    return {semester["block_hash"]: semester for semester in previous.get("semesters", []) if semester.get("block_hash")}
+
+
+# Yalnızca değişen yarıyıl bloklarını Gemini'ye gönder. Değişmeyen bloklar blok önbelleğinden veya
+# öğrencinin önceki analizinden alınır; sorunsuz çıkarılan yeni bloklar önbelleğe yazılır. (veri, sorunlar) döndürür.
+def extract_incremental(blocks, previous=None):
+    previous = previous or {}
+    parts = {}
+    pending = []
+    for block in blocks:
+        chunk = result_cache.get(block["hash"])
+        earlier = previous.get(block["hash"])
+        if chunk is not None:
+            SEMESTER_BLOCKS.inc(result="cached")
+        elif earlier is not None:
+            SEMESTER_BLOCKS.inc(result="reused")
+            chunk = {"courses": earlier.get("courses"), "akts": earlier.get("akts")}
+        else:
+            pending.append(block)
+            continue
+        parts[block["hash"]] = chunk
+    logging.info(f"Artımlı çıkarma: {len(blocks)} yarıyıldan {len(pending)} tanesi Gemini'ye gönderildi")
+
+    problems = []
+    # Doğrulamadan geçmeyen bloklar özetsiz birleştirilir; sonraki çıkarmalarda yeniden kullanılmazlar
+    failed = set()
+    if pending:
+        SEMESTER_BLOCKS.inc(len(pending), result="sent")
+        for block, chunk, chunk_problems in _extract_semester_blocks(pending):
+            parts[block["hash"]] = chunk
+            if chunk_problems:
+                problems.extend(chunk_problems)
+                failed.add(block["hash"])
+            elif chunk.get("courses"):
+                result_cache.set(block["hash"], {key: chunk.get(key) for key in ("courses", "akts", "gpa")})
+    return merge_semesters([(dict(block, hash=None) if block["hash"] in failed else block, parts[block["hash"]])
+                            for block in blocks]), problems
+
+
+# Önbellekteki çıkarma sonucunu döndür (yoksa None); isabet oranı metriklere yazılır
+def _cached_extraction(cache_key):
+    extracted_data = result_cache.get(cache_key)
+    if extracted_data is None:
+        CACHE_REQUESTS.inc(result="miss")
+        return None
+    CACHE_REQUESTS.inc(result="hit")
+    logging.info("Gemini yanıtı önbellekten alındı")
+    return extracted_data
+
+
+# Temizlenmiş metinden yarıyıl/ders verisini çıkar (önce önbellek, sonra Gemini); (veri, sorunlar) döndürür.
+# Artımlı modda öğrencinin (student_id, program) önceki analizindeki değişmemiş yarıyıllar yeniden kullanılır.
+def request_extraction(text, student_id=None, program=None):
+    # Aynı transkript daha önce analiz edildiyse Gemini çağrısını atla (önbelleğe yalnızca sorunsuz veri yazılır)
+    cache_key = make_cache_key(text, PROMPT_VARIANT, MODEL_KEY)
+    extracted_data = _cached_extraction(cache_key)
+    if extracted_data is not None:
+        return extracted_data, []
+
+    if EXTRACTION_MODE == "incremental":
+        blocks = semester_blocks(text)
+        extracted_data, problems = (extract_incremental(blocks, previous_semesters(student_id, program)) if blocks
+                                    else extract_single(text))
+    elif EXTRACTION_MODE == "chunked":
+        semesters = split_semesters(text)
+        extracted_data, problems = extract_chunked(semesters) if semesters else extract_single(text)
+    else:
+        extracted_data, problems = extract_single(text)
+
+    # Başarılı ayrıştırmayı önbelleğe al (boş veya şemaya uymayan sonuçları saklama)
+    if extracted_data.get("semesters") and not problems:
+        result_cache.set(cache_key, extracted_data)
+    return extracted_data, problems
+
+
+# prepare_file çıktısını tamamla: gerekirse Gemini'yi çağır ve programın mezuniyet kurallarını değerlendir.
+# Katalog Gemini çağrısından önce alınır; bilinmeyen bir program boşuna kota harcamaz.
+def analyze_prepared(prepared, program=None, student_id=None, file_name=None):
+    catalog = get_catalog(program)
+    extracted_data, problems = prepared["data"], []
+    if extracted_data is None:
+        extracted_data, problems = request_extraction(prepared["text"], student_id, catalog.program)
+    with stage("evaluate"):
+        result = mark_incomplete(evaluate(extracted_data, catalog), problems)
+    record_analysis(prepared, catalog, result, student_id, file_name, problems)
+    return result
+
+
+# Tek bir transkript dosyasını (yol veya dosya nesnesi) baştan sona analiz et
+def analyze_file(source, program=None, student_id=None, file_name=None):
+    # Bilinmeyen program metin çıkarılmadan reddedilsin
+    get_catalog(program)
+    return analyze_prepared(prepare_file(source), program, student_id, file_name)
+
+
+# Tamamlanan bir yarıyıl için akış olayı; o yarıyıldaki başarısız dersler hemen değerlendirilir
+def _semester_event(semester, catalog):
+    try:
+        partial = evaluate({"semesters": [semester]}, catalog)
+        failed = partial["failed_mandatory"] + partial["failed_electives"]
+    except (KeyError, TypeError, AttributeError, ValueError):
+        failed = []
+    return {"semester": semester, "failed": failed}
+
+
+# Gemini yanıtını akış halinde al; her yarıyıl tamamlandığında ("semester", olay) üret ve (veri, sorunlar) döndür.
+# Akış ilk modelle yapılır; sonuç şemaya uymazsa istek kalan kademelere akışsız gönderilir.
+def _stream_extraction(text, catalog):
+    cache_key = make_cache_key(text, PROMPT_VARIANT, MODEL_KEY)
+    extracted_data = _cached_extraction(cache_key)
+    if extracted_data is not None:
+        for semester in extracted_data.get("semesters", []):
+            yield "semester", _semester_event(semester, catalog)
+        return extracted_data, []
+
+    messages = build_messages(text)
+    parser = IncrementalJSONParser()
+    # Süre, istemcinin olayları tüketme süresini de içerir
+    with stage("gemini_stream"):
+        for chunk in gateway.stream(messages, MODEL_TIERS[0]):
+            for semester in parser.feed(chunk.content):
+                semester = normalize_semester(semester)
+                if semester is not None:
+                    yield "semester", _semester_event(semester, catalog)
+
+    escalate = len(MODEL_TIERS) > 1
+    try:
+        with stage("json_parse"):
+            extracted_data = parser.finish()
+    except ValueError as e:
+        logging.error(f"Gemini API akış yanıtını ayrıştırma hatası: {str(e)}")
+        if not escalate:
+            raise AnalysisError(f"Gemini API yanıtını ayrıştırma hatası (geçerli JSON değil): {str(e)}", 500)
+        problems = [f"geçerli JSON değil: {str(e)}"]
+    else:
+        if extracted_data is None and not escalate:
+            logging.error("Gemini API yanıtı boş!")
+            raise AnalysisError("Gemini API yanıtı boş!", 500)
+        extracted_data, problems = validate_extraction(extracted_data)
+    if problems and escalate:
+        _escalate(MODEL_TIERS[0], MODEL_TIERS[1], problems)
+        extracted_data, problems = route_requests([messages], validate_extraction, MODEL_TIERS[1:])[0]
+    elif problems:
+        logging.warning(f"{MODEL_TIERS[0]} yanıtı şemaya tam uymuyor, yine de kullanılıyor: {problems[0]}")
+    if extracted_data.get("semesters") and not problems:
+        result_cache.set(cache_key, extracted_data)
+    return extracted_data, problems
+
+
+# Analizi akış halinde yürüt: önce ("semester", olay) olayları, en sonda ("result", değerlendirilmiş veri)
+def stream_analysis(source, program=None, student_id=None, file_name=None):
+    catalog = get_catalog(program)
+    prepared = prepare_file(source)
+    extracted_data, problems = prepared["data"], []
+    if extracted_data is None and EXTRACTION_MODE == "incremental":
+        # Artımlı modda yalnızca değişen yarıyıllar istenir; akış yerine parçalı çağrılar kullanılır
+        extracted_data, problems = request_extraction(prepared["text"], student_id, catalog.program)
+    if extracted_data is None:
+        extracted_data, problems = yield from _stream_extraction(prepared["text"], catalog)
+    else:
+        for semester in extracted_data["semesters"]:
+            yield "semester", _semester_event(semester, catalog)
+    with stage("evaluate"):
+        evaluated = mark_incomplete(evaluate(extracted_data, catalog), problems)
+    record_analysis(prepared, catalog, evaluated, student_id, file_name, problems)
+    yield "result", evaluated
+
+
+# Analiz sırasında oluşan bir hatayı (mesaj, HTTP durum kodu) çiftine dönüştür
+def describe_error(e):
+    if isinstance(e, AnalysisError):
+        return str(e), e.status_code
+    if isinstance(e, UploadTooLarge):
+        logging.warning(f"Çok büyük dosya reddedildi: {str(e)}")
+        return f"Dosya çok büyük! {str(e)}", 413
+    if isinstance(e, UnsupportedDocument):
+        logging.warning(f"Desteklenmeyen dosya içeriği: {str(e)}")
+        return f"Desteklenmeyen dosya formatı! {str(e)}", 400
+    if isinstance(e, CatalogError):
+        logging.warning(f"Program kataloğu kullanılamıyor: {str(e)}")
+        return f"Geçersiz program! {str(e)}", 400
+    if isinstance(e, GatewayOverloaded):
+        logging.warning("Gemini istek kuyruğu dolu, istek reddedildi")
+        return "Sunucu şu anda çok yoğun. Lütfen birkaç saniye sonra tekrar deneyin.", 503
+    if "429" in str(e):
+        logging.error(f"Kota aşımı hatası: {str(e)}")
+        return "Üzgünüz, Google Gemini API kota sınırınızı aştınız. Google AI Studio veya Google Cloud Console'da kota durumunuzu kontrol edin.", 429
+    logging.error(f"Gemini API ile iletişim veya veri ayrıştırma hatası: {str(e)}")
+    return f"İstek işlenirken hata oluştu: {str(e)}", 500
@@ -1,500 +1,362 @@
-from flask import Flask, render_template, request
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, redirect, render_template, request, stream_with_context, url_for
 import os
-import docx2txt
-from langchain_google_genai import ChatGoogleGenerativeAI
 import json
-import re
 import logging
-from tenacity import retry, stop_after_attempt, wait_fixed
-from dotenv import load_dotenv
-
-app = Flask(__name__)
-logging.info("Flask uygulaması başarıyla başlatıldı")
-
-# Günlük kaydı için ayar
-logging.basicConfig(level=logging.DEBUG, filename='app.log', format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Yüklenen dosyalar için klasör
-UPLOAD_FOLDER = 'backend/uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-# Google AI API anahtarını yükle
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    logging.error("Google API anahtarı bulunamadı!")
-    raise ValueError("Google API anahtarı .env dosyasında mevcut değil")
-logging.info("Google API anahtarı başarıyla yüklendi")
-
-# Gemini API istemcisini kur
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=GOOGLE_API_KEY,
-    temperature=0,
-    max_tokens=4000
-)
-logging.info("Google Gemini istemcisi başarıyla başlatıldı")
-
-# Çıkarılan metni temizleme fonksiyonu
-def clean_text(text):
-    text = re.sub(r'\s+', ' ', text.strip())
-    text = re.sub(r'[^\w\s\d\.\:\*\-\(\)]', '', text)  # Parantezleri koru
-    return text
-
-# Her yarıyıl için zorunlu derslerin listesi
-MANDATORY_COURSES = {
-    "1. Yarıyıl": [
-        {"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I"},
-        {"code": "TDB121", "name": "Türk Dili I"},
-        {"code": "FIZ101", "name": "Fizik I"},
-        {"code": "BM107", "name": "Elektrik Devre Temelleri"},
-        {"code": "MAT101", "name": "Matematik I"},
-        {"code": "BM103", "name": "Bilgisayar Mühendisliğine Giriş"},
-        {"code": "BM105", "name": "Bilişim Teknolojileri"},
-        {"code": "BM101", "name": "Algoritmalar ve Programlama I"},
-        {"code": "ING101", "name": "İngilizce I"}
-    ],
-    "2. Yarıyıl": [
-        {"code": "AIB102", "name": "Atatürk İlkeleri ve İnkılap Tarihi II"},
-        {"code": "TDB122", "name": "Türk Dili II"},
-        {"code": "FIZ102", "name": "Fizik II"},
-        {"code": "MAT102", "name": "Matematik II"},
-        {"code": "BM102", "name": "Algoritmalar ve Programlama II"},
-        {"code": "BM104", "name": "Web Teknolojileri"},
-        {"code": "BM106", "name": "Olasılık ve İstatistik"},
-        {"code": "KRP102", "name": "Kariyer Planlama"},
-        {"code": "ING102", "name": "İngilizce II"}
-    ],
-    "3. Yarıyıl": [
-        {"code": "BM211", "name": "Diferansiyel Denklemler"},
-        {"code": "BM213", "name": "Lineer Cebir"},
-        {"code": "BM205", "name": "Nesneye Dayalı Programlama"},
-        {"code": "BM209", "name": "Sayısal Analiz"},
-        {"code": "BM203", "name": "Elektronik"},
-        {"code": "BM215", "name": "Ayrık İşlemsel Yapılar"}
-    ],
-    "4. Yarıyıl": [
-        {"code": "BM204", "name": "Bilgisayar Organizasyonu"},
-        {"code": "BM206", "name": "Sayısal Elektronik"},
-        {"code": "BM208", "name": "Nesneye Dayalı Analiz ve Tasarım"},
-        {"code": "BM210", "name": "Programlama Dillerinin Prensipleri"},
-        {"code": "BM212", "name": "Mesleki İngilizce"},
-        {"code": "BM214", "name": "Veri Yapıları"}
-    ],
-    "5. Yarıyıl": [
-        {"code": "BM301", "name": "Biçimsel Diller ve Soyut Makinalar"},
-        {"code": "BM303", "name": "İşaretler ve Sistemler"},
-        {"code": "BM305", "name": "İşletim Sistemleri"},
-        {"code": "BM307", "name": "Bilgisayar Ağları I"},
-        {"code": "BM309", "name": "Veritabanı Yönetim Sistemleri"},
-        {"code": "BM399", "name": "Yaz Dönemi Stajı I"}
-    ],
-    "6. Yarıyıl": [
-        {"code": "BM302", "name": "Bilgisayar Ağları II"},
-        {"code": "BM304", "name": "Mikroişlemciler"},
-        {"code": "BM306", "name": "Sistem Programlama"},
-        {"code": "BM308", "name": "Web Programlama"},
-        {"code": "BM310", "name": "Yazılım Mühendisliği"}
-    ],
-    "7. Yarıyıl": [
-        {"code": "BM401", "name": "Bilgisayar Mühendisliği Proje Tasarımı"},
-        {"code": "BM499", "name": "Yaz Dönemi Stajı II"}
-    ],
-    "8. Yarıyıl": [
-        {"code": "BM498", "name": "Mezuniyet Tezi"}
-    ]
-}
-
-# Seçmeli derslerin listesi
-ELECTIVE_COURSES = {
-    "3. Yarıyıl": [
-        {"code": "US201", "name": "Bilim Tarihi ve Felsefesi"},
-        {"code": "US207", "name": "Girişimcilik"},
-        {"code": "US211", "name": "İş Psikolojisi"},
-        {"code": "US213", "name": "İşletme Yönetimi"},
-        {"code": "US215", "name": "Kültür Tarihi"},
-        {"code": "US217", "name": "Sanat Tarihi"},
-        {"code": "US219", "name": "Sivil Toplum Organizasyonu"},
-        {"code": "US221", "name": "Uygarlık Tarihi"},
-        {"code": "US225", "name": "Girişimcilik I"},
-        {"code": "US227", "name": "Girişimcilik II"},
-        {"code": "US203", "name": "Çevre ve Enerji"},
-        {"code": "US209", "name": "İletişim Tekniği"},
-        {"code": "US205", "name": "Davranış Bilimine Giriş"}
-    ],
-    "4. Yarıyıl": [
-        {"code": "US201", "name": "Bilim Tarihi ve Felsefesi"},
-        {"code": "US207", "name": "Girişimcilik"},
-        {"code": "US211", "name": "İş Psikolojisi"},
-        {"code": "US213", "name": "İşletme Yönetimi"},
-        {"code": "US215", "name": "Kültür Tarihi"},
-        {"code": "US217", "name": "Sanat Tarihi"},
-        {"code": "US219", "name": "Sivil Toplum Organizasyonu"},
-        {"code": "US221", "name": "Uygarlık Tarihi"},
-        {"code": "US225", "name": "Girişimcilik I"},
-        {"code": "US227", "name": "Girişimcilik II"},
-        {"code": "US203", "name": "Çevre ve Enerji"},
-        {"code": "US209", "name": "İletişim Tekniği"},
-        {"code": "US205", "name": "Davranış Bilimine Giriş"}
-    ],
-    "5. Yarıyıl": [
-        {"code": "MS301", "name": "Endüstri İlişkileri"},
-        {"code": "MS303", "name": "Meslek Hastalıkları"},
-        {"code": "MS305", "name": "Teknoloji Felsefesi"},
-        {"code": "MS307", "name": "Mühendisler İçin Yönetim"},
-        {"code": "MS309", "name": "Mühendislik Etiği"},
-        {"code": "MS311", "name": "Kalite Yönetim Sistemleri ve Uygulaması"},
-        {"code": "MS313", "name": "Toplam Kalite Yönetimi"},
-        {"code": "MS315", "name": "İş Güvenliği"},
-        {"code": "MS317", "name": "İş Hukuku"},
-        {"code": "MS319", "name": "Mühendislik Ekonomisi"},
-        {"code": "MS321", "name": "Bilişim Teknolojilerinde Yeni Gelişmeler"},
-        {"code": "MS323", "name": "Betik Dilleri"},
-        {"code": "MS332", "name": "Bilimsel Araştırma ve Rapor Yazma"}
-    ],
-    "6. Yarıyıl": [
-        {"code": "MS301", "name": "Endüstri İlişkileri"},
-        {"code": "MS303", "name": "Meslek Hastalıkları"},
-        {"code": "MS305", "name": "Teknoloji Felsefesi"},
-        {"code": "MS307", "name": "Mühendisler İçin Yönetim"},
-        {"code": "MS309", "name": "Mühendislik Etiği"},
-        {"code": "MS311", "name": "Kalite Yönetim Sistemleri ve Uygulaması"},
-        {"code": "MS313", "name": "Toplam Kalite Yönetimi"},
-        {"code": "MS315", "name": "İş Güvenliği"},
-        {"code": "MS317", "name": "İş Hukuku"},
-        {"code": "MS319", "name": "Mühendislik Ekonomisi"},
-        {"code": "MS321", "name": "Bilişim Teknolojilerinde Yeni Gelişmeler"},
-        {"code": "MS323", "name": "Betik Dilleri"},
-        {"code": "MS331", "name": "Mühendislikte Temel Bilgiler"}
-    ]
-}
-
-@app.route('/')
-def index():
-    return render_template('index.html')
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from werkzeug.utils import secure_filename
+import analysis
+from analysis import analyze_file, describe_error, stream_analysis
+from batch import iter_batch
+from catalog import CatalogError, available_programs, resolve_program
+from extraction import SUPPORTED_EXTENSIONS, UploadTooLarge, copy_zip_member, save_upload, spool_upload
+from jobs import JobQueue, WorkerPool, DEFAULT_JOBS_PATH, STATUS_DONE, STATUS_FAILED
+from metrics import HTTP_REQUEST_SECONDS, end_trace, render_metrics, server_timing, stage, start_trace
+
+# Uygulama fabrikası: create_app() yapılandırmayı, klasörleri ve iş kuyruğunu kurar.
+# Modülü içe aktarmak yan etkisizdir; Gemini istemcisi ilk analiz isteğinde oluşturulur.
+# Gunicorn yapılandırması için gunicorn.conf.py dosyasına bakın.
+
+bp = Blueprint('main', __name__)
+
+# İstemci bu başlığı "1" olarak gönderirse yanıta aşama sürelerini içeren Server-Timing başlığı eklenir
+TRACE_REQUEST_HEADER = 'X-Trace-Timing'
+# Kiracıyı (fakülte/bölüm) belirten başlık; program seçilmezse kiracının programı kullanılır (TENANT_PROGRAMS)
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant")
+
+
+# Günlük kaydı için ayar (ilk günlük mesajından önce çağrılmalı)
+def configure_logging():
+    logging.basicConfig(level=logging.DEBUG, filename='app.log', format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def create_app(config=None):
+    configure_logging()
+    app = Flask(__name__)
+
+    # Yüklenen dosyalar için klasör
+    app.config['UPLOAD_FOLDER'] = os.getenv("UPLOAD_FOLDER", 'backend/uploads')
+    # İstek gövdesi için üst sınır (toplu yüklemeler dahil); tekil dosya sınırı extraction.MAX_UPLOAD_BYTES
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_REQUEST_BYTES", str(200 * 1024 * 1024)))
+    # İş kuyruğu modu: açıkken /upload dosyayı kuyruğa ekler ve hemen bir iş kimliği döndürür
+    app.config['JOB_MODE'] = os.getenv("JOB_MODE", "0") == "1"
+    app.config['JOBS_DB_PATH'] = os.getenv("JOBS_DB_PATH", DEFAULT_JOBS_PATH)
+    if config:
+        app.config.update(config)
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    job_queue = JobQueue(app.config['JOBS_DB_PATH'])
+    app.extensions['job_queue'] = job_queue
+    app.extensions['job_workers'] = WorkerPool(job_queue, analyze_file, describe_error)
+    app.register_blueprint(bp)
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request_metrics)
+    app.teardown_request(_end_request_trace)
+
+    if not os.getenv("GOOGLE_API_KEY"):
+        logging.warning("Google API anahtarı bulunamadı; Gemini gerektiren analizler başarısız olacak")
+    logging.info("Flask uygulaması başarıyla başlatıldı")
+    return app
+
+
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.trace = start_trace() if request.headers.get(TRACE_REQUEST_HEADER) == '1' else None
+
+
+# Akış yanıtlarında süre, yanıt başlıklarının gönderilmesine kadar olan kısmı kapsar
+def _record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                     endpoint=request.endpoint or 'unknown', status=response.status_code)
+    trace = g.get('trace')
+    if trace:
+        response.headers['Server-Timing'] = server_timing(trace)
+    return response
+
+
+def _end_request_trace(exc):
+    end_trace()
+
+
+def _job_queue():
+    return current_app.extensions['job_queue']
 
-@app.route('/upload', methods=['POST'])
+
+def _job_workers():
+    return current_app.extensions['job_workers']
+
+
+def _analysis_store():
+    return analysis.analysis_store
+
+
+# İsteğe bağlı öğrenci numarası (danışmanın formda girdiği); kayıtlı analizler bununla da aranabilir
+def _request_student_id():
+    return (request.values.get('student_id') or '').strip() or None
+
+
+# İstekte seçilen (form/sorgu "program" alanı) veya kiracıya atanmış program; geçersizse CatalogError
+def _request_program():
+    return resolve_program(request.values.get('program'), request.headers.get(TENANT_HEADER))
+
+
+@bp.route('/')
+def index():
+    try:
+        selected = _request_program()
+    except CatalogError:
+        selected = None
+    # İş modunda form /upload'a gönderilir ve iş sayfasına yönlendirilir; akış yolu kullanılmaz
+    return render_template('index.html', programs=available_programs(), selected_program=selected,
+                           streaming=not current_app.config['JOB_MODE'])
+
+@bp.route('/upload', methods=['POST'])
 def upload():
     if 'file' not in request.files:
         return "Dosya seçilmedi!", 400
     file = request.files['file']
     if file.filename == '':
         return "Dosya seçilmedi!", 400
-    if file and file.filename.lower().endswith('.docx'):
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
+    if file and file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
         try:
-            file.save(file_path)
-        except Exception as e:
-            logging.error(f"Dosya kaydetme hatası: {str(e)}")
-            return f"Dosya kaydetme hatası: {str(e)}", 500
+            program = _request_program()
+        except CatalogError as e:
+            message, status_code = describe_error(e)
+            return message, status_code
+        if current_app.config['JOB_MODE'] or request.values.get('async') == '1':
+            return enqueue_upload(file, program, _request_student_id())
+
+        # Dosya diske adıyla yazılmaz; bellekte (büyükse geçici dosyada) tutulup doğrudan okunur
+        try:
+            with stage("save"):
+                upload_file = spool_upload(file)
+        except UploadTooLarge as e:
+            message, status_code = describe_error(e)
+            return message, status_code
 
-        # .docx dosyasından metni çıkar
         try:
-            text = docx2txt.process(file_path)
-            text = clean_text(text)
-            logging.debug(f"Çıkarılmış metin: {text[:500]}...")  # İlk 500 karakteri günlüğe kaydet
+            with upload_file:
+                extracted_data = analyze_file(upload_file, program, _request_student_id(), file.filename)
         except Exception as e:
-            logging.error(f"Metin çıkarma hatası: {str(e)}")
-            return f"Metin çıkarma hatası: {str(e)}", 500
-
-        # Gemini API için prompt hazırlığı (TÜM PROMPT BURADA GÜNCELLENDİ)
-        prompt = f"""
-        Akademik transkriptleri analiz eden yardımcı bir asistansınız. Aşağıdaki transkript metnine göre aşağıdaki adımları gerçekleştirin:
-
-        ### Görev:
-        1. Transkriptten tüm dersleri ve notlarını yarıyıl bazında çıkar.
-        2. Her yarıyıl için Toplam AKTS değerini çıkar (genellikle her yarıyılın sonunda "Toplam AKTS" veya "AKTS" olarak görünür, 1 ile 60 arasında bir sayıdır).
-        3. Genel not ortalamasını (Genel Ortalama) çıkar, **son yarıyılın** sonunda "Genel" kelimesinden sonra görünür (örneğin, transkript 7 yarıyıl içeriyorsa 7. yarıyılın sonunda, 6 yarıyıl içeriyorsa 6. yarıyılın sonunda). Not ortalaması bir sayıdır (örneğin, "2.63").
-
-        ### Talimatlar:
-        - Her yarıyılı (örneğin, "1. Yarıyıl", "2. Yarıyıl" vb.) tanımlayın ve dersleri her yarıyıl altında listeleyin.
-        - Her ders için ders kodu (örneğin, "AIB101"), ders adı (örneğin, "Atatürk İlkeleri ve İnkılap Tarihi I") ve not (örneğin, "AA", "BB", "CC", "DD", "FF", "FD", "YT", "YZ") ekleyin.
-        - Her yarıyıl için Toplam AKTS değerini çıkar ve JSON çıktısında her yarıyıl nesnesine "akts" anahtarıyla ekle.
-        - Transkript metninde tüm dersleri açıkça listele, hiçbir dersi atlama:
-          - Örnek ders formatı: "BM430 Proje Yönetimi 3.0 5.0 BB" -> {{"code": "BM430", "name": "Proje Yönetimi", "grade": "BB"}}
-          - Alternatif format: "BM211 - Diferansiyel Denklemler (Yarıyıl: 3. Yarıyıl)" -> {{"code": "BM211", "name": "Diferansiyel Denklemler", "grade": "BB"}}
-          - Staj dersleri için: "BM399 Yaz Dönemi Stajı I 0.0 2.0 YZ" -> {{"code": "BM399", "name": "Yaz Dönemi Stajı I", "grade": "YZ"}}
-        - Transkript metni tutarsız biçimlendirme içerebilir (örneğin, fazla boşluk, eksik satırlar veya özel karakterler). En iyi şekilde ayrıştırmaya çalış:
-          - Ders kodları genellikle 5-6 karakter uzunluğundadır (örneğin, "BM430", "US201", "MS301").
-          - Ders adları birden fazla kelime olabilir (örneğin, "Proje Yönetimi", "Bilim Tarihi ve Felsefesi").
-          - Notlar genellikle "AA", "BB", "CC", "DD", "FF", "FD", "YT", "YZ" formatındadır. "FF", "FD" ve "YZ" başarısız notlardır (geçer notlar: "AA", "BB", "CC", "DD", "YT").
-        - Transkripti ayrıştıramazsanız veya gerekli bilgileri belirleyemezseniz, boş bir JSON nesnesi döndür:
-          ```json
-          {{}}
-          ```
-        - Eğer bir dersin notu belirtilmemişse, varsayılan olarak "BB" kullan **ancak "YZ" notu açıkça belirtilmişse bunu kullan**.
-        - Çıktının geçerli JSON formatında olduğundan emin olun (örneğin, dizeler için çift tırnak kullanın, doğru iç içe yapı).
-        - Sonucu aşağıdaki JSON formatında döndür:
-
-        ```json
-        {{
-          "semesters": [
-            {{
-              "semester": "1. Yarıyıl",
-              "courses": [
-                {{"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I", "grade": "BB"}},
-                {{"code": "BM101", "name": "Algoritmalar ve Programlama I", "grade": "DD"}}
-              ],
-              "akts": 30
-            }},
-            ...
-          ],
-          "gpa": 2.63
-        }}
-
-        ### Transkript Metni:
-        {text}
-        """
-
-        # Gemini API'ye istek gönder
+            message, status_code = describe_error(e)
+            return message, status_code
+
+        # Sonuçları sonuç sayfasına geçir
+        return render_template('result.html', extracted_data=extracted_data)
+
+    return "Desteklenmeyen dosya formatı! Lütfen .docx veya .pdf dosyası yükleyin.", 400
+
+# Server-Sent Events biçiminde tek bir olay
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Analizi akış halinde döndür: yarıyıllar tamamlandıkça "semester" olayları, en sonda sonuç sayfası
+@bp.route('/upload/stream', methods=['POST'])
+def upload_stream():
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return "Dosya seçilmedi!", 400
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return "Desteklenmeyen dosya formatı! Lütfen .docx veya .pdf dosyası yükleyin.", 400
+    student_id = _request_student_id()
+    try:
+        program = _request_program()
+    except CatalogError as e:
+        message, status_code = describe_error(e)
+        return message, status_code
+    # İş modunda analiz worker'ı tutmaz; /upload ile aynı şekilde kuyruğa eklenir
+    if current_app.config['JOB_MODE'] or request.values.get('async') == '1':
+        return enqueue_upload(file, program, student_id)
+    try:
+        with stage("save"):
+            upload_file = spool_upload(file)
+    except UploadTooLarge as e:
+        message, status_code = describe_error(e)
+        return message, status_code
+
+    def generate():
         try:
-            messages = [
-                ("system", "Akademik transkriptleri analiz eden yardımcı bir asistansınız."),
-                ("human", prompt)
-            ]
-
-            @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-            def invoke_gemini(messages):
-                return llm.invoke(messages)
-
-            ai_msg = invoke_gemini(messages)
-            logging.debug(f"Gemini API yanıtı: {ai_msg.content[:500]}...")  # İlk 500 karakteri günlüğe kaydet
-
-            # Yanıtın boş olup olmadığını kontrol et
-            if not ai_msg.content or ai_msg.content.strip() == "":
-                logging.error("Gemini API yanıtı boş!")
-                return "Gemini API yanıtı boş!", 500
-
-            # Gemini API yanıtını temizle
-            response_content = ai_msg.content.strip()
-            if response_content.startswith('```json'):
-                response_content = response_content[7:]
-            if response_content.endswith('```'):
-                response_content = response_content[:-3]
-            response_content = response_content.strip()
-
-            if not response_content:
-                logging.error("Gemini API yanıtı temizlendikten sonra boş!")
-                return "Gemini API yanıtı temizlendikten sonra boş!", 500
-
-            # JSON ayrıştırmadan önce yanıtı kontrol et ve düzelt
-            try:
-                extracted_data = json.loads(response_content)
-            except json.JSONDecodeError as e:
-                logging.warning(f"JSON ayrıştırma hatası: {str(e)}. Yanıtı düzeltmeyi deniyorum...")
-                if response_content.endswith(']') or response_content.endswith('}'):
-                    response_content += '}'
+            for event, payload in stream_analysis(upload_file, program, student_id, file.filename):
+                if event == "result":
+                    yield _sse("result", {"html": render_template('result.html', extracted_data=payload),
+                                          "extraction_problems": payload.get("extraction_problems", [])})
                 else:
-                    response_content += ']}'
-                try:
-                    extracted_data = json.loads(response_content)
-                except json.JSONDecodeError as e:
-                    logging.error(f"Gemini API yanıtını ayrıştırma hatası: {str(e)}\nYanıt: {response_content}")
-                    return f"Gemini API yanıtını ayrıştırma hatası (geçerli JSON değil): {str(e)}", 500
-
-            # extracted_data'nın temel yapısını kontrol et ve eksik anahtarları ekle
-            if not isinstance(extracted_data, dict):
-                extracted_data = {}
-            extracted_data.setdefault("semesters", [])
-            extracted_data.setdefault("gpa", 0.0)
-
-            # Mevcut yarıyılları kontrol et ve eksik yarıyılları bul
-            available_semesters = [sem["semester"] for sem in extracted_data["semesters"]]
-            last_semester = 0
-            if available_semesters:
-                last_semester = max([int(sem.split('.')[0]) for sem in available_semesters])
-            else:
-                logging.debug("Hiçbir yarıyıl bulunamadı, last_semester 0 olarak ayarlandı.")
-
-            expected_semesters = [f"{i}. Yarıyıl" for i in range(1, 9)]
-            missing_semesters = [sem for sem in expected_semesters if sem not in available_semesters]
-            extracted_data["missing_semesters"] = missing_semesters  # Eksik yarıyılları ekle
-            logging.debug(f"Eksik yarıyıllar: {missing_semesters}")
-
-            # Başarısız zorunlu dersleri kontrol et (BURASI GÜNCELLENDİ: "YZ" eklendi)
-            failed_mandatory = []
-            for semester in extracted_data["semesters"]:
-                semester_name = semester["semester"]
-                if semester_name in MANDATORY_COURSES:
-                    for course in semester["courses"]:
-                        mandatory_course = next(
-                            (mc for mc in MANDATORY_COURSES[semester_name] if
-                             mc["code"].strip() == course["code"].strip()), None)
-                        if mandatory_course and course["grade"] in ["FF", "FD", "YZ"]:  # "YZ" eklendi
-                            failed_mandatory.append({
-                                "semester": semester_name,
-                                "code": course["code"],
-                                "name": course["name"],
-                                "grade": course["grade"]
-                            })
-            extracted_data["failed_mandatory"] = failed_mandatory
-
-            # Zorunlu derslerin eksik olup olmadığını kontrol et
-            missing_mandatory_codes = set()
-            missing_mandatory = []
-            for semester in extracted_data["semesters"]:
-                semester_name = semester["semester"]
-                if semester_name in MANDATORY_COURSES:
-                    semester_course_codes = {course["code"].strip() for course in semester["courses"]}
-                    logging.debug(f"{semester_name} için mevcut ders kodları: {semester_course_codes}")
-                    for req_course in MANDATORY_COURSES[semester_name]:
-                        if req_course["code"].strip() not in semester_course_codes:
-                            if req_course["code"] not in missing_mandatory_codes:
-                                missing_mandatory.append({
-                                    "semester": semester_name,
-                                    "code": req_course["code"],
-                                    "name": req_course["name"]
-                                })
-                                missing_mandatory_codes.add(req_course["code"])
-                                logging.debug(f"Eksik zorunlu ders eklendi: {semester_name} - {req_course['code']}")
-
-            # Eksik yarıyıllardaki zorunlu dersleri ekle
-            for missing_sem in missing_semesters:
-                if missing_sem in MANDATORY_COURSES:
-                    for req_course in MANDATORY_COURSES[missing_sem]:
-                        if req_course["code"] not in missing_mandatory_codes:
-                            missing_mandatory.append({
-                                "semester": missing_sem,
-                                "code": req_course["code"],
-                                "name": req_course["name"]
-                            })
-                            missing_mandatory_codes.add(req_course["code"])
-                            logging.debug(f"Eksik yarıyıl zorunlu dersi eklendi: {missing_sem} - {req_course['code']}")
-            extracted_data["missing_mandatory"] = missing_mandatory
-
-            # Başarısız seçmeli dersleri kontrol et (US ve MS) (BURASI GÜNCELLENDİ: "YZ" eklendi)
-            failed_electives = []
-            failed_elective_codes = set()
-            for semester in extracted_data["semesters"]:
-                semester_name = semester["semester"]
-                if semester_name in ELECTIVE_COURSES:
-                    for course in semester["courses"]:
-                        elective_course = next(
-                            (ec for ec in ELECTIVE_COURSES[semester_name] if
-                             ec["code"].strip() == course["code"].strip()), None)
-                        if elective_course and course["grade"] in ["FF", "FD", "YZ"] and course["code"] not in failed_elective_codes:  # "YZ" eklendi
-                            failed_electives.append({
-                                "semester": semester_name,
-                                "code": course["code"],
-                                "name": course["name"],
-                                "grade": course["grade"]
-                            })
-                            failed_elective_codes.add(course["code"])
-            extracted_data["failed_electives"] = failed_electives
-
-            # AKTS sorunlarını kontrol et
-            akts_issues = []
-            for semester in extracted_data["semesters"]:
-                akts = semester.get("akts", 0)
-                if akts is None:
-                    akts = 0
-                if akts < 30:
-                    akts_issues.append(f"{semester['semester']}: Toplam AKTS {akts} < 30")
-            for missing_sem in missing_semesters:
-                akts_issues.append(f"{missing_sem}: Toplam AKTS 0 < 30 (Yarıyıl eksik)")
-            extracted_data["akts_issues"] = akts_issues
-
-            # Seçmeli ders sayısını kontrol et
-            elective_issues = []
-
-            # 3. ve 4. yarıyıllarda US dersleri (1 US dersi gerekli)
-            for sem_num in [3, 4]:
-                sem_key = f"{sem_num}. Yarıyıl"
-                if sem_key in available_semesters:
-                    us_courses = [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
-                                  if c["code"].startswith("US") and c["grade"] not in ["FF", "FD", "YZ"]]  # "YZ" eklendi
-                    if len(us_courses) < 1:
-                        elective_issues.append(f"{sem_num}. Yarıyıl'da US kodlu bir ders eksik.")
-                elif sem_key in ELECTIVE_COURSES:
-                    elective_issues.append(f"{sem_num}. Yarıyıl'da US kodlu bir ders eksik.")
-
-            # 5. ve 6. yarıyıllarda MS dersleri (1 MS dersi gerekli)
-            for sem_num in [5, 6]:
-                sem_key = f"{sem_num}. Yarıyıl"
-                if sem_key in available_semesters:
-                    ms_courses = [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
-                                  if c["code"].startswith("MS") and c["grade"] not in ["FF", "FD", "YZ"]]  # "YZ" eklendi
-                    if len(ms_courses) < 1:
-                        elective_issues.append(f"{sem_num}. Yarıyıl'da MS kodlu bir ders eksik.")
-                elif sem_key in ELECTIVE_COURSES:
-                    elective_issues.append(f"{sem_num}. Yarıyıl'da MS kodlu bir ders eksik.")
-
-            # 7. ve 8. yarıyıllarda BM/MTH dersleri (10 ders gerekli)
-            bm_mth_courses = []
-            for sem_num in [7, 8]:
-                sem_key = f"{sem_num}. Yarıyıl"
-                if sem_key in available_semesters:
-                    bm_mth_courses += [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
-                                       if (c["code"].startswith("BM") or c["code"].startswith("MTH"))
-                                       and c["code"] not in ["BM401", "BM499", "BM498"]
-                                       and c["grade"] not in ["FF", "FD", "YZ"]]  # "YZ" eklendi
-            if last_semester >= 7 and len(bm_mth_courses) < 10:
-                elective_issues.append(f"7. ve 8. Yarıyıl'da en az 10 BM/MTH dersi alınmalı (Alınan: {len(bm_mth_courses)})")
-
-            extracted_data["elective_issues"] = elective_issues
-
-            # Mezuniyet durumunu güncelle
-            gpa = extracted_data.get("gpa", 0)
-            if gpa is None:
-                gpa = 0.0
-                logging.debug("GPA None olarak geçti, 0.0 olarak ayarlandı.")
-
-            graduation_reasons = []
-
-            # Eksik yarıyıl kontrolü
-            if last_semester < 8:
-                graduation_reasons.append(f"Eksik yarıyıl sayısı: {8 - last_semester} ({', '.join(missing_semesters)})")
-
-            # Zorunlu ders kontrolü
-            if missing_mandatory:
-                graduation_reasons.append(f"Eksik zorunlu ders sayısı: {len(missing_mandatory)}")
-
-            # Başarısız zorunlu ders kontrolü
-            if failed_mandatory:
-                graduation_reasons.append(f"Başarısız zorunlu ders sayısı: {len(failed_mandatory)}")
-
-            # Başarısız seçmeli ders kontrolü
-            if failed_electives:
-                graduation_reasons.append(f"Başarısız seçmeli ders sayısı: {len(failed_electives)}")
-
-            # AKTS kontrolü
-            if akts_issues:
-                graduation_reasons.append(f"AKTS eksikliği olan yarıyıl sayısı: {len(akts_issues)}")
-
-            # Seçmeli ders kontrolü
-            if elective_issues:
-                graduation_reasons.append(f"Seçmeli ders eksiklikleri: {len(elective_issues)}")
-
-            # GPA kontrolü
-            if gpa < 2.50:
-                graduation_reasons.append(f"Genel not ortalaması yetersiz: {gpa:.2f} (Gereken: 2.50)")
-
-            # Mezuniyet durumunu belirle
-            if (last_semester >= 8 and
-                    not missing_mandatory and
-                    not failed_mandatory and
-                    not failed_electives and
-                    not akts_issues and
-                    not elective_issues and
-                    gpa >= 2.50):
-                extracted_data["can_graduate"] = True
-                extracted_data["graduation_message"] = "Tebrikler! Tüm mezuniyet şartlarını karşılıyorsunuz."
-            else:
-                extracted_data["can_graduate"] = False
-                extracted_data["graduation_message"] = f"Mezuniyet şartları karşılanmadı:\n- " + "\n- ".join(graduation_reasons)
-
-            # Sonuçları sonuç sayfasına geçir
-            return render_template('result.html', extracted_data=extracted_data)
+                    yield _sse(event, payload)
         except Exception as e:
-            if "429" in str(e):
-                logging.error(f"Kota aşımı hatası: {str(e)}")
-                return "Üzgünüz, Google Gemini API kota sınırınızı aştınız. Google AI Studio veya Google Cloud Console'da kota durumunuzu kontrol edin.", 429
-            logging.error(f"Gemini API ile iletişim veya veri ayrıştırma hatası: {str(e)}")
-            return f"İstek işlenirken hata oluştu: {str(e)}", 500
+            message, status_code = describe_error(e)
+            yield _sse("error", {"message": message, "status": status_code})
+        finally:
+            upload_file.close()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+# Dosyayı benzersiz bir adla kaydet ve analiz işini kuyruğa ekle
+def enqueue_upload(file, program=None, student_id=None):
+    extension = os.path.splitext(file.filename)[1].lower()
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}{extension}")
+    try:
+        with stage("save"):
+            save_upload(file, file_path)
+    except UploadTooLarge as e:
+        message, status_code = describe_error(e)
+        return message, status_code
+    except Exception as e:
+        logging.error(f"Dosya kaydetme hatası: {str(e)}")
+        return f"Dosya kaydetme hatası: {str(e)}", 500
+    _job_workers().ensure_started()
+    job_id = _job_queue().enqueue(file_path, program, student_id, file.filename)
+    _job_workers().notify()
+    logging.info(f"Analiz işi kuyruğa eklendi: {job_id}")
+
+    # Tarayıcı formları sonuç sayfasına yönlendirilir, API istemcileri iş kimliğini alır
+    if request.accept_mimetypes.best == 'application/json' or request.values.get('async') == '1':
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": url_for('.job_status', job_id=job_id),
+            "result_url": url_for('.job_result', job_id=job_id)
+        }), 202
+    return redirect(url_for('.job_result', job_id=job_id))
+
+# Prometheus metin biçiminde metrikler (bu worker sürecine ait)
+@bp.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = _job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return jsonify(job)
+
+@bp.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = _job_queue().get(job_id)
+    if job is None:
+        return "İş bulunamadı!", 404
+    if job["status"] == STATUS_DONE:
+        return render_template('result.html', extracted_data=job["result"])
+    if job["status"] == STATUS_FAILED:
+        return job["error"], job["status_code"] or 500
+    # İş henüz bitmedi; tarayıcı sayfayı birkaç saniyede bir yeniler
+    return "İşleniyor, lütfen bekleyin...", 202, {"Refresh": "3"}
+
+# Kayıtlı analizler: öğrenci numarası ve/veya programa göre özetler (en yeni önce)
+@bp.route('/analyses')
+def list_analyses():
+    can_graduate = request.args.get('can_graduate')
+    records = _analysis_store().list(
+        student_id=request.args.get('student_id'),
+        program=request.args.get('program'),
+        can_graduate=None if can_graduate is None else can_graduate == '1',
+        limit=request.args.get('limit', type=int)
+    )
+    return jsonify({"analyses": records})
+
+@bp.route('/analyses/<document_hash>')
+def get_analysis(document_hash):
+    record = _analysis_store().get(document_hash, request.args.get('program'))
+    if record is None:
+        return jsonify({"error": "Analiz bulunamadı"}), 404
+    return jsonify(record)
+
+@bp.route('/analyses/<document_hash>/result')
+def analysis_result(document_hash):
+    record = _analysis_store().get(document_hash, request.args.get('program'))
+    if record is None:
+        return "Analiz bulunamadı!", 404
+    return render_template('result.html', extracted_data=record["result"])
+
+# Bir dersten kalan (status=failed) veya dersi eksik (status=missing) öğrenciler
+@bp.route('/reports/courses/<code>')
+def course_report(code):
+    status = request.args.get('status', 'failed')
+    if status not in ('failed', 'missing'):
+        return jsonify({"error": "status 'failed' veya 'missing' olmalı"}), 400
+    records = _analysis_store().course_report(code, status, program=request.args.get('program'),
+                                              limit=request.args.get('limit', type=int))
+    return jsonify({"code": code, "status": status, "students": records})
+
+# Yarıyıl bazında AKTS eksikliği olan öğrenciler
+@bp.route('/reports/akts')
+def akts_report():
+    program = request.args.get('program')
+    return jsonify({"program": program, "semesters": _analysis_store().akts_shortfalls(program)})
+
+@bp.route('/reports/summary')
+def summary_report():
+    return jsonify(_analysis_store().summary(request.args.get('program')))
+
+# Yüklenen dosyaları (tekil .docx/.pdf veya .zip arşivi) geçici klasöre çıkar.
+# Aynı adlı dosyalar çakışmasın diye her dosya kendi alt klasörüne yazılır.
+def _batch_target(directory, index, name):
+    subdirectory = os.path.join(directory, str(index))
+    os.makedirs(subdirectory)
+    return os.path.join(subdirectory, secure_filename(name) or 'transcript.docx')
+
+def _save_batch_files(files, directory):
+    paths = []
+    for file in files:
+        name = file.filename or ''
+        if name.lower().endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    member_name = os.path.basename(member.filename)
+                    if member.is_dir() or not member_name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        continue
+                    target = _batch_target(directory, len(paths), member_name)
+                    copy_zip_member(archive, member, target)
+                    paths.append(target)
+        elif name.lower().endswith(SUPPORTED_EXTENSIONS):
+            target = _batch_target(directory, len(paths), name)
+            save_upload(file, target)
+            paths.append(target)
+    return paths
+
+@bp.route('/batch', methods=['POST'])
+def batch_upload():
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return "Dosya seçilmedi!", 400
+    try:
+        program = _request_program()
+    except CatalogError as e:
+        message, status_code = describe_error(e)
+        return message, status_code
+    directory = tempfile.mkdtemp(prefix='batch_')
+    try:
+        paths = _save_batch_files(files, directory)
+    except UploadTooLarge as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        message, status_code = describe_error(e)
+        return message, status_code
+    except Exception as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        logging.error(f"Toplu yükleme hatası: {str(e)}")
+        return f"Dosya kaydetme hatası: {str(e)}", 400
+    if not paths:
+        shutil.rmtree(directory, ignore_errors=True)
+        return "Desteklenen dosya bulunamadı! Lütfen .docx/.pdf dosyaları veya bunları içeren bir .zip arşivi yükleyin.", 400
+
+    # Her transkript bittiğinde bir JSON satırı gönder
+    def generate():
+        records = iter_batch(paths, program=program)
+        try:
+            for record in records:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            # Bağlantı kesildiyse kuyruktaki analizleri iptal et, sonra dosyaları sil
+            records.close()
+            shutil.rmtree(directory, ignore_errors=True)
 
-    return "Desteklenmeyen dosya formatı! Lütfen yalnızca .docx dosyası yükleyin.", 400
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
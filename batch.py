@@ -0,0 +1,104 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from analysis import analyze_prepared, describe_error, prepare_file
+from catalog import CatalogError, resolve_program
+from extraction import SUPPORTED_EXTENSIONS
+
+# Toplu (dönem sonu) transkript analizi.
+# Metin çıkarma bir süreç havuzunda yapılır, Gemini çağrıları sınırlı eşzamanlılıkla gönderilir
+# ve her transkript bittiği anda bir JSON satırı üretilir.
+
+BATCH_EXTRACT_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+
+# Çıkarması sorunlu sonuçlar "incomplete" durumuyla işaretlenir; mezuniyet kararı içermezler
+def _ok(path, result):
+    status = "incomplete" if result.get("extraction_problems") else "ok"
+    return {"file": os.path.basename(path), "status": status, "result": result}
+
+
+def _error(path, e):
+    message, status_code = describe_error(e)
+    return {"file": os.path.basename(path), "status": "error", "status_code": status_code, "error": message}
+
+
+# Dosyaları programın kurallarıyla analiz et ve sonuçları tamamlanma sırasıyla üret.
+# Üretici erken kapatılırsa (ör. istemci bağlantıyı kesti, GeneratorExit) kuyruktaki çıkarma ve
+# Gemini işleri iptal edilir; havuzlar bekletilmeden kapatılır, yalnızca o an çalışan işler tamamlanır.
+def iter_batch(paths, workers=BATCH_EXTRACT_WORKERS, concurrency=BATCH_LLM_CONCURRENCY, program=None):
+    if not paths:
+        return
+    extract_pool = ProcessPoolExecutor(max_workers=max(1, min(workers, len(paths))))
+    llm_pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    # future -> (dosya yolu, aşama)
+    pending = {}
+    try:
+        pending.update({extract_pool.submit(prepare_file, path): (path, "extract") for path in paths})
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, stage = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logging.error(f"Toplu analiz hatası ({os.path.basename(path)}): {str(e)}")
+                    yield _error(path, e)
+                    continue
+                if stage == "extract":
+                    pending[llm_pool.submit(analyze_prepared, value, program, None, os.path.basename(path))] = (path, "analyze")
+                else:
+                    yield _ok(path, value)
+    finally:
+        if pending:
+            logging.warning(f"Toplu analiz yarıda kesildi, {len(pending)} iş iptal ediliyor")
+            for future in pending:
+                future.cancel()
+        extract_pool.shutdown(wait=False, cancel_futures=True)
+        llm_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Bir klasördeki desteklenen transkript dosyalarını sıralı olarak listele
+def collect_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith('~$')
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bir klasördeki transkriptleri toplu olarak analiz eder (JSON Lines çıktı).")
+    parser.add_argument("directory", help="Transkript dosyalarını içeren klasör")
+    parser.add_argument("-o", "--output", help="Çıktı dosyası (varsayılan: standart çıktı)")
+    parser.add_argument("--workers", type=int, default=BATCH_EXTRACT_WORKERS, help="Metin çıkarma süreç sayısı")
+    parser.add_argument("--concurrency", type=int, default=BATCH_LLM_CONCURRENCY, help="Eşzamanlı Gemini çağrısı sayısı")
+    parser.add_argument("--program", help="Program kimliği (curricula/<program>.json, varsayılan: DEFAULT_PROGRAM)")
+    args = parser.parse_args(argv)
+
+    try:
+        program = resolve_program(args.program)
+    except CatalogError as e:
+        parser.error(str(e))
+
+    paths = collect_files(args.directory)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failures = 0
+    try:
+        for record in iter_batch(paths, workers=args.workers, concurrency=args.concurrency, program=program):
+            if record["status"] != "ok":
+                failures += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(paths)} dosya işlendi, {failures} hata.", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import os
+import sys
+
+# Gunicorn'u gerçek Gemini yerine MockGemini ile çalıştırır; worker yapılandırmalarını
+# run_benchmark.py --url ile karşılaştırmak için:
+#
+#   GUNICORN_WORKERS=4 GUNICORN_THREADS=8 gunicorn -c benchmarks/gunicorn_mock.conf.py
+#   python benchmarks/run_benchmark.py --url http://127.0.0.1:8000 --requests 200 --concurrency 16
+#
+# Sahte istemci ayarları: MOCK_GEMINI_LATENCY, MOCK_GEMINI_JITTER, MOCK_GEMINI_ERROR_RATE,
+# MOCK_GEMINI_TRUNCATE_RATE, MOCK_GEMINI_RECORDINGS.
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path[:0] = [ROOT, BENCHMARK_DIR]
+
+# Ana yapılandırmadaki ayarları (wsgi_app, workers, threads, preload_app, post_fork) aynen kullan
+with open(os.path.join(ROOT, "gunicorn.conf.py"), encoding="utf-8") as f:
+    exec(compile(f.read(), "gunicorn.conf.py", "exec"))
+
+os.environ.setdefault("GOOGLE_API_KEY", "mock")
+os.environ.setdefault("LOCAL_PARSER_ENABLED", "0")
+# Aynı dosyalar tekrar gönderildiğinde önbellek ve analiz deposu isabeti ölçülmesin
+os.environ.setdefault("RESULT_CACHE_MAX_ENTRIES", "0")
+os.environ.setdefault("ANALYSIS_STORE_ENABLED", "0")
+# Kıyaslamada kota beklemesi ölçümü bozmasın
+os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "6000")
+
+import analysis  # noqa: E402
+from mock_gemini import DEFAULT_RECORDINGS, MockGemini  # noqa: E402
+
+_mock = MockGemini.from_file(
+    os.getenv("MOCK_GEMINI_RECORDINGS", DEFAULT_RECORDINGS),
+    latency=float(os.getenv("MOCK_GEMINI_LATENCY", "0.5")),
+    jitter=float(os.getenv("MOCK_GEMINI_JITTER", "0.1")),
+    error_rate=float(os.getenv("MOCK_GEMINI_ERROR_RATE", "0")),
+    truncate_rate=float(os.getenv("MOCK_GEMINI_TRUNCATE_RATE", "0")),
+    tail_rate=float(os.getenv("MOCK_GEMINI_TAIL_RATE", "0")),
+    tail_latency=float(os.getenv("MOCK_GEMINI_TAIL_LATENCY", "5.0")),
+)
+# Uygulama bu yapılandırmadan sonra yüklendiği için aynı analysis modülünü kullanır
+analysis.gateway.client_factory = lambda model=None: _mock
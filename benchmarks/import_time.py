@@ -0,0 +1,69 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Uygulamanın açılış süresini ölçer: her tekrar yeni bir Python sürecinde
+# "import app; app.create_app()" çalıştırır ve -X importtime çıktısından
+# en pahalı modülleri listeler.
+#
+#   python benchmarks/import_time.py --runs 5 --top 15
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# create_app yalnızca app modülünde vardır; diğer modüller için yalnızca içe aktarma ölçülür
+STARTUP_SNIPPET = (
+    "import time; started = time.perf_counter(); "
+    "import {module}; imported = time.perf_counter(); "
+    "{create}; created = time.perf_counter(); "
+    "print(f'{{imported - started:.6f}} {{created - imported:.6f}}')"
+)
+
+
+def run_once(module):
+    create = f"{module}.create_app()" if module == "app" else "None"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET.format(module=module, create=create)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    import_seconds, create_seconds = (float(value) for value in completed.stdout.split())
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            # (kümülatif mikrosaniye, modül adı, iç içe seviye)
+            modules.append((int(match.group(2)), match.group(4), len(match.group(3)) // 2))
+    return import_seconds, create_seconds, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uygulama içe aktarma ve create_app() süresini ölçer.")
+    parser.add_argument("--runs", type=int, default=5, help="Tekrar sayısı (ilki ısınma olarak sayılmaz)")
+    parser.add_argument("--top", type=int, default=15, help="Listelenecek en pahalı modül sayısı")
+    parser.add_argument("--module", default="app", help="Ölçülecek modül (ör. app, analysis, batch)")
+    args = parser.parse_args(argv)
+
+    # İlk çalıştırma .pyc dosyalarını üretir; ölçüme katılmaz
+    run_once(args.module)
+    import_times, create_times = [], []
+    modules = []
+    for _ in range(args.runs):
+        import_seconds, create_seconds, modules = run_once(args.module)
+        import_times.append(import_seconds)
+        create_times.append(create_seconds)
+
+    print(f"import {args.module}: medyan {statistics.median(import_times) * 1000:.1f} ms, "
+          f"en kötü {max(import_times) * 1000:.1f} ms ({args.runs} çalıştırma)")
+    if args.module == "app":
+        print(f"create_app(): medyan {statistics.median(create_times) * 1000:.1f} ms")
+    print(f"\n{args.module} modülünün en pahalı {args.top} doğrudan içe aktarması (kümülatif, son çalıştırma):")
+    direct = sorted((m for m in modules if m[2] == 1), reverse=True)[:args.top]
+    for cumulative, name, _ in direct:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
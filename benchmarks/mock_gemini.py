@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+
+# ChatGoogleGenerativeAI yerine geçen yerel sahte istemci (kıyaslama ve çevrimdışı deneme için).
+# Kayıtlı yanıtları prompt'un özetine göre geri oynatır; gecikme, 429 ve kesilmiş JSON eklenebilir.
+# Kayıtlar benchmarks/record.py ile üretilir.
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings.json')
+# Kaydı bulunmayan prompt'lar için boş ama geçerli yanıt
+FALLBACK_CONTENT = '```json\n{"semesters": [], "gpa": 0.0}\n```'
+
+
+# Sohbet mesajlarındaki kullanıcı prompt'undan kayıt anahtarı üret
+def prompt_key(messages):
+    prompt = next((content for role, content in reversed(messages) if role == "human"), "")
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+# Gemini'nin kota hatası gibi görünen hata (ağ geçidi bunu tekrar denenebilir sayar)
+class MockRateLimitError(Exception):
+    pass
+
+
+class MockMessage:
+    def __init__(self, content, input_tokens=0, output_tokens=0):
+        self.content = content
+        self.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                               "total_tokens": input_tokens + output_tokens} if input_tokens or output_tokens else None
+        self.response_metadata = {}
+
+
+class MockGemini:
+    def __init__(self, recordings, latency=0.5, jitter=0.1, error_rate=0.0, truncate_rate=0.0,
+                 retry_after=0.2, chunk_chars=64, seed=None, tail_rate=0.0, tail_latency=5.0):
+        self.recordings = recordings
+        self.latency = latency
+        self.jitter = jitter
+        # Kuyruk gecikmesi: çağrıların tail_rate kadarı tail_latency sürer
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.chunk_chars = chunk_chars
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "rate_limited": 0, "truncated": 0, "unmatched": 0}
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RECORDINGS, **options):
+        with open(path, encoding='utf-8') as f:
+            recordings = {key: entry["content"] for key, entry in json.load(f).items()}
+        return cls(recordings, **options)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    # Bu çağrı için (gecikme, yanıt metni) seç veya 429 fırlat
+    def _respond(self, messages):
+        self._count("calls")
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            if self._random.random() < self.tail_rate:
+                delay = self.tail_latency
+            rate_limited = self._random.random() < self.error_rate
+            truncate_at = self._random.uniform(0.5, 0.95) if self._random.random() < self.truncate_rate else None
+        if rate_limited:
+            self._count("rate_limited")
+            raise MockRateLimitError(f"429 Resource has been exhausted (e.g. check quota). "
+                                     f"Please retry in {self.retry_after}s")
+        content = self.recordings.get(prompt_key(messages))
+        if content is None:
+            self._count("unmatched")
+            content = FALLBACK_CONTENT
+        if truncate_at is not None:
+            self._count("truncated")
+            content = content[:int(len(content) * truncate_at)]
+        return delay, content
+
+    @staticmethod
+    def _usage(messages, content):
+        prompt_chars = sum(len(text) for _, text in messages)
+        return prompt_chars // 4, len(content) // 4
+
+    async def ainvoke(self, messages):
+        delay, content = self._respond(messages)
+        await asyncio.sleep(delay)
+        return MockMessage(content, *self._usage(messages, content))
+
+    # Gecikmenin yarısı ilk parçadan önce, kalanı parçalara bölünerek beklenir
+    async def astream(self, messages):
+        delay, content = self._respond(messages)
+        await asyncio.sleep(delay / 2)
+        pieces = [content[i:i + self.chunk_chars] for i in range(0, len(content), self.chunk_chars)] or [""]
+        for index, piece in enumerate(pieces):
+            await asyncio.sleep(delay / 2 / len(pieces))
+            usage = self._usage(messages, content) if index == len(pieces) - 1 else (0, 0)
+            yield MockMessage(piece, *usage)
@@ -0,0 +1,84 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+# Sahte Gemini istemcisi (mock_gemini.py) için kayıtlı yanıtları üretir.
+# Her örnek transkript için uygulamanın göndereceği prompt'lar (tam, sıkıştırılmış ve yarıyıl
+# başına) hesaplanır. Yanıtlar varsayılan olarak yerel tablo ayrıştırıcısının çıktısından
+# oluşturulur; --live ile gerçek Gemini'den alınır (GOOGLE_API_KEY gerekir).
+#
+#   python benchmarks/record.py                 # uploads/*.docx -> benchmarks/recordings.json
+#   python benchmarks/record.py --live
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import create_llm, extract_text  # noqa: E402
+from extraction import SUPPORTED_EXTENSIONS  # noqa: E402
+from mock_gemini import DEFAULT_RECORDINGS, prompt_key  # noqa: E402
+from prompts import SYSTEM_MESSAGE, build_semester_prompt, prepare_prompt, split_semesters  # noqa: E402
+from transcript_parser import parse_docx  # noqa: E402
+
+
+def _fenced(data):
+    return "```json\n" + json.dumps(data, ensure_ascii=False) + "\n```"
+
+
+# (tür, mesajlar, yerel ayrıştırıcıdan beklenen yanıt) üçlüleri
+def _requests_for(path):
+    text = extract_text(path)
+    try:
+        data, _ = parse_docx(path)
+    except Exception:
+        data = {"semesters": [], "gpa": None}
+    # Ayrıştırılamayan belgelerde de Gemini gibi sayısal bir ortalama döndür
+    if data["gpa"] is None:
+        data["gpa"] = 0.0
+    parsed = {semester["semester"]: semester for semester in data["semesters"]}
+
+    for kind, compact in (("single-compact", True), ("single-full", False)):
+        prompt, _, _ = prepare_prompt(text, compact=compact)
+        yield kind, [("system", SYSTEM_MESSAGE), ("human", prompt)], _fenced(data)
+
+    for semester in split_semesters(text):
+        local = parsed.get(semester["semester"], {})
+        response = {"courses": local.get("courses", []), "akts": local.get("akts"), "gpa": semester["gpa"]}
+        messages = [("system", SYSTEM_MESSAGE), ("human", build_semester_prompt(semester["text"]))]
+        yield "semester", messages, _fenced(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sahte Gemini için kayıtlı yanıtları üretir.")
+    parser.add_argument("files", nargs="*", help="Transkript dosyaları (varsayılan: uploads/*)")
+    parser.add_argument("-o", "--output", default=DEFAULT_RECORDINGS, help="Kayıt dosyası")
+    parser.add_argument("--live", action="store_true", help="Yanıtları gerçek Gemini'den al")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(
+        path for path in glob.glob(os.path.join(ROOT, "uploads", "*"))
+        if path.lower().endswith(SUPPORTED_EXTENSIONS) and not os.path.basename(path).startswith('~$')
+    )
+    llm = create_llm() if args.live else None
+    recordings = {}
+    for path in files:
+        name = os.path.basename(path)
+        try:
+            requests = list(_requests_for(path))
+        except Exception as e:
+            print(f"atlandı: {name} ({e})", file=sys.stderr)
+            continue
+        for kind, messages, content in requests:
+            if llm is not None:
+                content = llm.invoke(messages).content
+            recordings[prompt_key(messages)] = {"file": name, "kind": kind, "content": content}
+        print(f"{name}: {len(requests)} yanıt", file=sys.stderr)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(recordings, f, ensure_ascii=False, indent=1, sort_keys=True)
+    print(f"{len(recordings)} kayıt yazıldı: {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
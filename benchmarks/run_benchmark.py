@@ -0,0 +1,276 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import uuid
+from contextlib import contextmanager
+
+# /upload hattının çevrimdışı kıyaslaması.
+# Varsayılan olarak uygulama süreç içinde (Flask test istemcisi) çalışır ve Gemini yerine
+# kayıtlı yanıtları oynatan MockGemini kullanılır. --url ile çalışan bir sunucu (ör. gunicorn
+# -c benchmarks/gunicorn_mock.conf.py) hedeflenir; böylece worker yapılandırmaları karşılaştırılabilir.
+#
+# Rapor: verim (istek/sn), uçtan uca p50/p99 gecikme, Server-Timing başlığından aşama bazında
+# p50/p99 süreler ve (--memory ile, sıralı ayrı bir geçişte) aşama başına tracemalloc tepe bellek.
+#
+#   python benchmarks/run_benchmark.py --requests 100 --concurrency 8 --latency 0.8
+#   python benchmarks/run_benchmark.py --llm-only --error-rate 0.1 --truncate-rate 0.05 --memory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_gemini import DEFAULT_RECORDINGS, MockGemini  # noqa: E402
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def parse_server_timing(header):
+    stages = []
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            stages.append((name, float(duration) / 1000))
+    return stages
+
+
+def _multipart(path, field="file"):
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as f:
+        content = f.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; "
+            f"filename=\"{os.path.basename(path)}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode()
+    body += content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+# Çalışan bir sunucuya istek gönderen istemci: (durum kodu, Server-Timing başlığı) döndürür
+def _url_client(base_url, endpoint):
+    def send(path):
+        body, content_type = _multipart(path)
+        request = urllib.request.Request(base_url.rstrip('/') + endpoint, data=body, method='POST',
+                                         headers={"Content-Type": content_type, "X-Trace-Timing": "1"})
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Server-Timing")
+    return send
+
+
+# Süreç içi Flask uygulamasına istek gönderen istemci (her thread kendi test istemcisini kullanır)
+def _app_client(app, endpoint):
+    local = threading.local()
+
+    def send(path):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        with open(path, 'rb') as f:
+            response = client.post(endpoint, data={"file": (f, os.path.basename(path))},
+                                   content_type='multipart/form-data', headers={"X-Trace-Timing": "1"})
+            response.get_data()
+        return response.status_code, response.headers.get("Server-Timing")
+    return send
+
+
+# Uygulamayı süreç içinde kur: sahte Gemini, geçici klasörler, isteğe bağlı önbellek/yerel ayrıştırıcı
+def build_app(args, workdir):
+    import analysis
+    from app import create_app
+    from cache import ResultCache
+    from gateway import LLMGateway
+    from store import AnalysisStore
+
+    mock = MockGemini.from_file(args.recordings, latency=args.latency, jitter=args.jitter,
+                                error_rate=args.error_rate, truncate_rate=args.truncate_rate, seed=args.seed,
+                                tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+    # Tüm model kademeleri aynı sahte istemciyi kullanır
+    analysis.gateway = LLMGateway(lambda model=None: mock, analysis.MODEL_TIERS, max_concurrency=args.gemini_concurrency,
+                                  requests_per_minute=args.requests_per_minute, hedge=args.hedge,
+                                  rate_limit_path=os.path.join(workdir, "ratelimit.sqlite3"))
+    # max_entries=0: her yazım hemen tahliye edilir, yani önbellek devre dışı kalır
+    analysis.result_cache = ResultCache(os.path.join(workdir, "cache.sqlite3"),
+                                        max_entries=1000 if args.cache else 0)
+    # Kayıtlı analiz deposu da tekrar gönderilen dosyaları Gemini'siz yanıtlar; önbellekle birlikte açılır
+    analysis.analysis_store = AnalysisStore(os.path.join(workdir, "analyses.sqlite3"))
+    analysis.ANALYSIS_STORE_ENABLED = args.cache
+    analysis.LOCAL_PARSER_ENABLED = not args.llm_only
+    app = create_app({
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+    })
+    return app, mock
+
+
+def run_load(send, files, total, concurrency):
+    results = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            path = files[index % len(files)]
+            started = time.perf_counter()
+            try:
+                status, timing = send(path)
+            except Exception as e:
+                status, timing = f"hata: {type(e).__name__}", None
+            elapsed = time.perf_counter() - started
+            with lock:
+                results.append((os.path.basename(path), status, elapsed, parse_server_timing(timing)))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+# Her dosyayı sırayla bir kez işleyip aşama başına tracemalloc tepe belleğini ölç
+def measure_memory(send, files):
+    import analysis
+    import app as app_module
+
+    peaks = {}
+    original_analysis_stage, original_app_stage = analysis.stage, app_module.stage
+
+    @contextmanager
+    def traced_stage(name):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        with original_analysis_stage(name):
+            yield
+        peak = tracemalloc.get_traced_memory()[1] - before
+        peaks.setdefault(name, []).append(peak)
+
+    analysis.stage = app_module.stage = traced_stage
+    tracemalloc.start()
+    try:
+        for path in files:
+            send(path)
+    finally:
+        tracemalloc.stop()
+        analysis.stage, app_module.stage = original_analysis_stage, original_app_stage
+    return peaks
+
+
+def report(results, duration, peaks, mock, args):
+    latencies = [elapsed for _, status, elapsed, _ in results]
+    statuses = {}
+    stage_times = {}
+    for _, status, _, stages in results:
+        statuses[status] = statuses.get(status, 0) + 1
+        for name, elapsed in stages:
+            stage_times.setdefault(name, []).append(elapsed)
+
+    summary = {
+        "requests": len(results),
+        "concurrency": args.concurrency,
+        "duration_seconds": duration,
+        "throughput_rps": len(results) / duration if duration else 0.0,
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": max(latencies) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "stages": {
+            name: {"count": len(values), "p50": percentile(values, 0.50), "p99": percentile(values, 0.99),
+                   "peak_memory_bytes": max(peaks[name]) if name in peaks else None}
+            for name, values in stage_times.items()
+        },
+        "mock": mock.stats if mock is not None else None,
+    }
+    for name, values in peaks.items():
+        summary["stages"].setdefault(name, {"count": 0, "p50": None, "p99": None})["peak_memory_bytes"] = max(values)
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+
+    print(f"İstek: {summary['requests']}, eşzamanlılık: {args.concurrency}, süre: {duration:.2f} sn, "
+          f"verim: {summary['throughput_rps']:.2f} istek/sn")
+    print(f"Gecikme: p50 {summary['latency_p50'] * 1000:.1f} ms, p99 {summary['latency_p99'] * 1000:.1f} ms, "
+          f"en kötü {summary['latency_max'] * 1000:.1f} ms")
+    print("Durum kodları: " + ", ".join(f"{status}×{count}" for status, count in sorted(summary["statuses"].items())))
+    print(f"\n{'Aşama':<15} {'adet':>6} {'p50 ms':>9} {'p99 ms':>9} {'tepe bellek KB':>15}")
+    for name, values in sorted(summary["stages"].items()):
+        p50 = f"{values['p50'] * 1000:9.1f}" if values["p50"] is not None else f"{'-':>9}"
+        p99 = f"{values['p99'] * 1000:9.1f}" if values["p99"] is not None else f"{'-':>9}"
+        memory = values.get("peak_memory_bytes")
+        memory = f"{memory / 1024:15.1f}" if memory is not None else f"{'-':>15}"
+        print(f"{name:<15} {values['count']:>6} {p50} {p99} {memory}")
+    if mock is not None:
+        print("\nSahte Gemini: " + ", ".join(f"{key} {value}" for key, value in mock.stats.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/upload hattını sahte Gemini ile kıyaslar.")
+    parser.add_argument("files", nargs="*", help="Transkript dosyaları (varsayılan: uploads/*.docx)")
+    parser.add_argument("--requests", type=int, default=50, help="Toplam istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=4, help="Eşzamanlı istemci sayısı")
+    parser.add_argument("--endpoint", default="/upload", help="Hedef uç nokta (/upload veya /upload/stream)")
+    parser.add_argument("--url", help="Süreç içi uygulama yerine bu adresteki sunucuyu hedefle")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="Kayıtlı yanıt dosyası")
+    parser.add_argument("--latency", type=float, default=0.5, help="Sahte Gemini ortalama gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Gecikme standart sapması (sn)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 döndürülen çağrı oranı")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Kesilmiş JSON döndürülen çağrı oranı")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Uzun süren (tail-latency) çağrı oranı")
+    parser.add_argument("--tail-latency", type=float, default=5.0, help="Uzun süren çağrıların gecikmesi (sn)")
+    parser.add_argument("--hedge", action="store_true", help="p95 gecikmesini aşan çağrılar için yedek istek gönder")
+    parser.add_argument("--seed", type=int, default=1, help="Hata ve gecikme üretimi için tohum")
+    parser.add_argument("--gemini-concurrency", type=int, default=8, help="Ağ geçidi eşzamanlılık sınırı")
+    parser.add_argument("--requests-per-minute", type=float, default=6000, help="Ağ geçidi dakikalık kota")
+    parser.add_argument("--llm-only", action="store_true", help="Yerel ayrıştırıcıyı kapat, her istek Gemini'ye gitsin")
+    parser.add_argument("--cache", action="store_true", help="Sonuç önbelleğini ve analiz deposunu açık bırak")
+    parser.add_argument("--memory", action="store_true", help="Aşama başına bellek ölçümü (ayrı, sıralı geçiş)")
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yazdır")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(
+        path for path in glob.glob(os.path.join(ROOT, "uploads", "*.docx"))
+        if not os.path.basename(path).startswith('~$')
+    )
+    if not files:
+        parser.error("Kıyaslanacak dosya bulunamadı")
+
+    mock = None
+    peaks = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as workdir:
+        if args.url:
+            send = _url_client(args.url, args.endpoint)
+        else:
+            app, mock = build_app(args, workdir)
+            send = _app_client(app, args.endpoint)
+            # İlk istekler istemci kurulumunu ve modül ısınmasını ölçüme katmasın
+            send(files[0])
+            mock.stats = dict.fromkeys(mock.stats, 0)
+        results, duration = run_load(send, files, args.requests, args.concurrency)
+        if args.memory:
+            if args.url:
+                print("--memory yalnızca süreç içi çalıştırmada kullanılabilir", file=sys.stderr)
+            else:
+                peaks = measure_memory(send, files)
+        report(results, duration, peaks, mock, args)
+
+
+if __name__ == '__main__':
+    main()
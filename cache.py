@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# Gemini sonuçları için kalıcı önbellek (SQLite)
+# Aynı veritabanı dosyası tüm gunicorn worker'ları tarafından paylaşılır.
+
+DEFAULT_CACHE_PATH = 'backend/cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+# Temizlenmiş metin + prompt/model sürümünden önbellek anahtarı üret
+def make_cache_key(text, prompt_version, model_name):
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._initialized = False
+
+    # Veritabanı dosyası ve tablo ilk kullanımda oluşturulur; modülü içe aktarmak diske dokunmaz
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(self.path, timeout=10) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at)")
+        self._initialized = True
+
+    # Her çağrı kendi bağlantısını açar; böylece thread ve process'ler arasında güvenle paylaşılır
+    def _connect(self):
+        if not self._initialized:
+            self._initialize()
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Önbellek okuma hatası: {str(e)}")
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logging.warning(f"Önbellek yazma hatası: {str(e)}")
+
+    # Süresi dolan kayıtları sil, ardından boyut sınırını en eski erişilenlerden başlayarak uygula
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+# Müfredat kataloğu.
+# Her program curricula/<program>.json dosyasında tanımlanır ve bir kez derlenerek salt okunur bir
+# Catalog nesnesine dönüştürülür: ders kodu -> gereklilik bitleri, yarıyıl -> zorunlu ders bit kümesi,
+# seçmeli ve üst yarıyıl kuralları. Kod ve ad dizeleri intern edilir; derlenmiş kataloglar süreç
+# içinde tüm isteklerce paylaşılır. Dosya değiştiğinde (mtime) worker'lar yeniden başlatılmadan
+# yeni katalog yüklenir; hatalı bir dosya önceki sürümü geçersiz kılmaz.
+
+CURRICULA_DIR = os.getenv("CURRICULA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "curricula"))
+DEFAULT_PROGRAM = os.getenv("DEFAULT_PROGRAM", "bm")
+# Dosya değişikliklerinin en fazla bu aralıkla (saniye) kontrol edilmesi
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+# Kiracı -> varsayılan program eşlemesi, ör. "muhendislik-bm=bm,muhendislik-ee=ee"
+TENANT_PROGRAMS = os.getenv("TENANT_PROGRAMS", "")
+
+# Gereklilik bitleri: 0..15 zorunlu olduğu yarıyıllar, 16..31 seçmeli olduğu yarıyıllar
+MAX_SEMESTERS = 16
+ELECTIVE_SHIFT = MAX_SEMESTERS
+
+PROGRAM_ID_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+# Katalog dosyası bulunamadığında veya geçersiz olduğunda fırlatılır
+class CatalogError(Exception):
+    pass
+
+
+def semester_name(number):
+    return sys.intern(f"{number}. Yarıyıl")
+
+
+class Catalog:
+    __slots__ = (
+        "program", "name", "total_semesters", "min_semester_akts", "min_gpa", "failing_grades",
+        "expected_semesters", "semester_numbers", "course_names", "codes", "code_bits", "requirements",
+        "required_by_semester", "elective_prefix_rules", "upper_semesters", "upper_prefixes",
+        "upper_excluded_codes", "upper_min_courses", "upper_rule_from_semester", "upper_rule_label",
+    )
+
+    def is_mandatory(self, code, number):
+        return (self.requirements.get(code, 0) >> (number - 1)) & 1 == 1
+
+    def is_elective(self, code, number):
+        return (self.requirements.get(code, 0) >> (ELECTIVE_SHIFT + number - 1)) & 1 == 1
+
+    # Ders kodlarının bit kümesi (katalogda olmayan kodlar yok sayılır)
+    def course_mask(self, codes):
+        mask = 0
+        for code in codes:
+            mask |= self.code_bits.get(code, 0)
+        return mask
+
+    # Bit kümesindeki kodları katalog sırasıyla döndür
+    def codes_in(self, mask):
+        codes = []
+        while mask:
+            low = mask & -mask
+            codes.append(self.codes[low.bit_length() - 1])
+            mask ^= low
+        return codes
+
+
+def _require(doc, key, kind):
+    value = doc.get(key)
+    if not isinstance(value, kind):
+        raise CatalogError(f"'{key}' alanı eksik veya hatalı")
+    return value
+
+
+def _semester_number(key, total_semesters):
+    try:
+        number = int(key)
+    except (TypeError, ValueError):
+        raise CatalogError(f"Geçersiz yarıyıl numarası: {key}")
+    if not 1 <= number <= min(total_semesters, MAX_SEMESTERS):
+        raise CatalogError(f"Yarıyıl numarası aralık dışında: {key}")
+    return number
+
+
+# Katalog belgesini (JSON'dan okunmuş sözlük) doğrulayıp derle
+def compile_catalog(doc, program=None):
+    if not isinstance(doc, dict):
+        raise CatalogError("Katalog bir JSON nesnesi olmalı")
+    catalog = Catalog()
+    catalog.program = sys.intern(program or str(doc.get("program", "")))
+    catalog.name = doc.get("name", catalog.program)
+    catalog.total_semesters = _require(doc, "total_semesters", int)
+    if not 1 <= catalog.total_semesters <= MAX_SEMESTERS:
+        raise CatalogError(f"total_semesters 1 ile {MAX_SEMESTERS} arasında olmalı")
+    catalog.min_semester_akts = _require(doc, "min_semester_akts", (int, float))
+    catalog.min_gpa = _require(doc, "min_gpa", (int, float))
+    catalog.failing_grades = frozenset(sys.intern(grade) for grade in _require(doc, "failing_grades", list))
+    catalog.expected_semesters = tuple(semester_name(n) for n in range(1, catalog.total_semesters + 1))
+    catalog.semester_numbers = {name: n for n, name in enumerate(catalog.expected_semesters, 1)}
+
+    names = _require(doc, "courses", dict)
+    catalog.course_names = {sys.intern(code.strip()): sys.intern(name) for code, name in names.items()}
+
+    def known(code):
+        code = sys.intern(code.strip())
+        if code not in catalog.course_names:
+            raise CatalogError(f"'courses' içinde tanımlı olmayan ders kodu: {code}")
+        return code
+
+    # Kod indeksleri zorunlu ders listelerinin sırasıyla atanır; böylece bit kümesinden okunan
+    # eksik dersler katalogdaki sırayla listelenir
+    codes = []
+    code_bits = {}
+    requirements = {}
+    required_by_semester = {}
+    mandatory = _require(doc, "mandatory", dict)
+    for key in sorted(mandatory, key=lambda k: _semester_number(k, catalog.total_semesters)):
+        number = _semester_number(key, catalog.total_semesters)
+        mask = 0
+        for code in mandatory[key]:
+            code = known(code)
+            if code not in code_bits:
+                code_bits[code] = 1 << len(codes)
+                codes.append(code)
+            mask |= code_bits[code]
+            requirements[code] = requirements.get(code, 0) | (1 << (number - 1))
+        required_by_semester[number] = mask
+
+    groups = doc.get("elective_groups", {})
+    prefix_rules = []
+    electives = doc.get("electives", {})
+    for key in sorted(electives, key=lambda k: _semester_number(k, catalog.total_semesters)):
+        number = _semester_number(key, catalog.total_semesters)
+        rule = electives[key]
+        group = rule.get("group")
+        if group not in groups:
+            raise CatalogError(f"Tanımsız seçmeli grubu: {group}")
+        for code in groups[group]:
+            code = known(code)
+            requirements[code] = requirements.get(code, 0) | (1 << (ELECTIVE_SHIFT + number - 1))
+        if rule.get("required_prefix"):
+            prefix_rules.append((number, semester_name(number), sys.intern(rule["required_prefix"])))
+
+    catalog.codes = tuple(codes)
+    catalog.code_bits = code_bits
+    catalog.requirements = requirements
+    catalog.required_by_semester = required_by_semester
+    catalog.elective_prefix_rules = tuple(prefix_rules)
+
+    upper = doc.get("upper_semester_rule")
+    if upper:
+        semesters = [_semester_number(n, catalog.total_semesters) for n in upper.get("semesters", [])]
+        catalog.upper_semesters = tuple(semester_name(n) for n in semesters)
+        catalog.upper_prefixes = tuple(sys.intern(prefix) for prefix in upper.get("prefixes", []))
+        catalog.upper_excluded_codes = frozenset(sys.intern(code) for code in upper.get("excluded_codes", []))
+        catalog.upper_min_courses = int(upper.get("min_courses", 0))
+        catalog.upper_rule_from_semester = int(upper.get("from_semester", min(semesters, default=1)))
+        catalog.upper_rule_label = f"{' ve '.join(f'{n}.' for n in semesters)} Yarıyıl'da en az " \
+                                   f"{catalog.upper_min_courses} {'/'.join(catalog.upper_prefixes)} dersi"
+    else:
+        catalog.upper_semesters = ()
+        catalog.upper_prefixes = ()
+        catalog.upper_excluded_codes = frozenset()
+        catalog.upper_min_courses = 0
+        catalog.upper_rule_from_semester = 0
+        catalog.upper_rule_label = None
+    return catalog
+
+
+def load_catalog(path, program=None):
+    with open(path, encoding='utf-8') as f:
+        try:
+            doc = json.load(f)
+        except ValueError as e:
+            raise CatalogError(f"{os.path.basename(path)}: geçersiz JSON ({e})")
+    try:
+        return compile_catalog(doc, program)
+    except CatalogError as e:
+        raise CatalogError(f"{os.path.basename(path)}: {e}")
+    except (TypeError, ValueError, AttributeError, KeyError) as e:
+        # Beklenmeyen tipteki alanlar (ör. ders adı yerine sayı, nesne yerine liste)
+        raise CatalogError(f"{os.path.basename(path)}: hatalı alan tipi ({type(e).__name__}: {e})")
+
+
+# Programa göre derlenmiş katalogları tutar ve dosya değiştiğinde yeniden yükler
+class CatalogRegistry:
+    def __init__(self, directory=CURRICULA_DIR, reload_interval=CATALOG_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        # program -> (dosya mtime, son kontrol zamanı, katalog); girdiler bütün olarak değiştirilir
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, program):
+        if not PROGRAM_ID_RE.match(program or ""):
+            raise CatalogError(f"Geçersiz program kimliği: {program}")
+        return os.path.join(self.directory, f"{program}.json")
+
+    def programs(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json") and PROGRAM_ID_RE.match(name[:-5]))
+
+    def get(self, program=None):
+        program = program or DEFAULT_PROGRAM
+        entry = self._entries.get(program)
+        # Hızlı yol: kontrol aralığı dolmadıysa kilitsiz döndür
+        if entry is not None and time.monotonic() - entry[1] < self.reload_interval:
+            return entry[2]
+        with self._lock:
+            entry = self._entries.get(program)
+            now = time.monotonic()
+            if entry is not None and now - entry[1] < self.reload_interval:
+                return entry[2]
+            path = self.path_for(program)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                if entry is not None:
+                    logging.error(f"Katalog dosyasına erişilemiyor, önceki sürüm kullanılıyor: {path}")
+                    self._entries[program] = (entry[0], now, entry[2])
+                    return entry[2]
+                raise CatalogError(f"Bilinmeyen program: {program}")
+            if entry is not None and entry[0] == mtime:
+                self._entries[program] = (mtime, now, entry[2])
+                return entry[2]
+            try:
+                catalog = load_catalog(path, program)
+            except (OSError, CatalogError) as e:
+                if entry is None:
+                    raise CatalogError(str(e))
+                logging.error(f"Katalog yeniden yüklenemedi, önceki sürüm kullanılıyor: {str(e)}")
+                self._entries[program] = (mtime, now, entry[2])
+                return entry[2]
+            if entry is not None:
+                logging.info(f"Katalog yeniden yüklendi: {program}")
+            self._entries[program] = (mtime, now, catalog)
+            return catalog
+
+
+catalogs = CatalogRegistry()
+
+
+def get_catalog(program=None):
+    return catalogs.get(program)
+
+
+def _parse_tenant_programs(value):
+    mapping = {}
+    for item in value.split(","):
+        tenant, _, program = item.partition("=")
+        if tenant.strip() and program.strip():
+            mapping[tenant.strip()] = program.strip()
+    return mapping
+
+
+tenant_programs = _parse_tenant_programs(TENANT_PROGRAMS)
+
+
+# İstek için program kimliğini belirle: açıkça seçilen program, yoksa kiracının programı,
+# o da yoksa DEFAULT_PROGRAM. Program kataloğu yüklenemiyorsa CatalogError fırlatılır.
+def resolve_program(program=None, tenant=None):
+    program = (program or "").strip() or tenant_programs.get((tenant or "").strip()) or DEFAULT_PROGRAM
+    get_catalog(program)
+    return program
+
+
+# Seçim listeleri için (program kimliği, program adı) çiftleri; yüklenemeyen kataloglar atlanır
+def available_programs():
+    programs = []
+    for program in catalogs.programs():
+        try:
+            programs.append((program, get_catalog(program).name))
+        except CatalogError as e:
+            logging.error(f"Katalog yüklenemedi: {str(e)}")
+    return programs
@@ -0,0 +1,164 @@
+import logging
+
+from catalog import get_catalog
+
+# Mezuniyet kuralı değerlendiricisi.
+# Müfredat kuralları curricula/ altındaki katalog dosyalarından derlenir (bkz. catalog.py); evaluate()
+# saf bir fonksiyondur ve Flask dışında (toplu işler, ölçümler) doğrudan çağrılabilir.
+
+
+# Çıkarılan transkript verisine mezuniyet kurallarını uygula.
+# Girdi değiştirilmez; sonuç alanları eklenmiş yeni bir sözlük döndürülür.
+# catalog verilmezse varsayılan programın kataloğu kullanılır.
+def evaluate(extracted_data, catalog=None):
+    if catalog is None:
+        catalog = get_catalog()
+    if not isinstance(extracted_data, dict):
+        extracted_data = {}
+    result = dict(extracted_data)
+    result.setdefault("semesters", [])
+    result.setdefault("gpa", 0.0)
+    result["program"] = catalog.program
+    result["program_name"] = catalog.name
+    result["min_gpa"] = catalog.min_gpa
+    semesters = result["semesters"]
+
+    # Mevcut yarıyılları kontrol et ve eksik yarıyılları bul
+    semester_by_name = {}
+    for semester in semesters:
+        semester_by_name.setdefault(semester["semester"], semester)
+    last_semester = 0
+    if semester_by_name:
+        last_semester = max(int(name.split('.')[0]) for name in semester_by_name)
+    else:
+        logging.debug("Hiçbir yarıyıl bulunamadı, last_semester 0 olarak ayarlandı.")
+
+    missing_semesters = [sem for sem in catalog.expected_semesters if sem not in semester_by_name]
+    result["missing_semesters"] = missing_semesters
+
+    failed_mandatory = []
+    missing_mandatory = []
+    # Eksik olarak raporlanan zorunlu derslerin bit kümesi (her ders bir kez raporlanır)
+    reported_missing = 0
+    failed_electives = []
+    failed_elective_codes = set()
+    akts_issues = []
+
+    for semester in semesters:
+        semester_name = semester["semester"]
+        courses = semester["courses"]
+        number = catalog.semester_numbers.get(semester_name)
+
+        taken = 0
+        for course in courses:
+            code = course["code"].strip()
+            taken |= catalog.code_bits.get(code, 0)
+            failed = course["grade"] in catalog.failing_grades
+            # Başarısız zorunlu dersler
+            if number is not None and failed and catalog.is_mandatory(code, number):
+                failed_mandatory.append({
+                    "semester": semester_name,
+                    "code": course["code"],
+                    "name": course["name"],
+                    "grade": course["grade"]
+                })
+            # Başarısız seçmeli dersler (US ve MS)
+            if (number is not None and failed and catalog.is_elective(code, number)
+                    and course["code"] not in failed_elective_codes):
+                failed_electives.append({
+                    "semester": semester_name,
+                    "code": course["code"],
+                    "name": course["name"],
+                    "grade": course["grade"]
+                })
+                failed_elective_codes.add(course["code"])
+
+        # Eksik zorunlu dersler
+        if number is not None:
+            missing = catalog.required_by_semester.get(number, 0) & ~taken & ~reported_missing
+            for code in catalog.codes_in(missing):
+                missing_mandatory.append({
+                    "semester": semester_name,
+                    "code": code,
+                    "name": catalog.course_names[code]
+                })
+            reported_missing |= missing
+
+        # AKTS sorunları
+        akts = semester.get("akts", 0)
+        if akts is None:
+            akts = 0
+        if akts < catalog.min_semester_akts:
+            akts_issues.append(f"{semester_name}: Toplam AKTS {akts} < {catalog.min_semester_akts}")
+
+    # Eksik yarıyıllardaki zorunlu dersleri ve AKTS sorunlarını ekle
+    for missing_sem in missing_semesters:
+        missing = catalog.required_by_semester.get(catalog.semester_numbers[missing_sem], 0) & ~reported_missing
+        for code in catalog.codes_in(missing):
+            missing_mandatory.append({
+                "semester": missing_sem,
+                "code": code,
+                "name": catalog.course_names[code]
+            })
+        reported_missing |= missing
+        akts_issues.append(f"{missing_sem}: Toplam AKTS 0 < {catalog.min_semester_akts} (Yarıyıl eksik)")
+
+    result["failed_mandatory"] = failed_mandatory
+    result["missing_mandatory"] = missing_mandatory
+    result["failed_electives"] = failed_electives
+    result["akts_issues"] = akts_issues
+
+    # Seçmeli ders sayısını kontrol et
+    elective_issues = []
+    for sem_num, sem_key, prefix in catalog.elective_prefix_rules:
+        semester = semester_by_name.get(sem_key)
+        if semester is not None:
+            passed = any(c["code"].startswith(prefix) and c["grade"] not in catalog.failing_grades
+                         for c in semester["courses"])
+            if not passed:
+                elective_issues.append(f"{sem_num}. Yarıyıl'da {prefix} kodlu bir ders eksik.")
+        else:
+            elective_issues.append(f"{sem_num}. Yarıyıl'da {prefix} kodlu bir ders eksik.")
+
+    upper_count = 0
+    for sem_key in catalog.upper_semesters:
+        semester = semester_by_name.get(sem_key)
+        if semester is not None:
+            upper_count += sum(1 for c in semester["courses"]
+                               if c["code"].startswith(catalog.upper_prefixes)
+                               and c["code"] not in catalog.upper_excluded_codes
+                               and c["grade"] not in catalog.failing_grades)
+    if (catalog.upper_rule_label is not None and last_semester >= catalog.upper_rule_from_semester
+            and upper_count < catalog.upper_min_courses):
+        elective_issues.append(f"{catalog.upper_rule_label} alınmalı (Alınan: {upper_count})")
+    result["elective_issues"] = elective_issues
+
+    # Mezuniyet durumunu güncelle
+    gpa = result.get("gpa", 0)
+    if gpa is None:
+        gpa = 0.0
+        logging.debug("GPA None olarak geçti, 0.0 olarak ayarlandı.")
+
+    graduation_reasons = []
+    if last_semester < catalog.total_semesters:
+        graduation_reasons.append(f"Eksik yarıyıl sayısı: {catalog.total_semesters - last_semester} ({', '.join(missing_semesters)})")
+    if missing_mandatory:
+        graduation_reasons.append(f"Eksik zorunlu ders sayısı: {len(missing_mandatory)}")
+    if failed_mandatory:
+        graduation_reasons.append(f"Başarısız zorunlu ders sayısı: {len(failed_mandatory)}")
+    if failed_electives:
+        graduation_reasons.append(f"Başarısız seçmeli ders sayısı: {len(failed_electives)}")
+    if akts_issues:
+        graduation_reasons.append(f"AKTS eksikliği olan yarıyıl sayısı: {len(akts_issues)}")
+    if elective_issues:
+        graduation_reasons.append(f"Seçmeli ders eksiklikleri: {len(elective_issues)}")
+    if gpa < catalog.min_gpa:
+        graduation_reasons.append(f"Genel not ortalaması yetersiz: {gpa:.2f} (Gereken: {catalog.min_gpa:.2f})")
+
+    if last_semester >= catalog.total_semesters and not graduation_reasons:
+        result["can_graduate"] = True
+        result["graduation_message"] = "Tebrikler! Tüm mezuniyet şartlarını karşılıyorsunuz."
+    else:
+        result["can_graduate"] = False
+        result["graduation_message"] = "Mezuniyet şartları karşılanmadı:\n- " + "\n- ".join(graduation_reasons)
+    return result
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import xml.etree.ElementTree as ET
+
+# Bellek kullanımı sınırlı yükleme ve metin çıkarma.
+# Yüklenen dosya bellekte (büyükse geçici dosyada) tutulur, .docx içinden yalnızca word/document.xml
+# artımlı olarak okunur (görseller ve diğer parçalar açılmaz) ve temizleme tek geçişte yapılır.
+# Metin çıkarıcılar dosya türüne göre EXTRACTORS kaydından seçilir; tür, dosyanın ilk baytlarından
+# belirlenir. PDF desteği PyMuPDF ile sağlanır ve yalnızca PDF geldiğinde yüklenir.
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Bu boyuta kadar yüklemeler bellekte tutulur, sonrası geçici dosyaya taşınır
+SPOOL_MEMORY_BYTES = int(os.getenv("SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+# Sıkıştırılmamış word/document.xml için üst sınır (zip bombasına karşı)
+MAX_DOCUMENT_XML_BYTES = int(os.getenv("MAX_DOCUMENT_XML_BYTES", str(50 * 1024 * 1024)))
+COPY_CHUNK_BYTES = 64 * 1024
+# Bu sayıdan fazla sayfası olan PDF'ler sayfa aralıklarına bölünüp paralel işlenir
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "20"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Temizleme kuralları: boşluk dizileri tek boşluğa iner, izin verilmeyen karakterler silinir
+CLEAN_TOKEN_RE = re.compile(r'(\s+)|([^\w\s\d\.\:\*\-\(\)]+)|([\w\d\.\:\*\-\(\)]+)')
+
+
+# Dosya veya içindeki belge izin verilen boyutu aştığında fırlatılır
+class UploadTooLarge(Exception):
+    pass
+
+
+# Dosya içeriği kayıtlı hiçbir çıkarıcıya uymadığında fırlatılır
+class UnsupportedDocument(Exception):
+    pass
+
+
+# Kaynaktan hedefe parça parça kopyala; toplam boyut sınırı aşılırsa UploadTooLarge
+def _copy_limited(source, dest, max_bytes):
+    total = 0
+    while True:
+        chunk = source.read(COPY_CHUNK_BYTES)
+        if not chunk:
+            return total
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Dosya boyutu sınırı aşıldı ({max_bytes // (1024 * 1024)} MB)")
+        dest.write(chunk)
+
+
+# Yüklenen dosyayı bellekte (büyükse geçici dosyada) tut; çağıran kapatmakla sorumludur
+def spool_upload(file_storage, max_bytes=MAX_UPLOAD_BYTES):
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        _copy_limited(file_storage.stream, spooled, max_bytes)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+# Yüklenen dosyayı boyut sınırıyla diske kaydet (iş kuyruğu ve toplu işler için)
+def save_upload(file_storage, target_path, max_bytes=MAX_UPLOAD_BYTES):
+    try:
+        with open(target_path, 'wb') as dest:
+            _copy_limited(file_storage.stream, dest, max_bytes)
+    except BaseException:
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        raise
+
+
+# Zip arşivinden tek bir üyeyi boyut sınırıyla bir dosyaya kopyala
+def copy_zip_member(archive, member, target_path, max_bytes=MAX_UPLOAD_BYTES):
+    if member.file_size > max_bytes:
+        raise UploadTooLarge(f"{os.path.basename(member.filename)}: dosya boyutu sınırı aşıldı")
+    with archive.open(member) as source, open(target_path, 'wb') as dest:
+        _copy_limited(source, dest, max_bytes)
+
+
+# .docx içindeki word/document.xml akışını boyutu denetleyerek aç
+def open_document_xml(archive):
+    info = archive.getinfo('word/document.xml')
+    if info.file_size > MAX_DOCUMENT_XML_BYTES:
+        raise UploadTooLarge("Belge içeriği izin verilen boyutu aşıyor")
+    return archive.open(info)
+
+
+# word/document.xml'i artımlı ayrıştırarak metin parçalarını docx2txt ile aynı sırada üret
+def iter_docx_text(source):
+    with zipfile.ZipFile(source) as archive, open_document_xml(archive) as document:
+        for event, elem in ET.iterparse(document, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == W_NS + 'p':
+                    yield '\n\n'
+                elif tag == W_NS + 'tab':
+                    yield '\t'
+                elif tag in (W_NS + 'br', W_NS + 'cr'):
+                    yield '\n'
+            elif tag == W_NS + 't':
+                if elem.text:
+                    yield elem.text
+            elif tag == W_NS + 'p':
+                # İşlenen paragrafı bırak; bellek kullanımı belge boyutundan bağımsız kalsın
+                elem.clear()
+
+
+# Metin parçalarını tek geçişte temizle; sonuç, birleştirilmiş metne önce boşluk sadeleştirme
+# sonra karakter filtresi uygulamakla (eski clean_text) birebir aynıdır
+def clean_chunks(chunks):
+    output = []
+    started = False
+    pending_space = False
+    for chunk in chunks:
+        for whitespace, _, allowed in CLEAN_TOKEN_RE.findall(chunk):
+            if whitespace:
+                # Baştaki boşluklar atılır, sondaki boşluk hiç yazılmaz
+                pending_space = started
+                continue
+            if pending_space:
+                output.append(' ')
+                pending_space = False
+            started = True
+            if allowed:
+                output.append(allowed)
+    return ''.join(output)
+
+
+# PyMuPDF'i ilk PDF'te yükle; .docx kullanan kurulumlar bu bağımlılık olmadan da çalışır
+def _load_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        raise RuntimeError("PDF desteği için PyMuPDF kurulu olmalı (pip install PyMuPDF)")
+    return pymupdf
+
+
+def _open_pdf(source):
+    pymupdf = _load_pymupdf()
+    if isinstance(source, bytes):
+        return pymupdf.open(stream=source, filetype="pdf")
+    return pymupdf.open(source)
+
+
+# Bir sayfa aralığının metnini döndür (süreç havuzunda çalışır; belge her süreçte ayrı açılır)
+def _pdf_page_range_text(source, start, stop):
+    with _open_pdf(source) as document:
+        return [document[number].get_text("text", sort=True) for number in range(start, stop)]
+
+
+# PDF metnini sayfa sayfa üret; uzun belgelerde sayfa aralıkları paralel çıkarılır, sıra korunur
+def iter_pdf_text(source):
+    if not isinstance(source, (str, os.PathLike)):
+        # Süreçlere aktarılabilmesi için dosya nesnesi bir kez okunur (boyutu yüklemede sınırlandı)
+        source = source.read()
+    with _open_pdf(source) as document:
+        page_count = document.page_count
+        if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS <= 1:
+            for page in document:
+                yield page.get_text("text", sort=True)
+                yield '\n\n'
+            return
+
+    step = -(-page_count // PDF_WORKERS)
+    with ProcessPoolExecutor(max_workers=PDF_WORKERS) as pool:
+        futures = [pool.submit(_pdf_page_range_text, source, start, min(start + step, page_count))
+                   for start in range(0, page_count, step)]
+        for future in futures:
+            for text in future.result():
+                yield text
+                yield '\n\n'
+
+
+# Dosya türü -> (uzantılar, dosya imzası, metin parçası üreteci)
+EXTRACTORS = {}
+
+
+def register_extractor(kind, extensions, signature, iter_text):
+    EXTRACTORS[kind] = (tuple(extensions), signature, iter_text)
+
+
+register_extractor("docx", (".docx",), b'PK\x03\x04', iter_docx_text)
+register_extractor("pdf", (".pdf",), b'%PDF-', iter_pdf_text)
+
+SUPPORTED_EXTENSIONS = tuple(ext for extensions, _, _ in EXTRACTORS.values() for ext in extensions)
+
+
+# Dosya türünü ilk baytlardan belirle; dosya nesnesinin konumu değişmez
+def detect_document_type(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            head = f.read(8)
+    else:
+        position = source.tell()
+        head = source.read(8)
+        source.seek(position)
+    for kind, (_, signature, _) in EXTRACTORS.items():
+        if head.startswith(signature):
+            return kind
+    raise UnsupportedDocument("Dosya içeriği desteklenen bir transkript biçiminde değil")
+
+
+# Dosya içeriğinin SHA-256 özeti (kayıtlı analizleri bulmak için); dosya nesnesinin konumu değişmez
+def document_hash(source):
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK_BYTES), b''):
+                digest.update(chunk)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(COPY_CHUNK_BYTES), b''):
+            digest.update(chunk)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+# Dosyadan (yol veya dosya nesnesi) türüne uygun çıkarıcıyla temizlenmiş metni çıkar
+def extract_document_text(source, kind=None):
+    kind = kind or detect_document_type(source)
+    return clean_chunks(EXTRACTORS[kind][2](source))
+
+
+# .docx dosyasından (yol veya dosya nesnesi) temizlenmiş metni çıkar
+def extract_docx_text(source):
+    return extract_document_text(source, "docx")
@@ -0,0 +1,438 @@
+import asyncio
+import collections
+import functools
+import logging
+import os
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+from metrics import GEMINI_HEDGES, GEMINI_REQUESTS, GEMINI_RETRIES, record_token_usage, token_usage
+
+# Gemini istemcisi için ağ geçidi katmanı.
+# Tüm çağrılar tek bir arka plan olay döngüsünde ainvoke ile yapılır; böylece istemcinin
+# bağlantıları yeniden kullanılır. Global bir token bucket kotaya uyar, 429 yanıtlarındaki
+# bekleme süreleri dikkate alınır ve kuyruk dolduğunda istek hemen reddedilir.
+# Kota, aynı makinedeki tüm süreçlerce (gunicorn worker'ları, iş worker'ları, toplu işler) bir SQLite
+# dosyasında paylaşılır; böylece worker sayısı arttıkça gerçek istek hızı artmaz.
+# Her model için ayrı bir istemci tutulur; hedge açıksa, modelin son gecikmelerinin p95'ini aşan
+# çağrılar için aynı istek bir kez daha gönderilir ve önce dönen yanıt kullanılır.
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "32"))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "15"))
+# Paylaşılan kota durumu; boş bırakılırsa her süreç kendi kotasını tutar (gerçek hız = süreç sayısı x kota)
+GEMINI_RATE_LIMIT_PATH = os.getenv("GEMINI_RATE_LIMIT_PATH", "backend/ratelimit.sqlite3")
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "30.0"))
+# Hedge (yedek istek) ayarları: gecikme eşiği son GEMINI_HEDGE_WINDOW başarılı çağrının bu yüzdeliğidir
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0.95"))
+GEMINI_HEDGE_WINDOW = int(os.getenv("GEMINI_HEDGE_WINDOW", "200"))
+# Eşik hesaplanmadan önce gereken en az ölçüm sayısı ve eşiğin alt sınırı (saniye)
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "1.0"))
+
+# Tekrar denenebilir hata işaretleri (kota, geçici sunucu hataları, zaman aşımı)
+RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "ResourceExhausted", "ServiceUnavailable",
+                     "DeadlineExceeded", "InternalServerError", "timed out", "Timeout")
+
+RETRY_HINT_PATTERNS = (
+    re.compile(r'retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE),
+    re.compile(r'retry-after:?\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+)
+
+
+# Bekleme kuyruğu dolu olduğunda fırlatılır
+class GatewayOverloaded(Exception):
+    pass
+
+
+def is_retryable(e):
+    message = f"{type(e).__name__}: {e}"
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+# Metrik etiketi için yeniden deneme nedeni
+def retry_reason(e):
+    message = f"{type(e).__name__}: {e}"
+    if "429" in message or "ResourceExhausted" in message:
+        return "rate_limited"
+    if "Timeout" in message or "timed out" in message or "DeadlineExceeded" in message:
+        return "timeout"
+    return "server_error"
+
+
+# Hata mesajındaki sunucu bekleme önerisini (saniye) bul
+def retry_hint(e):
+    message = str(e)
+    for pattern in RETRY_HINT_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+# Tam jitter'lı üstel geri çekilme
+def backoff_delay(attempt, base=GEMINI_BACKOFF_BASE, maximum=GEMINI_BACKOFF_MAX):
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+# Dakikalık istek kotasına uyan token bucket (yalnızca ağ geçidinin olay döngüsünde kullanılır)
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    # 429 alındığında tüm istekleri önerilen süre boyunca durdur
+    async def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Bir modelin son başarılı çağrı süreleri (yalnızca ağ geçidinin olay döngüsünde kullanılır)
+class LatencyWindow:
+    def __init__(self, size=GEMINI_HEDGE_WINDOW):
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    # Yeterli ölçüm yoksa None
+    def percentile(self, fraction, min_samples=GEMINI_HEDGE_MIN_SAMPLES):
+        if len(self.samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Süreçler arasında paylaşılan token bucket; durum SQLite'ta tutulur ve her alımda kilitli bir işlemle
+# güncellenir. Veritabanına erişilemezse süreç içi bir bucket'a düşülür.
+class SharedTokenBucket:
+    def __init__(self, path, rate_per_second, capacity, name="gemini"):
+        self.path = path
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.name = name
+        self._initialized = False
+        self._fallback = None
+        self._local_conn = threading.local()
+
+    # Dosya ve tablo ilk kullanımda oluşturulur
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit ("
+                         " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL,"
+                         " paused_until REAL NOT NULL)")
+        finally:
+            conn.close()
+        self._initialized = True
+
+    # Kota durumu kaybedilebilir; her işlemde diske senkronizasyon beklenmez
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Her thread kendi bağlantısını tekrar kullanır (fork sonrası yeniden açılır)
+    def _thread_connection(self):
+        local = self._local_conn
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+        return local.conn
+
+    # Kilitli bir işlemde durumu oku, fn(tokens, updated_at, paused_until, now) ile güncelle; fn'in ikinci değerini döndür
+    def _update(self, fn):
+        if not self._initialized:
+            self._initialize()
+        conn = self._thread_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated_at, paused_until FROM rate_limit WHERE name = ?",
+                               (self.name,)).fetchone()
+            # Süreçler arasında karşılaştırılabilmesi için duvar saati kullanılır
+            now = time.time()
+            state = row if row is not None else (self.capacity, now, 0.0)
+            (tokens, updated_at, paused_until), value = fn(*state, now)
+            conn.execute("INSERT OR REPLACE INTO rate_limit VALUES (?, ?, ?, ?)",
+                         (self.name, tokens, updated_at, paused_until))
+            conn.execute("COMMIT")
+            return value
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    # Bir token almayı dene; beklenmesi gereken süreyi döndür (0: token alındı)
+    def _take(self, tokens, updated_at, paused_until, now):
+        if now < paused_until:
+            return (tokens, updated_at, paused_until), paused_until - now
+        tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+        if tokens >= 1:
+            return (tokens - 1, now, paused_until), 0.0
+        return (tokens, now, paused_until), (1 - tokens) / self.rate
+
+    def _local(self):
+        if self._fallback is None:
+            self._fallback = TokenBucket(self.rate, self.capacity)
+        return self._fallback
+
+    def _pause(self, tokens, updated_at, paused_until, now, seconds):
+        return (tokens, updated_at, max(paused_until, now + seconds)), None
+
+    # 429 alındığında tüm süreçlerdeki istekleri önerilen süre boyunca durdur
+    async def pause(self, seconds):
+        loop = asyncio.get_running_loop()
+        try:
+            # acquire gibi SQLite kilidi olay döngüsü dışında beklenir
+            await loop.run_in_executor(None, self._update, functools.partial(self._pause, seconds=seconds))
+        except sqlite3.Error as e:
+            logging.warning(f"Paylaşılan kota dosyasına yazılamadı: {str(e)}")
+            await self._local().pause(seconds)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # SQLite kilidi beklenirken olay döngüsü bloklanmasın
+                wait = await loop.run_in_executor(None, self._update, self._take)
+            except sqlite3.Error as e:
+                logging.warning(f"Paylaşılan kota dosyası kullanılamıyor, süreç içi kota kullanılıyor: {str(e)}")
+                return await self._local().acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+# client_factory(model), verilen model için LangChain sohbet istemcisini döndüren fonksiyondur;
+# istemciler ilk istekte oluşturulur. model verilmeyen çağrılar models[0] ile yapılır.
+class LLMGateway:
+    def __init__(self, client_factory, models=None, max_concurrency=GEMINI_MAX_CONCURRENCY, max_queue=GEMINI_MAX_QUEUE,
+                 requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, max_attempts=GEMINI_MAX_ATTEMPTS, hedge=GEMINI_HEDGE,
+                 rate_limit_path=GEMINI_RATE_LIMIT_PATH):
+        self.client_factory = client_factory
+        self.models = tuple(models or ())
+        self._clients = {}
+        self._client_lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.requests_per_minute = requests_per_minute
+        self.max_attempts = max_attempts
+        self.hedge = hedge
+        self.rate_limit_path = rate_limit_path
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+
+    # İçe aktarma ve süreç başlatma sırasında istemci kütüphanesi yüklenmez
+    def client(self, model=None):
+        model = model or (self.models[0] if self.models else None)
+        client = self._clients.get(model)
+        if client is None:
+            with self._client_lock:
+                client = self._clients.get(model)
+                if client is None:
+                    client = self.client_factory(model) if model else self.client_factory()
+                    self._clients[model] = client
+        return client
+
+    @property
+    def llm(self):
+        return self.client()
+
+    # Olay döngüsünü ilk kullanımda (ve fork sonrası her süreçte yeniden) başlat
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+            thread.start()
+            self._loop = loop
+            self._pid = os.getpid()
+            self._semaphore = None
+            rate, capacity = self.requests_per_minute / 60.0, max(1.0, min(self.max_concurrency, self.requests_per_minute))
+            if self.rate_limit_path:
+                self._bucket = SharedTokenBucket(self.rate_limit_path, rate, capacity)
+            else:
+                self._bucket = TokenBucket(rate, capacity)
+            self._in_flight = 0
+            self._latencies = {}
+            return loop
+
+    async def _ainvoke(self, messages, model=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._in_flight >= self.max_concurrency + self.max_queue:
+            raise GatewayOverloaded("Gemini istek kuyruğu dolu")
+        self._in_flight += 1
+        try:
+            async with self._semaphore:
+                return await self._invoke_hedged(messages, model)
+        finally:
+            self._in_flight -= 1
+
+    def _latency(self, model):
+        window = self._latencies.get(model)
+        if window is None:
+            window = self._latencies[model] = LatencyWindow()
+        return window
+
+    # Yedek isteğin gönderileceği gecikme (saniye); hedge kapalıysa veya yeterli ölçüm yoksa None
+    def _hedge_delay(self, model):
+        if not self.hedge:
+            return None
+        threshold = self._latency(model).percentile(GEMINI_HEDGE_PERCENTILE)
+        return None if threshold is None else max(GEMINI_HEDGE_MIN_DELAY, threshold)
+
+    # Birincil çağrı eşiği aşarsa aynı isteği bir kez daha gönder; önce başarıyla dönen kazanır,
+    # diğeri iptal edilir. İkisi de başarısız olursa birincil çağrının hatası fırlatılır.
+    async def _invoke_hedged(self, messages, model):
+        delay = self._hedge_delay(model)
+        primary = asyncio.ensure_future(self._invoke_with_retry(messages, model))
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        GEMINI_HEDGES.inc(result="sent")
+        hedge = asyncio.ensure_future(self._invoke_with_retry(messages, model))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        GEMINI_HEDGES.inc(result="hedge_won" if task is hedge else "primary_won")
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # Başarısız bir denemeden sonra beklenecek süre; sunucunun 429 önerisi varsa kotayı da duraklatır
+    async def _retry_delay(self, e, attempt):
+        hint = retry_hint(e)
+        if hint is not None:
+            await self._bucket.pause(hint)
+            delay = hint + random.uniform(0, GEMINI_BACKOFF_BASE)
+        else:
+            delay = backoff_delay(attempt)
+        GEMINI_RETRIES.inc(reason=retry_reason(e))
+        logging.warning(f"Gemini çağrısı başarısız (deneme {attempt + 1}/{self.max_attempts}), "
+                        f"{delay:.1f} sn sonra tekrar denenecek: {str(e)}")
+        return delay
+
+    async def _invoke_with_retry(self, messages, model=None):
+        client = self.client(model)
+        for attempt in range(self.max_attempts):
+            await self._bucket.acquire()
+            started = time.monotonic()
+            try:
+                response = await client.ainvoke(messages)
+            except Exception as e:
+                GEMINI_REQUESTS.inc(outcome="error")
+                if attempt == self.max_attempts - 1 or not is_retryable(e):
+                    raise
+                await asyncio.sleep(await self._retry_delay(e, attempt))
+                continue
+            self._latency(model).add(time.monotonic() - started)
+            GEMINI_REQUESTS.inc(outcome="ok")
+            record_token_usage(response)
+            return response
+
+    # Akış parçalarını kuyruğa yaz; yalnızca ilk parça gelmeden önceki hatalar tekrar denenir
+    async def _astream(self, messages, out, model=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            if self._in_flight >= self.max_concurrency + self.max_queue:
+                raise GatewayOverloaded("Gemini istek kuyruğu dolu")
+            self._in_flight += 1
+            try:
+                async with self._semaphore:
+                    for attempt in range(self.max_attempts):
+                        await self._bucket.acquire()
+                        started = False
+                        usage_chunk = None
+                        try:
+                            async for chunk in self.client(model).astream(messages):
+                                started = True
+                                # Kullanım bilgisi genellikle son parçada gelir; yalnızca bir kez sayılır
+                                if token_usage(chunk):
+                                    usage_chunk = chunk
+                                out.put(("chunk", chunk))
+                            GEMINI_REQUESTS.inc(outcome="ok")
+                            if usage_chunk is not None:
+                                record_token_usage(usage_chunk)
+                            break
+                        except Exception as e:
+                            GEMINI_REQUESTS.inc(outcome="error")
+                            if started or attempt == self.max_attempts - 1 or not is_retryable(e):
+                                raise
+                            await asyncio.sleep(await self._retry_delay(e, attempt))
+            finally:
+                self._in_flight -= 1
+            out.put(("end", None))
+        except Exception as e:
+            out.put(("error", e))
+
+    # İsteği ağ geçidinin olay döngüsüne gönder; concurrent.futures.Future döndürür
+    def submit(self, messages, model=None):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._ainvoke(messages, model), loop)
+
+    # Senkron çağıranlar (Flask worker'ları, toplu iş thread'leri) için
+    def invoke(self, messages, timeout=None, model=None):
+        return self.submit(messages, model).result(timeout)
+
+    # Başka bir olay döngüsünden çağıranlar için
+    async def ainvoke(self, messages, model=None):
+        return await asyncio.wrap_future(self.submit(messages, model))
+
+    # Yanıt parçalarını geldikçe döndüren senkron üreteç (akışta hedge uygulanmaz)
+    def stream(self, messages, model=None):
+        loop = self._ensure_loop()
+        out = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._astream(messages, out, model), loop)
+        try:
+            while True:
+                kind, value = out.get()
+                if kind == "chunk":
+                    yield value
+                elif kind == "end":
+                    return
+                else:
+                    raise value
+        finally:
+            # İstemci bağlantıyı kapatırsa Gemini akışını da durdur
+            future.cancel()
@@ -0,0 +1,24 @@
+import multiprocessing
+import os
+
+# Gunicorn ayarları: gunicorn -c gunicorn.conf.py
+# Uygulama ana süreçte bir kez yüklenir (preload_app) ve worker'lara fork ile kopyalanır;
+# böylece her worker modülleri yeniden içe aktarmaz. Thread ve olay döngüleri fork öncesinde
+# başlatılmaz, her worker kendi thread'lerini ilk kullanımda (veya post_fork'ta) kurar.
+
+wsgi_app = "app:create_app()"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(4, multiprocessing.cpu_count() * 2 + 1))))
+# Akış yanıtları (SSE, NDJSON) ve Gemini beklemeleri worker'ı bloke etmesin diye thread'li worker
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Gemini yanıtları ve toplu işler uzun sürebilir
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+# İş kuyruğu modunda worker thread'lerini istek beklemeden başlat (önceden kuyrukta kalan işler için)
+def post_fork(server, worker):
+    app = worker.app.wsgi()
+    if app.config['JOB_MODE']:
+        app.extensions['job_workers'].ensure_started()
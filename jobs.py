@@ -0,0 +1,240 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# SQLite tabanlı iş kuyruğu.
+# /upload dosyayı kaydedip bir iş ekler ve hemen iş kimliğini döndürür; işleri web süreçlerindeki
+# veya ayrı çalıştırılan (python jobs.py) worker thread'leri işler.
+
+DEFAULT_JOBS_PATH = 'backend/jobs.sqlite3'
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Çalışan işin worker'ı updated_at'i bu aralıkla yeniler (heartbeat)
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+# Bu süre boyunca heartbeat gelmeyen "running" işler (ör. çöken worker) yeniden kuyruğa alınır;
+# uzun süren ama worker'ı yaşayan işlere dokunulmaz. Heartbeat aralığından birkaç kat büyük olmalıdır.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " file_path TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " status_code INTEGER,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            # Sonradan eklenen sütunlar; eski veritabanlarını yerinde güncelle
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("program", "student_id", "file_name"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    # file_name, yüklenen dosyanın özgün adıdır (file_path sunucudaki rastgele addır)
+    def enqueue(self, file_path, program=None, student_id=None, file_name=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, file_path, program, student_id, file_name, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, STATUS_QUEUED, file_path, program, student_id, file_name, now, now)
+            )
+        return job_id
+
+    # Sıradaki işi atomik olarak "running" durumuna al; iş yoksa None döndür
+    def claim(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, file_path, program, student_id, file_name FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                             (STATUS_RUNNING, time.time(), row[0]))
+            conn.execute("COMMIT")
+            return row
+        except sqlite3.Error:
+            # BEGIN IMMEDIATE başarısız olduysa (ör. kilit zaman aşımı) geri alınacak işlem yoktur
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+                         (STATUS_DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id))
+
+    def fail(self, job_id, message, status_code=500):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, status_code = ?, updated_at = ? WHERE id = ?",
+                         (STATUS_FAILED, message, status_code, time.time(), job_id))
+
+    # Çalışan işin hâlâ işlendiğini bildir
+    def heartbeat(self, job_id):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                         (time.time(), job_id, STATUS_RUNNING))
+
+    # Heartbeat'i kesilmiş (worker'ı ölmüş) işleri kuyruğa geri al
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS):
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                                  (STATUS_QUEUED, time.time(), STATUS_RUNNING, time.time() - stale_seconds))
+            return cursor.rowcount
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, status_code, created_at, updated_at, program FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "result": json.loads(row[2]) if row[2] else None,
+            "error": row[3],
+            "status_code": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "program": row[7]
+        }
+
+
+# Kuyruğu boşaltan worker thread havuzu.
+# handler(file_path, program, student_id, file_name) sonucu döndürür; describe_error(e) hatayı (mesaj, durum kodu) çiftine çevirir.
+# İşlenen her iş için heartbeat gönderilir; worker'lar heartbeat'i kesilmiş işleri düzenli olarak kuyruğa geri alır.
+class WorkerPool:
+    def __init__(self, queue, handler, describe_error, size=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL,
+                 heartbeat_interval=JOB_HEARTBEAT_SECONDS, stale_seconds=JOB_STALE_SECONDS):
+        self.queue = queue
+        self.handler = handler
+        self.describe_error = describe_error
+        self.size = size
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_seconds = stale_seconds
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+        self._pid = None
+
+    # Thread'leri ilk kullanımda (ve fork sonrası her süreçte yeniden) başlat
+    def ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() or self.size <= 0:
+                return
+            self._pid = os.getpid()
+            for i in range(self.size):
+                threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True).start()
+
+    # Aynı süreçte yeni iş eklendiğinde bekleyen worker'ları uyandır
+    def notify(self):
+        self._wakeup.set()
+
+    # Heartbeat'i kesilmiş işleri en fazla heartbeat aralığında bir kez kuyruğa geri al
+    def requeue_stale(self):
+        now = time.monotonic()
+        with self._requeue_lock:
+            if now < self._next_requeue:
+                return 0
+            self._next_requeue = now + self.heartbeat_interval
+        try:
+            requeued = self.queue.requeue_stale(self.stale_seconds)
+        except sqlite3.Error as e:
+            logging.error(f"Yarım kalmış işler kuyruğa alınamadı: {str(e)}")
+            return 0
+        if requeued:
+            logging.warning(f"{requeued} yarım kalmış iş yeniden kuyruğa alındı")
+        return requeued
+
+    def _run(self):
+        while True:
+            self.requeue_stale()
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                logging.error(f"İş kuyruğu okuma hatası: {str(e)}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.process(*job)
+
+    # İş bitene kadar updated_at'i yenile
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                self.queue.heartbeat(job_id)
+            except sqlite3.Error as e:
+                logging.error(f"İş heartbeat hatası ({job_id}): {str(e)}")
+
+    def process(self, job_id, file_path, program=None, student_id=None, file_name=None):
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, stop), name=f"job-heartbeat-{job_id[:8]}",
+                         daemon=True).start()
+        try:
+            result = self.handler(file_path, program, student_id, file_name)
+            self.queue.complete(job_id, result)
+            logging.info(f"İş tamamlandı: {job_id}")
+        except Exception as e:
+            message, status_code = self.describe_error(e)
+            self.queue.fail(job_id, message, status_code)
+            logging.error(f"İş başarısız: {job_id} - {message}")
+        finally:
+            stop.set()
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+# Web katmanından bağımsız worker süreci
+def main(argv=None):
+    from analysis import analyze_file, describe_error
+
+    parser = argparse.ArgumentParser(description="Transkript analiz işlerini kuyruktan işleyen worker süreci.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Worker thread sayısı")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(os.getenv("JOBS_DB_PATH", DEFAULT_JOBS_PATH))
+    pool = WorkerPool(queue, analyze_file, describe_error, size=args.workers)
+    pool.ensure_started()
+    logging.info(f"{args.workers} iş worker'ı başlatıldı")
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == '__main__':
+    main()
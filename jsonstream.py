@@ -0,0 +1,102 @@
+import json
+
+# Gemini'nin akış halinde gelen JSON yanıtı için artımlı ayrıştırıcı.
+# feed() her çağrıldığında yalnızca yeni karakterleri tarar ve "semesters" dizisinde tamamlanan
+# her yarıyıl nesnesini hemen döndürür. finish() tam belgeyi döndürür; yanıt kesilmişse son
+# tamamlanmış değere kadar keserek açık kalan dizi/nesneleri kapatır.
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+class IncrementalJSONParser:
+    def __init__(self, array_key="semesters"):
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._start = None          # Üst düzey nesnenin başladığı konum (``` bloğu öncesi atlanır)
+        self._end = None            # Üst düzey nesnenin bittiği konum
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None    # Üst düzeyde en son kapanan dize (anahtar adayı)
+        self._array_depth = None    # İzlenen dizinin yığın derinliği
+        self._item_start = None
+        self._safe_cut = None       # (konum, yığın) — buraya kadar kesilip kapatılabilir
+
+    def feed(self, chunk):
+        self._text += chunk
+        items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            if self._end is not None:
+                break
+            ch = text[i]
+            if self._start is None:
+                if ch == '{':
+                    self._start = i
+                    self._stack.append(ch)
+                    self._safe_cut = (i + 1, tuple(self._stack))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in '{[':
+                self._stack.append(ch)
+                depth = len(self._stack)
+                if ch == '[' and depth == 2 and self._last_string == self.array_key:
+                    self._array_depth = depth
+                elif ch == '{' and self._array_depth is not None and depth == self._array_depth + 1:
+                    self._item_start = i
+                self._safe_cut = (i + 1, tuple(self._stack))
+            elif ch in '}]':
+                if not self._stack:
+                    break
+                self._stack.pop()
+                depth = len(self._stack)
+                if ch == '}' and self._item_start is not None and depth == self._array_depth:
+                    try:
+                        items.append(json.loads(text[self._item_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == ']' and depth + 1 == self._array_depth:
+                    self._array_depth = None
+                if depth == 0:
+                    self._end = i + 1
+                self._safe_cut = (i + 1, tuple(self._stack))
+            elif ch == ',':
+                self._safe_cut = (i, tuple(self._stack))
+        self._pos = len(text)
+        return items
+
+    # Tam (veya onarılmış) belgeyi döndür; hiç JSON nesnesi yoksa None
+    def finish(self):
+        if self._start is None:
+            return None
+        if self._end is not None:
+            return json.loads(self._text[self._start:self._end])
+        cut, stack = self._safe_cut
+        # Güvenli kesim noktaları yalnızca tamamlanmış değerlerden sonra ya da açılış parantezlerinden
+        # hemen sonra alınır; bu yüzden açık kalanları kapatmak geçerli JSON üretir
+        repaired = self._text[self._start:cut] + ''.join(CLOSERS[opener] for opener in reversed(stack))
+        return json.loads(repaired)
+
+
+# Kesilmiş olabilecek bir JSON metnini tek seferde onar ve ayrıştır
+def repair_json(text):
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.finish()
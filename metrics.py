@@ -0,0 +1,187 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Süreç içi metrikler ve Prometheus metin biçiminde dışa aktarım (/metrics).
+# Her gunicorn worker'ı kendi sayaçlarını tutar; Prometheus her worker'ı ayrı hedef olarak
+# kazır veya toplamlar sorgu tarafında alınır. Ek bir bağımlılık gerektirmez.
+#
+# stage("ad") bağlam yöneticisi bir aşamanın süresini transcript_stage_seconds histogramına yazar;
+# istek için bir iz (trace) başlatılmışsa aynı süre Server-Timing başlığı için de biriktirilir.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_registry = []
+_registry_lock = threading.Lock()
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Etiket değerleri -> [kova sayaçları (kümülatif değil), toplam, adet]
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# Tüm metrikleri Prometheus metin biçiminde (0.0.4) döndür
+def render_metrics():
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "transcript_stage_seconds", "Analiz hattı aşamalarının süresi (saniye)", labelnames=("stage",))
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "HTTP isteklerinin yanıt başlığına kadar geçen süresi (saniye)",
+    labelnames=("endpoint", "status"))
+CACHE_REQUESTS = Counter(
+    "transcript_cache_requests_total", "Sonuç önbelleği sorguları", labelnames=("result",))
+STORE_LOOKUPS = Counter(
+    "transcript_store_lookups_total", "Kayıtlı analiz deposu sorguları (hit, miss, error)", labelnames=("result",))
+SEMESTER_BLOCKS = Counter(
+    "transcript_semester_blocks_total", "Artımlı çıkarmada yarıyıl blokları (cached, reused, sent)",
+    labelnames=("result",))
+LOCAL_PARSER_RESULTS = Counter(
+    "transcript_local_parser_total", "Yerel ayrıştırıcı sonuçları (accepted, low_confidence, error)",
+    labelnames=("result",))
+GEMINI_REQUESTS = Counter(
+    "gemini_requests_total", "Gemini çağrıları (deneme başına)", labelnames=("outcome",))
+GEMINI_RETRIES = Counter(
+    "gemini_retries_total", "Tekrar denenen Gemini çağrıları", labelnames=("reason",))
+GEMINI_HEDGES = Counter(
+    "gemini_hedged_requests_total", "Yedek (hedge) istekler: sent, primary_won, hedge_won", labelnames=("result",))
+GEMINI_ESCALATIONS = Counter(
+    "gemini_model_escalations_total", "Doğrulamadan geçmeyip bir üst modele aktarılan yanıtlar", labelnames=("model",))
+GEMINI_TOKENS = Counter(
+    "gemini_tokens_total", "Gemini'nin bildirdiği token kullanımı", labelnames=("kind",))
+PROMPT_TOKENS = Histogram(
+    "transcript_prompt_tokens_estimated", "Gönderilen prompt'un tahmini token sayısı", buckets=TOKEN_BUCKETS)
+
+
+# Geçerli bağlam için aşama sürelerini biriktirmeye başla (Server-Timing başlığı için)
+def start_trace():
+    trace = []
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace():
+    _current_trace.set(None)
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.append((name, elapsed))
+
+
+# Biriken aşama sürelerini Server-Timing başlık değerine çevir (milisaniye)
+def server_timing(trace):
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in trace)
+
+
+# LangChain mesajındaki token kullanım bilgisi (alan adları istemci sürümüne göre değişir)
+def token_usage(message):
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        usage = (getattr(message, "response_metadata", None) or {}).get("usage_metadata") or {}
+    return usage
+
+
+def record_token_usage(message):
+    usage = token_usage(message)
+    input_tokens = usage.get("input_tokens", usage.get("prompt_token_count"))
+    output_tokens = usage.get("output_tokens", usage.get("candidates_token_count"))
+    if input_tokens:
+        GEMINI_TOKENS.inc(input_tokens, kind="input")
+    if output_tokens:
+        GEMINI_TOKENS.inc(output_tokens, kind="output")
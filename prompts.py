@@ -0,0 +1,178 @@
+import math
+import re
+
+# Gemini'ye gönderilen prompt'ların hazırlanması ve transkript metninin sıkıştırılması
+
+SYSTEM_MESSAGE = "Akademik transkriptleri analiz eden yardımcı bir asistansınız."
+
+SEMESTER_RE = re.compile(r'\b(\d{1,2})\. Yarıyıl\b')
+GENERAL_RE = re.compile(r'\bGenel((?: \d+\.\d+){4})')
+TERM_END_RE = re.compile(r'\bDönem Sonu((?: \d+\.\d+){4})')
+COURSE_CODE_RE = re.compile(r'\b[A-ZÇĞİÖŞÜ]{2,4}\d{3}\b')
+COURSE_ROW_RE = re.compile(r'^(?P<code>\S+) (?P<name>.+?) (?P<credit>\d+\.\d) (?P<akts>\d+\.\d) (?P<grade>[A-Z]{2})(?: (?P<rest>.+))?$')
+# Tablo başlıkları (iki farklı dışa aktarım sırası)
+TABLE_HEADERS = (
+    "Ders Kodu Ders Adı Kredi AKTS Harf",
+    "Toplam Kredi Toplam AKTS Toplam Ağırlıklı Ortalama",
+    "Toplam Toplam Toplam Ortalama Kredi AKTS Ağırlıklı",
+)
+
+COMPACT_LEGEND = "Transkript tablo biçimine dönüştürülmüştür. Ders satırları: Kod | Ders Adı | Kredi | AKTS | Not"
+
+# Gemini API için prompt hazırlığı
+def build_prompt(text):
+    return f"""
+        Akademik transkriptleri analiz eden yardımcı bir asistansınız. Aşağıdaki transkript metnine göre aşağıdaki adımları gerçekleştirin:
+
+        ### Görev:
+        1. Transkriptten tüm dersleri ve notlarını yarıyıl bazında çıkar.
+        2. Her yarıyıl için Toplam AKTS değerini çıkar (genellikle her yarıyılın sonunda "Toplam AKTS" veya "AKTS" olarak görünür, 1 ile 60 arasında bir sayıdır).
+        3. Genel not ortalamasını (Genel Ortalama) çıkar, **son yarıyılın** sonunda "Genel" kelimesinden sonra görünür (örneğin, transkript 7 yarıyıl içeriyorsa 7. yarıyılın sonunda, 6 yarıyıl içeriyorsa 6. yarıyılın sonunda). Not ortalaması bir sayıdır (örneğin, "2.63").
+
+        ### Talimatlar:
+        - Her yarıyılı (örneğin, "1. Yarıyıl", "2. Yarıyıl" vb.) tanımlayın ve dersleri her yarıyıl altında listeleyin.
+        - Her ders için ders kodu (örneğin, "AIB101"), ders adı (örneğin, "Atatürk İlkeleri ve İnkılap Tarihi I") ve not (örneğin, "AA", "BB", "CC", "DD", "FF", "FD", "YT", "YZ") ekleyin.
+        - Her yarıyıl için Toplam AKTS değerini çıkar ve JSON çıktısında her yarıyıl nesnesine "akts" anahtarıyla ekle.
+        - Transkript metninde tüm dersleri açıkça listele, hiçbir dersi atlama:
+          - Örnek ders formatı: "BM430 Proje Yönetimi 3.0 5.0 BB" -> {{"code": "BM430", "name": "Proje Yönetimi", "grade": "BB"}}
+          - Alternatif format: "BM211 - Diferansiyel Denklemler (Yarıyıl: 3. Yarıyıl)" -> {{"code": "BM211", "name": "Diferansiyel Denklemler", "grade": "BB"}}
+          - Staj dersleri için: "BM399 Yaz Dönemi Stajı I 0.0 2.0 YZ" -> {{"code": "BM399", "name": "Yaz Dönemi Stajı I", "grade": "YZ"}}
+        - Transkript metni tutarsız biçimlendirme içerebilir (örneğin, fazla boşluk, eksik satırlar veya özel karakterler). En iyi şekilde ayrıştırmaya çalış:
+          - Ders kodları genellikle 5-6 karakter uzunluğundadır (örneğin, "BM430", "US201", "MS301").
+          - Ders adları birden fazla kelime olabilir (örneğin, "Proje Yönetimi", "Bilim Tarihi ve Felsefesi").
+          - Notlar genellikle "AA", "BB", "CC", "DD", "FF", "FD", "YT", "YZ" formatındadır. "FF", "FD" ve "YZ" başarısız notlardır (geçer notlar: "AA", "BB", "CC", "DD", "YT").
+        - Transkripti ayrıştıramazsanız veya gerekli bilgileri belirleyemezseniz, boş bir JSON nesnesi döndür:
+          ```json
+          {{}}
+          ```
+        - Eğer bir dersin notu belirtilmemişse, varsayılan olarak "BB" kullan **ancak "YZ" notu açıkça belirtilmişse bunu kullan**.
+        - Çıktının geçerli JSON formatında olduğundan emin olun (örneğin, dizeler için çift tırnak kullanın, doğru iç içe yapı).
+        - Sonucu aşağıdaki JSON formatında döndür:
+
+        ```json
+        {{
+          "semesters": [
+            {{
+              "semester": "1. Yarıyıl",
+              "courses": [
+                {{"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I", "grade": "BB"}},
+                {{"code": "BM101", "name": "Algoritmalar ve Programlama I", "grade": "DD"}}
+              ],
+              "akts": 30
+            }},
+            ...
+          ],
+          "gpa": 2.63
+        }}
+
+        ### Transkript Metni:
+        {text}
+        """
+
+
+# Yaklaşık token sayısı (Gemini için ortalama ~4 karakter/token); ağ çağrısı yapmaz
+def estimate_tokens(text):
+    return math.ceil(len(text) / 4)
+
+
+# Bir yarıyıl bloğundaki ders satırlarını "Kod | Ad | Kredi | AKTS | Not" biçimine dönüştür
+def _compact_courses(body):
+    lines = []
+    starts = [m.start() for m in COURSE_CODE_RE.finditer(body)]
+    for i, start in enumerate(starts):
+        chunk = body[start:starts[i + 1] if i + 1 < len(starts) else len(body)].strip()
+        match = COURSE_ROW_RE.match(chunk)
+        if not match:
+            # Tanınmayan satırı olduğu gibi bırak; bilgi kaybolmasın
+            lines.append(chunk)
+            continue
+        name = match.group("name")
+        if match.group("rest"):
+            # Sayfa genişliği yüzünden nottan sonra devam eden ders adı
+            name = f"{name} {match.group('rest')}"
+        lines.append(f"{match.group('code')} | {name} | {match.group('credit')} | {match.group('akts')} | {match.group('grade')}")
+    return lines
+
+
+# Temizlenmiş metni "N. Yarıyıl" sınırlarından böl ve her yarıyılı tablo biçimine dönüştür.
+# Üst bilgi (kimlik bilgileri dahil), alt bilgi, tablo başlıkları ve tekrarlanan yarıyıl blokları atılır.
+# Her yarıyıl için {"semester", "text", "gpa"} döndürür; "gpa" o yarıyıl sonundaki Genel Ortalama'dır.
+def split_semesters(text):
+    markers = list(SEMESTER_RE.finditer(text))
+    semesters = []
+    seen_blocks = set()
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        block = text[marker.end():end]
+        general = GENERAL_RE.search(block)
+        if general:
+            # "Genel" satırından sonrası sayfa başlığı/alt bilgidir
+            block = block[:general.end()]
+        term_end = TERM_END_RE.search(block)
+        body = block[:term_end.start()] if term_end else block
+        for header in TABLE_HEADERS:
+            body = body.replace(header, " ")
+
+        name = f"{int(marker.group(1))}. Yarıyıl"
+        gpa = None
+        lines = [name]
+        lines.extend(_compact_courses(body))
+        if term_end:
+            values = term_end.group(1).split()
+            lines.append(f"Toplam AKTS: {values[1]}")
+        if general:
+            values = general.group(1).split()
+            lines.append(f"Genel Ortalama: {values[3]}")
+            gpa = float(values[3])
+        semester_block = "\n".join(lines)
+        if semester_block in seen_blocks:
+            continue
+        seen_blocks.add(semester_block)
+        semesters.append({"semester": name, "text": semester_block, "gpa": gpa})
+    return semesters
+
+
+# Yalnızca yarıyıl/ders tablolarından oluşan sıkıştırılmış metin; yarıyıl bulunamazsa None
+def compact_transcript(text):
+    semesters = split_semesters(text)
+    if not semesters:
+        return None
+    return "\n\n".join([COMPACT_LEGEND] + [semester["text"] for semester in semesters])
+
+
+# Sıkıştırılmış tablo için kısa talimat bloğu
+def build_compact_prompt(table):
+    return f"""Aşağıdaki transkript tablosundan dersleri yarıyıl bazında çıkar.
+- Her ders satırını atlamadan aktar: {{"code": Kod, "name": Ders Adı, "grade": Not}}. Notu olduğu gibi yaz ("AA", "BA", "BB", "CB", "CC", "DC", "DD", "FF", "FD", "YT", "YZ").
+- "Toplam AKTS" değerini yarıyılın "akts" alanına sayı olarak yaz.
+- "gpa", en yüksek numaralı yarıyılın "Genel Ortalama" değeridir.
+- Tablo biçiminde olmayan satırları da en iyi şekilde ayrıştır; hiçbir şey ayrıştıramazsan {{}} döndür.
+- Yalnızca geçerli JSON döndür:
+{{"semesters": [{{"semester": "1. Yarıyıl", "courses": [{{"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I", "grade": "BB"}}], "akts": 30}}], "gpa": 2.63}}
+
+### Transkript Tablosu:
+{table}
+"""
+
+
+# Gemini'ye gönderilecek prompt'u hazırla; mümkünse sıkıştırılmış tabloyu kullan.
+# (prompt, tam prompt token tahmini, gönderilen prompt token tahmini) döndürür.
+def prepare_prompt(text, compact=True):
+    full_prompt = build_prompt(text)
+    table = compact_transcript(text) if compact else None
+    prompt = build_compact_prompt(table) if table else full_prompt
+    return prompt, estimate_tokens(full_prompt), estimate_tokens(prompt)
+
+
+# Tek bir yarıyıl bloğu için küçük şemalı prompt (parçalı çıkarma modu)
+def build_semester_prompt(semester_text):
+    return f"""Aşağıdaki tek yarıyıllık transkript tablosundaki dersleri çıkar.
+- Her ders satırını atlamadan aktar: {{"code": Kod, "name": Ders Adı, "grade": Not}}. Notu olduğu gibi yaz.
+- "akts": "Toplam AKTS" değeri (sayı). "gpa": "Genel Ortalama" değeri (sayı, yoksa null).
+- Yalnızca geçerli JSON döndür:
+{{"courses": [{{"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I", "grade": "BB"}}], "akts": 30, "gpa": 2.63}}
+
+### Yarıyıl Tablosu:
+{COMPACT_LEGEND}
+{semester_text}
+"""
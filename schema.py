@@ -0,0 +1,165 @@
+import re
+
+from catalog import semester_name
+
+# Çıkarılan transkript verisinin tipli modeli.
+# Gemini yanıtı ayrıştırıldıktan hemen sonra bir kez doğrulanır: eksik veya yanlış tipteki alanlar sorun
+# listesine yazılır, sayılar ve yarıyıl adları normalize edilir, kullanılamayan dersler atılır. Sonraki
+# aşamalar (değerlendirici, önbellek, depo) to_dict() çıktısıyla çalışır; course["code"] gibi erişimler
+# böylece KeyError vermez. Kayıtlar __slots__ kullanır; büyük toplu işlerde bellek ayak izi küçük kalır.
+
+# "3. Yarıyıl", "3.Yarıyıl", "3 yarıyıl" gibi yazımları kabul et
+SEMESTER_NAME_RE = re.compile(r'^\s*(\d+)\s*\.?\s*yar[ıi]y[ıi]l\s*$', re.IGNORECASE)
+
+
+# Sayısal alanı normalize et: (değer, geçerli mi). null geçerlidir; "2,63" gibi metinler sayıya çevrilir.
+def _number(value):
+    if value is None:
+        return None, True
+    if isinstance(value, bool):
+        return None, False
+    if isinstance(value, (int, float)):
+        return value, True
+    if isinstance(value, str):
+        try:
+            return float(value.strip().replace(',', '.')), True
+        except ValueError:
+            pass
+    return None, False
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+class Course:
+    __slots__ = ("code", "name", "grade")
+
+    def __init__(self, code, name, grade):
+        self.code = code
+        self.name = name
+        self.grade = grade
+
+    # Kodu veya notu olmayan ders değerlendirilemez; None döner ve sorun kaydedilir
+    @classmethod
+    def from_dict(cls, value, problems, where=""):
+        if not isinstance(value, dict):
+            problems.append(f"{where}ders bir nesne değil: {value!r}")
+            return None
+        code = _text(value.get("code"))
+        grade = _text(value.get("grade")).upper()
+        if not code or not grade:
+            problems.append(f"{where}eksik ders alanları: {value!r}")
+            return None
+        return cls(code, _text(value.get("name")), grade)
+
+    def to_dict(self):
+        return {"code": self.code, "name": self.name, "grade": self.grade}
+
+
+class Semester:
+    __slots__ = ("semester", "courses", "akts", "gpa", "block_hash")
+
+    def __init__(self, semester, courses, akts=None, gpa=None, block_hash=None):
+        self.semester = semester
+        self.courses = courses
+        self.akts = akts
+        self.gpa = gpa
+        self.block_hash = block_hash
+
+    # named=False: tek yarıyıl yanıtı ({"courses", "akts", "gpa"}); adı bölünmüş metinden gelir.
+    # Adı geçersiz bir yarıyıl None döner. "akts" ve "gpa" anahtarlarının yokluğu (kesilmiş yanıt) sorundur.
+    @classmethod
+    def from_dict(cls, value, problems, named=True):
+        if not isinstance(value, dict):
+            problems.append(f"yarıyıl bir nesne değil: {value!r}")
+            return None
+        name = None
+        if named:
+            name = value.get("semester")
+            match = SEMESTER_NAME_RE.match(name) if isinstance(name, str) else None
+            if match is None or int(match.group(1)) < 1:
+                problems.append(f"yarıyıl adı geçersiz: {value.get('semester')!r}")
+                return None
+            name = semester_name(int(match.group(1)))
+        where = f"{name}: " if name else ""
+
+        courses = value.get("courses")
+        if not isinstance(courses, list):
+            problems.append(f"{where}\"courses\" listesi yok")
+            courses = []
+        parsed = [Course.from_dict(course, problems, where) for course in courses]
+
+        numbers = {}
+        for key in ("akts", "gpa"):
+            numbers[key], valid = _number(value.get(key))
+            if not valid:
+                problems.append(f"{where}\"{key}\" sayı değil: {value.get(key)!r}")
+        if "akts" not in value or (not named and "gpa" not in value):
+            problems.append(f"{where}yanıt eksik (kesilmiş olabilir)")
+        block_hash = value.get("block_hash") if isinstance(value.get("block_hash"), str) else None
+        return cls(name, [course for course in parsed if course is not None], numbers["akts"], numbers["gpa"],
+                   block_hash)
+
+    # Yarıyıl adı, yarıyıl ortalaması ve blok özeti yalnızca varsa yazılır
+    def to_dict(self):
+        data = {}
+        if self.semester is not None:
+            data["semester"] = self.semester
+        data["courses"] = [course.to_dict() for course in self.courses]
+        data["akts"] = self.akts
+        if self.gpa is not None:
+            data["gpa"] = self.gpa
+        if self.block_hash is not None:
+            data["block_hash"] = self.block_hash
+        return data
+
+
+class Extraction:
+    __slots__ = ("semesters", "gpa")
+
+    def __init__(self, semesters, gpa=None):
+        self.semesters = semesters
+        self.gpa = gpa
+
+    # Boş yarıyıl listesi geçerlidir: transkript olmayan belgelerde yarıyıl bulunmaz
+    @classmethod
+    def from_dict(cls, value, problems):
+        if not isinstance(value, dict):
+            problems.append("yanıt bir JSON nesnesi değil")
+            return cls([])
+        semesters = value.get("semesters")
+        if not isinstance(semesters, list):
+            problems.append("\"semesters\" listesi yok")
+            semesters = []
+        parsed = [Semester.from_dict(semester, problems) for semester in semesters]
+        gpa, valid = _number(value.get("gpa"))
+        if not valid:
+            problems.append(f"\"gpa\" sayı değil: {value.get('gpa')!r}")
+        elif "gpa" not in value:
+            problems.append("\"gpa\" yok (yanıt kesilmiş olabilir)")
+        return cls([semester for semester in parsed if semester is not None], gpa)
+
+    # Ortalaması bilinmeyen transkript, parçalı çıkarmadaki gibi 0.0 ile değerlendirilir
+    def to_dict(self):
+        return {"semesters": [semester.to_dict() for semester in self.semesters],
+                "gpa": self.gpa if self.gpa is not None else 0.0}
+
+
+# Tam çıkarma yanıtını doğrula: (normalize edilmiş sözlük, sorunlar); sorun listesi boşsa yanıt geçerlidir
+def validate_extraction(data):
+    problems = []
+    return Extraction.from_dict(data, problems).to_dict(), problems
+
+
+# Tek yarıyıl yanıtını doğrula: (normalize edilmiş {"courses", "akts", "gpa"}, sorunlar)
+def validate_semester(data):
+    problems = []
+    semester = Semester.from_dict(data, problems, named=False) or Semester(None, [])
+    return semester.to_dict(), problems
+
+
+# Akıştan gelen tek yarıyıl nesnesini normalize et; kullanılamıyorsa None
+def normalize_semester(data):
+    semester = Semester.from_dict(data, [])
+    return semester.to_dict() if semester is not None else None
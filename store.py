@@ -0,0 +1,317 @@
+import json
+import os
+import sqlite3
+import time
+
+# Tamamlanan analizlerin kalıcı deposu (SQLite).
+# Her analiz belge özeti (document_hash) ve program ile bir kez saklanır; dersler, sorunlar ve
+# yarıyıl AKTS'leri ayrı, indeksli tablolara yazılır. Aynı belge tekrar yüklendiğinde metin çıkarma
+# ve Gemini atlanır; danışman raporları (ör. bir dersten kalan öğrenciler) doğrudan bu tablolardan
+# sorgulanır. Aynı veritabanı dosyası tüm gunicorn worker'ları tarafından paylaşılır.
+# Çıkarılmış veri yalnızca sorunsuz bir çıkarmadan geliyorsa, çıkarma anahtarı (prompt sürümü ve model)
+# güncelse ve süresi dolmamışsa yeniden kullanılır; extraction_key'i NULL olan satırlar yalnızca rapordur.
+
+DEFAULT_STORE_PATH = 'backend/analyses.sqlite3'
+DEFAULT_QUERY_LIMIT = 100
+MAX_QUERY_LIMIT = 1000
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    " id INTEGER PRIMARY KEY,"
+    " document_hash TEXT NOT NULL,"
+    " program TEXT NOT NULL,"
+    " student_id TEXT,"
+    " file_name TEXT,"
+    " can_graduate INTEGER NOT NULL,"
+    " gpa REAL,"
+    " last_semester INTEGER NOT NULL,"
+    # Aynı öğrencinin aynı programdaki en yeni analizi 1; raporlar her öğrenciyi bir kez sayar
+    " latest INTEGER NOT NULL DEFAULT 1,"
+    # Verinin çıkarıldığı prompt sürümü/model (ör. "2-compact/gemini-1.5-flash" veya "local") ve zamanı
+    " extraction_key TEXT,"
+    " extracted_at REAL,"
+    " result TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " updated_at REAL NOT NULL)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_analyses_document ON analyses (document_hash, program)",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_student ON analyses (student_id, program, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_program ON analyses (program, latest, can_graduate)",
+    "CREATE TABLE IF NOT EXISTS analysis_courses ("
+    " analysis_id INTEGER NOT NULL,"
+    " semester TEXT NOT NULL,"
+    " code TEXT NOT NULL,"
+    " grade TEXT,"
+    " failed INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_courses_code ON analysis_courses (code, failed)",
+    "CREATE INDEX IF NOT EXISTS idx_courses_analysis ON analysis_courses (analysis_id)",
+    # kind: failed_mandatory, failed_elective, missing_mandatory, missing_semester, akts, elective
+    "CREATE TABLE IF NOT EXISTS analysis_issues ("
+    " analysis_id INTEGER NOT NULL,"
+    " kind TEXT NOT NULL,"
+    " semester TEXT,"
+    " code TEXT,"
+    " value REAL,"
+    " detail TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_issues_kind ON analysis_issues (kind, code)",
+    "CREATE INDEX IF NOT EXISTS idx_issues_semester ON analysis_issues (kind, semester)",
+    "CREATE INDEX IF NOT EXISTS idx_issues_analysis ON analysis_issues (analysis_id)",
+)
+
+CHILD_TABLES = ("analysis_courses", "analysis_issues")
+# Sonradan eklenen sütunlar (eski veritabanları yerinde güncellenir)
+ADDED_COLUMNS = (("extraction_key", "TEXT"), ("extracted_at", "REAL"))
+
+# Listeleme sorgularında döndürülen özet sütunları
+SUMMARY_COLUMNS = "a.id, a.document_hash, a.program, a.student_id, a.file_name, a.can_graduate, a.gpa, " \
+                  "a.last_semester, a.created_at, a.updated_at"
+
+
+def _summary(row):
+    return {
+        "id": row[0],
+        "document_hash": row[1],
+        "program": row[2],
+        "student_id": row[3],
+        "file_name": row[4],
+        "can_graduate": bool(row[5]),
+        "gpa": row[6],
+        "last_semester": row[7],
+        "created_at": row[8],
+        "updated_at": row[9]
+    }
+
+
+# "N. Yarıyıl" adından yarıyıl numarası (tanınmayan adlar 0)
+def _semester_number(name):
+    prefix = (name or "").split('.')[0]
+    return int(prefix) if prefix.isdigit() else 0
+
+
+def _last_semester(result):
+    return max((_semester_number(semester.get("semester")) for semester in result.get("semesters", [])), default=0)
+
+
+def _limit(limit):
+    return max(1, min(int(limit or DEFAULT_QUERY_LIMIT), MAX_QUERY_LIMIT))
+
+
+# Değerlendirilmiş sonuçtan ders ve sorun satırlarını çıkar; notu programın kalma notlarından biri olan
+# her ders (zorunlu veya seçmeli olsun ya da olmasın) kalınmış sayılır
+def _child_rows(analysis_id, result, catalog):
+    courses = []
+    akts_by_semester = {}
+    for semester in result.get("semesters", []):
+        akts_by_semester[semester.get("semester")] = semester.get("akts")
+        for course in semester.get("courses", []):
+            code = (course.get("code") or "").strip()
+            courses.append((analysis_id, semester.get("semester") or "", code, course.get("grade"),
+                            int(course.get("grade") in catalog.failing_grades)))
+
+    issues = []
+    for kind, key in (("failed_mandatory", "failed_mandatory"), ("failed_elective", "failed_electives"),
+                      ("missing_mandatory", "missing_mandatory")):
+        for course in result.get(key, []):
+            issues.append((analysis_id, kind, course.get("semester"), (course.get("code") or "").strip(),
+                           None, course.get("grade")))
+    for semester in result.get("missing_semesters", []):
+        issues.append((analysis_id, "missing_semester", semester, None, None, None))
+    # AKTS sorunları "<yarıyıl>: ..." biçimindedir; eksik yarıyılların AKTS'si 0 sayılır
+    for issue in result.get("akts_issues", []):
+        semester = issue.partition(": ")[0]
+        issues.append((analysis_id, "akts", semester, None, akts_by_semester.get(semester) or 0, issue))
+    for issue in result.get("elective_issues", []):
+        issues.append((analysis_id, "elective", None, None, None, issue))
+    return courses, issues
+
+
+class AnalysisStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._initialized = False
+
+    # Veritabanı dosyası ve tablolar ilk kullanımda oluşturulur; modülü içe aktarmak diske dokunmaz
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(self.path, timeout=10) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA[0])
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+            for column, kind in ADDED_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE analyses ADD COLUMN {column} {kind}")
+            for statement in SCHEMA[1:]:
+                conn.execute(statement)
+        self._initialized = True
+
+    # Her çağrı kendi bağlantısını açar; böylece thread ve process'ler arasında güvenle paylaşılır
+    def _connect(self):
+        if not self._initialized:
+            self._initialize()
+        return sqlite3.connect(self.path, timeout=10)
+
+    # Katalogla değerlendirilmiş sonucu kaydet (aynı belge ve program için öncekinin yerine); analiz kimliğini
+    # döndür. extraction_key verilmezse çıkarılmış veri sonraki yüklemelerde yeniden kullanılmaz.
+    def save(self, document_hash, catalog, result, student_id=None, file_name=None, extraction_key=None,
+             extracted_at=None):
+        now = time.time()
+        program = catalog.program
+        if extraction_key is not None and extracted_at is None:
+            extracted_at = now
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, student_id, file_name FROM analyses WHERE document_hash = ? AND program = ?",
+                               (document_hash, program)).fetchone()
+            values = (bool(result.get("can_graduate")), result.get("gpa"), _last_semester(result), extraction_key,
+                      extracted_at, json.dumps(result, ensure_ascii=False), now)
+            if row is None:
+                cursor = conn.execute(
+                    "INSERT INTO analyses (document_hash, program, student_id, file_name, can_graduate, gpa,"
+                    " last_semester, extraction_key, extracted_at, result, updated_at, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (document_hash, program, student_id, file_name) + values + (now,)
+                )
+                analysis_id = cursor.lastrowid
+            else:
+                analysis_id = row[0]
+                student_id = student_id or row[1]
+                conn.execute(
+                    "UPDATE analyses SET student_id = ?, file_name = ?, can_graduate = ?, gpa = ?, last_semester = ?,"
+                    " extraction_key = ?, extracted_at = ?, result = ?, updated_at = ? WHERE id = ?",
+                    (student_id, file_name or row[2]) + values + (analysis_id,)
+                )
+                for table in CHILD_TABLES:
+                    conn.execute(f"DELETE FROM {table} WHERE analysis_id = ?", (analysis_id,))
+
+            courses, issues = _child_rows(analysis_id, result, catalog)
+            conn.executemany("INSERT INTO analysis_courses VALUES (?, ?, ?, ?, ?)", courses)
+            conn.executemany("INSERT INTO analysis_issues VALUES (?, ?, ?, ?, ?, ?)", issues)
+            # Öğrencinin bu programdaki yalnızca en yeni analizi raporlara girer
+            if student_id:
+                conn.execute("UPDATE analyses SET latest = (id = ?) WHERE student_id = ? AND program = ?",
+                             (analysis_id, student_id, program))
+        return analysis_id
+
+    # Belgenin yeniden kullanılabilir en son analizini ve çıkarılmış verisini (yarıyıllar ve GPA) bul: çıkarma
+    # anahtarı extraction_keys içinde olmalı ve veri max_age saniyeden eski olmamalı. Veri programdan bağımsızdır.
+    def find_extraction(self, document_hash, extraction_keys, max_age=None):
+        keys = tuple(extraction_keys)
+        if not keys:
+            return None
+        query = ("SELECT id, program, student_id, result, extraction_key, extracted_at FROM analyses"
+                 f" WHERE document_hash = ? AND extraction_key IN ({', '.join('?' * len(keys))})")
+        params = [document_hash, *keys]
+        if max_age is not None:
+            query += " AND extracted_at >= ?"
+            params.append(time.time() - max_age)
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY updated_at DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[3])
+        return {
+            "id": row[0],
+            "program": row[1],
+            "student_id": row[2],
+            "result": result,
+            "extraction_key": row[4],
+            "extracted_at": row[5],
+            "data": {"semesters": result.get("semesters", []), "gpa": result.get("gpa")}
+        }
+
+    # Öğrencinin programdaki yeniden kullanılabilir en son sonucu (artımlı çıkarma için); yoksa None
+    def latest_for_student(self, student_id, program):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM analyses WHERE student_id = ? AND program = ? AND extraction_key IS NOT NULL"
+                " ORDER BY updated_at DESC LIMIT 1",
+                (student_id, program)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    # Belge özetine göre kayıtlı analiz (program verilmezse en son güncellenen)
+    def get(self, document_hash, program=None):
+        query = f"SELECT {SUMMARY_COLUMNS}, a.result FROM analyses a WHERE a.document_hash = ?"
+        params = [document_hash]
+        if program:
+            query += " AND a.program = ?"
+            params.append(program)
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY a.updated_at DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        record = _summary(row)
+        record["result"] = json.loads(row[10])
+        return record
+
+    # Öğrenciye ve/veya programa göre analiz özetleri (en yeni önce)
+    def list(self, student_id=None, program=None, can_graduate=None, limit=DEFAULT_QUERY_LIMIT):
+        conditions, params = [], []
+        if student_id:
+            conditions.append("a.student_id = ?")
+            params.append(student_id)
+        if program:
+            conditions.append("a.program = ?")
+            params.append(program)
+        if can_graduate is not None:
+            conditions.append("a.can_graduate = ?")
+            params.append(int(can_graduate))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM analyses a{where} ORDER BY a.updated_at DESC LIMIT ?",
+                params + [_limit(limit)]
+            ).fetchall()
+        return [_summary(row) for row in rows]
+
+    # Bir dersten kalan (status="failed") veya dersi eksik olan (status="missing") öğrenciler
+    def course_report(self, code, status="failed", program=None, limit=DEFAULT_QUERY_LIMIT):
+        if status == "missing":
+            query = (f"SELECT {SUMMARY_COLUMNS}, i.semester, NULL FROM analysis_issues i"
+                     " JOIN analyses a ON a.id = i.analysis_id"
+                     " WHERE i.kind = 'missing_mandatory' AND i.code = ? AND a.latest = 1")
+        else:
+            query = (f"SELECT {SUMMARY_COLUMNS}, c.semester, c.grade FROM analysis_courses c"
+                     " JOIN analyses a ON a.id = c.analysis_id"
+                     " WHERE c.code = ? AND c.failed = 1 AND a.latest = 1")
+        params = [code.strip()]
+        if program:
+            query += " AND a.program = ?"
+            params.append(program)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY a.updated_at DESC LIMIT ?", params + [_limit(limit)]).fetchall()
+        return [dict(_summary(row), semester=row[10], grade=row[11]) for row in rows]
+
+    # Yarıyıl bazında AKTS eksikliği olan öğrenci sayısı ve ortalama AKTS
+    def akts_shortfalls(self, program=None):
+        query = ("SELECT i.semester, COUNT(DISTINCT a.id), AVG(i.value), MIN(i.value) FROM analysis_issues i"
+                 " JOIN analyses a ON a.id = i.analysis_id WHERE i.kind = 'akts' AND a.latest = 1")
+        params = []
+        if program:
+            query += " AND a.program = ?"
+            params.append(program)
+        with self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY i.semester", params).fetchall()
+        rows.sort(key=lambda row: _semester_number(row[0]))
+        return [{"semester": row[0], "students": row[1], "average_akts": row[2], "min_akts": row[3]} for row in rows]
+
+    # Program özeti: analiz sayısı, mezun olabilecekler ve en sık görülen ders sorunları
+    def summary(self, program=None, top=10):
+        condition, params = " AND a.program = ?", [program]
+        if not program:
+            condition, params = "", []
+        with self._connect() as conn:
+            total, graduating = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(a.can_graduate), 0) FROM analyses a WHERE a.latest = 1{condition}",
+                params
+            ).fetchone()
+            issues = {}
+            for kind in ("failed_mandatory", "failed_elective", "missing_mandatory"):
+                rows = conn.execute(
+                    "SELECT i.code, COUNT(DISTINCT a.id) AS students FROM analysis_issues i"
+                    f" JOIN analyses a ON a.id = i.analysis_id WHERE i.kind = ? AND a.latest = 1{condition}"
+                    " GROUP BY i.code ORDER BY students DESC, i.code LIMIT ?",
+                    [kind] + params + [top]
+                ).fetchall()
+                issues[kind] = [{"code": code, "students": count} for code, count in rows]
+        return {"program": program, "analyses": total, "can_graduate": graduating, "top_issues": issues}
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# Testler depo kökündeki modülleri (evaluator, catalog, ...) doğrudan içe aktarır
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+UPLOADS_DIR = os.path.join(ROOT, "uploads")
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.usage_metadata = None
+        self.response_metadata = {}
+
+
+# Gemini istemcisi yerine geçen sahte istemci: respond(messages) yanıt metnini döndürür veya fırlatır.
+# Varsayılan olarak responses listesindeki yanıtlar sırayla verilir (istisna olanlar fırlatılır).
+class FakeLLM:
+    def __init__(self, *responses, respond=None):
+        self.responses = list(responses)
+        self.respond = respond or self._next
+        self.calls = []
+
+    def _next(self, messages):
+        return self.responses.pop(0)
+
+    def _content(self, messages):
+        self.calls.append(messages)
+        content = self.respond(messages)
+        if isinstance(content, BaseException):
+            raise content
+        return content
+
+    async def ainvoke(self, messages):
+        return FakeMessage(self._content(messages))
+
+    async def astream(self, messages):
+        content = self._content(messages)
+        for start in range(0, len(content), 16):
+            yield FakeMessage(content[start:start + 16])
+
+
+# Analiz hattını geçici önbellek/depo ve sahte Gemini istemcisiyle kur; sahte istemciyi döndürür
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    import analysis
+    from cache import ResultCache
+    from gateway import LLMGateway
+    from store import AnalysisStore
+
+    client = FakeLLM()
+    monkeypatch.setattr(analysis, "gateway", LLMGateway(lambda model: client, analysis.MODEL_TIERS,
+                                                        requests_per_minute=60000, rate_limit_path=None))
+    monkeypatch.setattr(analysis, "result_cache", ResultCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(analysis, "analysis_store", AnalysisStore(str(tmp_path / "analyses.sqlite3")))
+    return client
+
+
+# Metni Gemini'ye gidecek şekilde hazırlanmış prepare_file çıktısı
+def prepared_text(text, document_hash="doc"):
+    import analysis
+    return {"data": None, "text": text, "document_hash": document_hash, "stored": None,
+            "extraction_key": analysis.EXTRACTION_KEY, "extracted_at": None}
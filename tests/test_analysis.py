@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import types
+
+import pytest
+from flask import Flask, render_template
+
+import analysis
+from conftest import ROOT, FakeLLM, prepared_text
+from gateway import LLMGateway
+from schema import validate_extraction
+
+# Analiz hattının uçtan uca davranışı (sahte Gemini istemcisiyle)
+
+RESPONSE = json.dumps({
+    "semesters": [
+        {"semester": "1. Yarıyıl", "courses": [{"code": "AIB101", "name": "Atatürk İlkeleri", "grade": "AA"},
+                                               {"code": "BM101", "name": "Algoritmalar", "grade": "BB"}], "akts": 30},
+        {"semester": "2. Yarıyıl", "courses": [{"code": "BM102", "name": "Algoritmalar II", "grade": "CC"}],
+         "akts": 30},
+    ],
+    "gpa": 3.1,
+}, ensure_ascii=False)
+
+
+# Kesilmiş yanıttan mezuniyet kararı verilmez; sorunlar sonuca yazılır, sonuç saklanmaz ve önbelleğe girmez
+def test_truncated_response_is_marked_incomplete(llm):
+    llm.responses = [RESPONSE[:RESPONSE.index('"2. Yar') + 5]]
+    result = analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA"))
+    assert result["extraction_problems"]
+    assert result["can_graduate"] is False
+    assert result["graduation_message"] == analysis.INCOMPLETE_EXTRACTION_MESSAGE
+    assert [semester["semester"] for semester in result["semesters"]] == ["1. Yarıyıl"]
+    assert analysis.analysis_store.get("doc") is None
+
+    llm.responses = [RESPONSE]
+    result = analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA"))
+    assert len(llm.calls) == 2
+    assert "extraction_problems" not in result
+    assert "Eksik yarıyıl sayısı: 6" in result["graduation_message"]
+    assert analysis.analysis_store.get("doc") is not None
+
+
+def test_incomplete_result_page_shows_warning(llm):
+    llm.responses = [RESPONSE[:-40]]
+    result = analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA"))
+    app = Flask(__name__, template_folder=os.path.join(ROOT, "templates"))
+    with app.app_context():
+        html = render_template("result.html", extracted_data=result)
+    assert "Eksik Çıkarma" in html
+    assert "Eksik Zorunlu Dersler" not in html
+
+
+class FakeChatModel:
+    def __init__(self, **options):
+        self.options = options
+        self.bound = None
+
+    def bind(self, **kwargs):
+        self.bound = kwargs
+        return self
+
+
+# JSON modu istemci kurucusuna değil, her çağrının generation_config'ine verilir
+@pytest.mark.parametrize("json_mode", [True, False])
+def test_create_llm_requests_json_at_invoke_time(monkeypatch, json_mode):
+    monkeypatch.setitem(sys.modules, "langchain_google_genai", types.SimpleNamespace(ChatGoogleGenerativeAI=FakeChatModel))
+    monkeypatch.setenv("GOOGLE_API_KEY", "key")
+    monkeypatch.setattr(analysis, "GEMINI_JSON_MODE", json_mode)
+    llm = analysis.create_llm("gemini-test")
+    assert llm.options["model"] == "gemini-test"
+    assert "response_mime_type" not in llm.options
+    expected = {"generation_config": {"response_mime_type": "application/json"}} if json_mode else None
+    assert llm.bound == expected
+
+
+@pytest.mark.parametrize("value, tiers", [
+    ("gemini-1.5-flash-8b, gemini-1.5-flash", ("gemini-1.5-flash-8b", "gemini-1.5-flash")),
+    ("", (analysis.DEFAULT_MODEL,)),
+    (" , ,", (analysis.DEFAULT_MODEL,)),
+    (None, (analysis.DEFAULT_MODEL,)),
+])
+def test_parse_model_tiers(value, tiers):
+    assert analysis.parse_model_tiers(value) == tiers
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    clients = {"ucuz": FakeLLM(), "guclu": FakeLLM()}
+    monkeypatch.setattr(analysis, "gateway", LLMGateway(lambda model: clients[model], ("ucuz", "guclu"),
+                                                        requests_per_minute=60000, rate_limit_path=None))
+    return clients
+
+
+# Şemaya uymayan yanıtlar sıradaki kademeye aktarılır; geçerli yanıtlar ilk kademede kalır
+def test_route_requests_escalates_incomplete_responses(tiers):
+    tiers["ucuz"].responses = [RESPONSE[:-40], RESPONSE]
+    tiers["guclu"].responses = [RESPONSE]
+    results = analysis.route_requests([["a"], ["b"]], validate_extraction, ("ucuz", "guclu"))
+    assert [problems for _, problems in results] == [[], []]
+    assert len(results[0][0]["semesters"]) == 2
+    assert (len(tiers["ucuz"].calls), len(tiers["guclu"].calls)) == (2, 1)
+    assert tiers["guclu"].calls == [["a"]]
+
+
+# Son kademe de eksikse sorunlarıyla döner; hiç ayrıştırılamıyorsa hata fırlatılır
+def test_route_requests_last_tier(tiers):
+    tiers["ucuz"].responses = ["yanıt yok", RESPONSE[:-40]]
+    tiers["guclu"].responses = ["yanıt yok", RESPONSE[:-40]]
+    with pytest.raises(analysis.AnalysisError):
+        analysis.route_requests([["a"]], validate_extraction, ("ucuz", "guclu"))
+    data, problems = analysis.route_requests([["a"]], validate_extraction, ("ucuz", "guclu"))[0]
+    assert problems and data["semesters"][0]["semester"] == "1. Yarıyıl"
+    assert len(tiers["guclu"].calls) == 2
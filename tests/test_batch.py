@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import batch
+from analysis import AnalysisError
+
+# Toplu analiz: sonuç satırları ve erken kapatıldığında kuyruktaki işlerin iptali.
+# Sahte aşamaların süreç havuzuna gönderilebilmesi için çıkarma havuzu iş parçacığı havuzuyla değiştirilir.
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    calls = []
+
+    def prepare_file(path):
+        if path.endswith("bad.docx"):
+            raise AnalysisError("Desteklenmeyen dosya", 400)
+        return path
+
+    def analyze_prepared(prepared, program=None, student_id=None, file_name=None):
+        calls.append(file_name)
+        time.sleep(0.05)
+        if file_name == "partial.docx":
+            return {"can_graduate": False, "extraction_problems": ["semesters[1]: eksik"]}
+        return {"can_graduate": True}
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch, "prepare_file", prepare_file)
+    monkeypatch.setattr(batch, "analyze_prepared", analyze_prepared)
+    return calls
+
+
+def test_iter_batch_records(pipeline):
+    records = {record["file"]: record for record in
+               batch.iter_batch(["/t/a.docx", "/t/bad.docx", "/t/partial.docx"], workers=2, concurrency=2)}
+    assert records["a.docx"]["status"] == "ok"
+    assert records["partial.docx"]["status"] == "incomplete"
+    assert records["bad.docx"] == {"file": "bad.docx", "status": "error", "status_code": 400,
+                                   "error": "Desteklenmeyen dosya"}
+    assert sorted(pipeline) == ["a.docx", "partial.docx"]
+
+
+# İstemci bağlantıyı kesince (üretici kapatılınca) kuyruktaki analizler çalıştırılmaz ve beklenmez
+def test_closing_iter_batch_cancels_queued_work(pipeline):
+    paths = [f"/t/{index}.docx" for index in range(10)]
+    records = batch.iter_batch(paths, workers=1, concurrency=1)
+    assert next(records)["status"] == "ok"
+    started = time.monotonic()
+    records.close()
+    assert time.monotonic() - started < 0.25
+    time.sleep(0.2)
+    # İlk sonuç ve kapatma anında çalışmakta olan en fazla bir analiz
+    assert len(pipeline) <= 2
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+import analysis
+import cache
+from cache import ResultCache, make_cache_key
+from conftest import prepared_text
+
+# Gemini sonuç önbelleği: anahtarlar, süre sınırı, boyut sınırı ve analiz hattındaki kullanımı
+
+DATA = {"semesters": [{"semester": "1. Yarıyıl", "courses": [{"code": "BM101", "name": "Algoritmalar", "grade": "AA"}],
+                       "akts": 30}], "gpa": 4.0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+def test_cache_key_covers_prompt_model_and_text():
+    key = make_cache_key("metin", "2", "gemini-1.5-flash")
+    assert key == make_cache_key("metin", "2", "gemini-1.5-flash")
+    assert len({key, make_cache_key("metin", "3", "gemini-1.5-flash"), make_cache_key("metin", "2", "gemini-1.5-pro"),
+                make_cache_key("metin ", "2", "gemini-1.5-flash")}) == 4
+    # Parçalar ayraçla birleştirilir; sınır kaydırılarak aynı anahtar üretilemez
+    assert make_cache_key("b", "2", "a") != make_cache_key("", "2", "ab")
+
+
+# Veritabanı dosyası ilk kullanımda oluşturulur
+def test_set_and_get(tmp_path):
+    path = str(tmp_path / "sub" / "cache.sqlite3")
+    results = ResultCache(path)
+    assert not os.path.exists(path)
+    assert results.get("yok") is None
+    results.set("k", DATA)
+    assert results.get("k") == DATA
+    results.clear()
+    assert results.get("k") is None
+
+
+def test_expired_entries_are_dropped(tmp_path, clock):
+    results = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    results.set("k", DATA)
+    clock.now += 60
+    assert results.get("k") == DATA
+    clock.now += 1
+    assert results.get("k") is None
+
+
+# Boyut sınırı aşılınca en uzun süredir okunmayan kayıt silinir
+def test_evicts_least_recently_used(tmp_path, clock):
+    results = ResultCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for key in ("a", "b"):
+        results.set(key, {"key": key})
+        clock.now += 1
+    assert results.get("a") == {"key": "a"}
+    clock.now += 1
+    results.set("c", {"key": "c"})
+    assert [results.get(key) for key in ("a", "b", "c")] == [{"key": "a"}, None, {"key": "c"}]
+
+
+def test_unreadable_database_is_a_miss(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    path.write_bytes(b"bozuk" * 100)
+    results = ResultCache(str(path))
+    results._initialized = True
+    assert results.get("k") is None
+    results.set("k", DATA)
+
+
+# Aynı metin farklı bir belgeden gelse de Gemini yeniden çağrılmaz
+def test_pipeline_reuses_cached_extraction(llm):
+    llm.respond = lambda messages: json.dumps(DATA)
+    first = analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA", "doc1"))
+    second = analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA", "doc2"))
+    assert len(llm.calls) == 1
+    assert first["semesters"] == second["semesters"]
+    analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 BA", "doc3"))
+    assert len(llm.calls) == 2
+
+
+# Şemaya uymayan veya boş sonuçlar önbelleğe yazılmaz
+@pytest.mark.parametrize("response", ['{"semesters": [], "gpa": 0.0}', json.dumps(DATA)[:-20]])
+def test_pipeline_does_not_cache_unusable_extractions(llm, response):
+    llm.respond = lambda messages: response
+    for document_hash in ("doc1", "doc2"):
+        analysis.analyze_prepared(prepared_text("1. Yarıyıl BM101 AA", document_hash))
+    assert len(llm.calls) == 2
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+from catalog import CURRICULA_DIR, CatalogError, CatalogRegistry, load_catalog
+
+# Program katalogları: hatalı müfredat dosyalarının reddedilmesi ve yeniden yükleme
+
+BM_PATH = os.path.join(CURRICULA_DIR, "bm.json")
+
+
+def write_catalog(tmp_path, **changes):
+    with open(BM_PATH, encoding="utf-8") as f:
+        doc = json.load(f)
+    doc.update(changes)
+    path = tmp_path / "bm.json"
+    path.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("changes", [
+    {"total_semesters": "8"},
+    {"total_semesters": 0},
+    {"failing_grades": "FF"},
+    {"courses": [["BM101", "Algoritmalar"]]},
+    {"courses": {"BM101": 101}},
+    {"mandatory": {"1": ["BM101", 101]}},
+    {"mandatory": {"1": ["YOK101"]}},
+    {"mandatory": {"ilk": ["BM101"]}},
+    {"mandatory": {"9": ["BM101"]}},
+    {"electives": {"3": ["US"]}},
+    {"electives": {"3": {"group": "YOK"}}},
+    {"elective_groups": {"US": [201]}},
+    {"upper_semester_rule": {"semesters": [7], "min_courses": "on"}},
+    {"upper_semester_rule": {"semesters": 7}},
+])
+def test_malformed_catalog(tmp_path, changes):
+    with pytest.raises(CatalogError):
+        load_catalog(write_catalog(tmp_path, **changes), "bm")
+
+
+def test_invalid_json_catalog(tmp_path):
+    path = tmp_path / "bm.json"
+    path.write_text('{"program": "bm",', encoding="utf-8")
+    with pytest.raises(CatalogError):
+        load_catalog(str(path), "bm")
+
+
+# Hatalı bir dosya önceki sürümü geçersiz kılmaz; bilinmeyen program CatalogError verir
+def test_registry_keeps_previous_catalog(tmp_path):
+    path = write_catalog(tmp_path)
+    registry = CatalogRegistry(str(tmp_path), reload_interval=0)
+    loaded = registry.get("bm")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"courses": [], "total_semesters": 8}, f)
+    os.utime(path, ns=(0, 1))
+    assert registry.get("bm") is loaded
+    with pytest.raises(CatalogError):
+        registry.get("yok")
@@ -0,0 +1,38 @@
+import random
+import re
+
+import pytest
+
+from extraction import clean_chunks
+
+# Metin temizleme: parçalar halinde okunan metin, ilk sürümün iki düzenli ifadeli clean_text'iyle aynı sonucu vermeli
+
+
+# İlk sürümdeki metin temizleme
+def clean_text(text):
+    text = re.sub(r'\s+', ' ', text.strip())
+    text = re.sub(r'[^\w\s\d\.\:\*\-\(\)]', '', text)
+    return text
+
+
+def split_randomly(rnd, text):
+    cuts = sorted(rnd.sample(range(len(text) + 1), min(len(text) + 1, rnd.randint(0, 6))))
+    return [text[start:stop] for start, stop in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "\n\t", "BM101 Algoritmalar 3.0 5.0 AA", "  1. Yarıyıl\n\nBM101\tAA  ",
+    "Genel: 2,63 / 4.00 !", "a ! b", "a !", "! a", "Toplam AKTS: 30*", "(US201) Bilim Tarihi & Felsefesi",
+    "İĞÜŞÖÇ ığüşöç", "x y z", "FF\r\nFD\r\nYZ",
+])
+def test_clean_chunks_examples(text):
+    assert clean_chunks([text]) == clean_text(text)
+    assert clean_chunks(list(text)) == clean_text(text)
+
+
+def test_clean_chunks_random():
+    alphabet = "aBç1. :*-()!?,;/&%\"'\t\n  \r_İı"
+    rnd = random.Random(7)
+    for _ in range(2000):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 40)))
+        assert clean_chunks(split_randomly(rnd, text)) == clean_text(text), repr(text)
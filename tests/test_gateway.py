@@ -0,0 +1,157 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import gateway
+from analysis import describe_error
+from conftest import FakeLLM, FakeMessage
+from gateway import GatewayOverloaded, LLMGateway, SharedTokenBucket
+
+# Gemini ağ geçidi: yeniden deneme, kuyruk taşması ve süreçler arası paylaşılan kota
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gateway, "backoff_delay", lambda attempt: 0.0)
+    monkeypatch.setattr(gateway, "GEMINI_BACKOFF_BASE", 0.0)
+
+
+def make_gateway(client, **options):
+    options = dict(dict(requests_per_minute=60000, rate_limit_path=None), **options)
+    return LLMGateway(lambda model: client, ("gemini-test",), **options)
+
+
+def test_retries_transient_errors():
+    client = FakeLLM(RuntimeError("503 ServiceUnavailable"), RuntimeError("Deadline timed out"), "tamam")
+    assert make_gateway(client).invoke(["istem"]).content == "tamam"
+    assert len(client.calls) == 3
+
+
+def test_does_not_retry_permanent_errors():
+    client = FakeLLM(ValueError("400 InvalidArgument"), "tamam")
+    with pytest.raises(ValueError):
+        make_gateway(client).invoke(["istem"])
+    assert len(client.calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    client = FakeLLM(*[RuntimeError("500 InternalServerError")] * 3)
+    with pytest.raises(RuntimeError):
+        make_gateway(client, max_attempts=2).invoke(["istem"])
+    assert len(client.calls) == 2
+
+
+def test_stream_retries_before_first_chunk():
+    client = FakeLLM(RuntimeError("503 ServiceUnavailable"), '{"semesters": []}')
+    chunks = [chunk.content for chunk in make_gateway(client).stream(["istem"])]
+    assert "".join(chunks) == '{"semesters": []}'
+    assert len(client.calls) == 2
+
+
+# 429 bekleme önerisi paylaşılan kotayı duraklatır; SQLite yazımı olay döngüsü dışında yapılır
+def test_retry_hint_pauses_shared_bucket_off_the_event_loop(monkeypatch, tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    threads = []
+    update = SharedTokenBucket._update
+
+    def recording_update(self, fn):
+        threads.append(threading.current_thread().name)
+        return update(self, fn)
+
+    monkeypatch.setattr(SharedTokenBucket, "_update", recording_update)
+    client = FakeLLM(RuntimeError("429 ResourceExhausted: Please retry in 0.3s"), "tamam")
+    started, paused_after = time.monotonic(), time.time() + 0.3
+    assert make_gateway(client, rate_limit_path=path).invoke(["istem"]).content == "tamam"
+    assert time.monotonic() - started >= 0.3
+    assert threads and "llm-gateway" not in threads
+    with sqlite3.connect(path) as conn:
+        paused_until, = conn.execute("SELECT paused_until FROM rate_limit").fetchone()
+    assert paused_until >= paused_after
+
+
+class SlowLLM:
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0.3)
+        return FakeMessage("tamam")
+
+
+# Eşzamanlılık ve bekleme kuyruğu doluysa istek beklemeden reddedilir (HTTP 503)
+def test_overload_is_rejected_with_503():
+    llm_gateway = make_gateway(SlowLLM(), max_concurrency=1, max_queue=1)
+    running = [llm_gateway.submit(["istem"]) for _ in range(2)]
+    time.sleep(0.05)
+    with pytest.raises(GatewayOverloaded) as excinfo:
+        llm_gateway.invoke(["istem"])
+    assert describe_error(excinfo.value)[1] == 503
+    assert [future.result(2).content for future in running] == ["tamam", "tamam"]
+
+
+def take_tokens(path, count, finished):
+    bucket = SharedTokenBucket(path, rate_per_second=10, capacity=2)
+    for _ in range(count):
+        asyncio.run(bucket.acquire())
+    finished.put(time.time())
+
+
+# Üç süreç aynı kotayı paylaşır: 2 token hemen, kalan 10 token saniyede 10 hızla verilir
+def test_shared_bucket_limits_all_processes(tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    context = multiprocessing.get_context("fork")
+    finished = context.Queue()
+    started = time.time()
+    processes = [context.Process(target=take_tokens, args=(path, 4, finished)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+        assert process.exitcode == 0
+    elapsed = max(finished.get(timeout=1) for _ in processes) - started
+    # Süreç başına ayrı kota olsaydı her süreç yaklaşık 0,2 sn'de biterdi
+    assert elapsed >= 0.8
+
+
+class FirstCallSlowLLM:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(self.delay)
+            return FakeMessage("birincil")
+        return FakeMessage("yedek")
+
+
+def hedged_gateway(monkeypatch, client, latency):
+    monkeypatch.setattr(gateway, "GEMINI_HEDGE_MIN_DELAY", 0.05)
+    llm_gateway = make_gateway(client, hedge=True)
+    llm_gateway._ensure_loop()
+    llm_gateway._latency("gemini-test").samples.extend([latency] * gateway.GEMINI_HEDGE_MIN_SAMPLES)
+    return llm_gateway
+
+
+# p95 gecikmesini aşan çağrı için yedek istek gönderilir ve önce dönen yanıt kullanılır
+def test_hedges_slow_calls(monkeypatch):
+    client = FirstCallSlowLLM(delay=1.0)
+    started = time.monotonic()
+    assert hedged_gateway(monkeypatch, client, latency=0.01).invoke(["istem"], model="gemini-test").content == "yedek"
+    assert time.monotonic() - started < 0.5
+    assert client.calls == 2
+
+
+def test_does_not_hedge_within_threshold(monkeypatch):
+    client = FirstCallSlowLLM(delay=0.1)
+    assert hedged_gateway(monkeypatch, client, latency=0.5).invoke(["istem"], model="gemini-test").content == "birincil"
+    assert client.calls == 1
+
+
+# Yeterli gecikme ölçümü yokken eşik hesaplanmaz
+def test_does_not_hedge_without_samples():
+    client = FirstCallSlowLLM(delay=0.2)
+    assert make_gateway(client, hedge=True).invoke(["istem"]).content == "birincil"
+    assert client.calls == 1
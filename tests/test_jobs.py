@@ -0,0 +1,141 @@
+import io
+import os
+import sqlite3
+import time
+
+import pytest
+
+from analysis import AnalysisError, describe_error
+from jobs import STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, JobQueue, WorkerPool
+
+# İş kuyruğu: iş alma, worker'ların sonuç/hata kaydı ve /upload'un kuyruk modu
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_claim_returns_queued_jobs_in_order(queue):
+    first = queue.enqueue("/up/1.docx", "bm", "s1", "ali.docx")
+    second = queue.enqueue("/up/2.pdf")
+    assert queue.claim() == (first, "/up/1.docx", "bm", "s1", "ali.docx")
+    assert queue.claim() == (second, "/up/2.pdf", None, None, None)
+    assert queue.claim() is None
+
+
+# Kilit alınamazsa asıl hata fırlatılır ("no transaction is active" değil) ve iş kuyrukta kalır
+def test_claim_reports_lock_timeout(queue, monkeypatch):
+    job_id = queue.enqueue("/up/1.docx")
+    monkeypatch.setattr(queue, "_connect", lambda: sqlite3.connect(queue.path, timeout=0.05, isolation_level=None))
+    blocker = sqlite3.connect(queue.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            queue.claim()
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    assert queue.get(job_id)["status"] == STATUS_QUEUED
+
+
+def test_migrates_legacy_database(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, file_path TEXT NOT NULL,"
+                     " result TEXT, error TEXT, status_code INTEGER, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO jobs VALUES ('old', 'queued', '/up/old.docx', NULL, NULL, NULL, 0, 0)")
+    queue = JobQueue(path)
+    assert queue.claim() == ("old", "/up/old.docx", None, None, None)
+
+
+def test_worker_records_result_and_removes_upload(queue, tmp_path):
+    calls = []
+
+    def handler(file_path, program, student_id, file_name):
+        calls.append((program, student_id, file_name))
+        if file_name == "bozuk.docx":
+            raise AnalysisError("Dosya okunamadı", 400)
+        return {"can_graduate": True}
+
+    pool = WorkerPool(queue, handler, describe_error, size=0)
+    job_ids = []
+    for name in ("ali.docx", "bozuk.docx"):
+        upload = tmp_path / name
+        upload.write_bytes(b"x")
+        job_ids.append(queue.enqueue(str(upload), "bm", "s1", name))
+        pool.process(*queue.claim())
+        assert not upload.exists()
+    assert calls == [("bm", "s1", "ali.docx"), ("bm", "s1", "bozuk.docx")]
+    done, failed = (queue.get(job_id) for job_id in job_ids)
+    assert (done["status"], done["result"]) == (STATUS_DONE, {"can_graduate": True})
+    assert failed["status"] == STATUS_FAILED
+    assert (failed["error"], failed["status_code"]) == ("Dosya okunamadı", 400)
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    app = create_app({"UPLOAD_FOLDER": str(tmp_path / "uploads"), "JOBS_DB_PATH": str(tmp_path / "jobs.sqlite3"),
+                      "JOB_MODE": True, "TESTING": True})
+    # Worker thread'leri başlatılmaz; kuyruğa yazılan iş doğrudan incelenir
+    app.extensions["job_workers"] = WorkerPool(app.extensions["job_queue"], None, describe_error, size=0)
+    return app
+
+
+# Kuyruk modunda yüklenen dosyanın özgün adı işle birlikte saklanır ve analize iletilir
+def test_upload_enqueues_original_file_name(app):
+    response = app.test_client().post("/upload", data={"file": (io.BytesIO(b"PK"), "Ali Veli.docx"), "async": "1"})
+    assert response.status_code == 202
+    job_id, file_path, program, student_id, file_name = app.extensions["job_queue"].claim()
+    assert job_id == response.get_json()["job_id"]
+    assert file_name == "Ali Veli.docx"
+    assert os.path.basename(file_path) != file_name and os.path.exists(file_path)
+
+
+def backdate(queue, job_id, seconds):
+    with sqlite3.connect(queue.path) as conn:
+        conn.execute("UPDATE jobs SET updated_at = updated_at - ? WHERE id = ?", (seconds, job_id))
+
+
+# Uzun süren iş heartbeat gönderdiği sürece kuyruğa geri alınmaz; heartbeat kesilince alınır
+def test_heartbeat_keeps_running_job_claimed(queue):
+    job_id = queue.enqueue("/up/1.docx")
+    queue.claim()
+    backdate(queue, job_id, 100)
+    queue.heartbeat(job_id)
+    assert queue.requeue_stale(stale_seconds=50) == 0
+    backdate(queue, job_id, 100)
+    assert queue.requeue_stale(stale_seconds=50) == 1
+    assert queue.get(job_id)["status"] == STATUS_QUEUED
+
+
+def test_worker_sends_heartbeats_while_processing(queue, tmp_path):
+    requeued = []
+
+    def handler(file_path, program, student_id, file_name):
+        time.sleep(0.5)
+        requeued.append(queue.requeue_stale(stale_seconds=0.2))
+        return {}
+
+    pool = WorkerPool(queue, handler, describe_error, size=0, heartbeat_interval=0.05, stale_seconds=0.2)
+    job_id = queue.enqueue(str(tmp_path / "1.docx"))
+    pool.process(*queue.claim())
+    assert requeued == [0]
+    assert queue.get(job_id)["status"] == STATUS_DONE
+
+
+# Ölü worker'ın işi süreç başlangıcını beklemeden, boşta kalan worker'larca kuyruğa geri alınır
+def test_pool_requeues_jobs_of_dead_workers_periodically(queue):
+    pool = WorkerPool(queue, None, describe_error, size=0, heartbeat_interval=0.1, stale_seconds=50)
+    assert pool.requeue_stale() == 0
+    job_id = queue.enqueue("/up/1.docx")
+    queue.claim()
+    backdate(queue, job_id, 100)
+    # Aralık dolmadan tekrar kontrol edilmez
+    assert pool.requeue_stale() == 0
+    time.sleep(0.1)
+    assert pool.requeue_stale() == 1
+    assert queue.claim()[0] == job_id
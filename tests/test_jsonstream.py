@@ -0,0 +1,105 @@
+import json
+import random
+
+import pytest
+
+from jsonstream import IncrementalJSONParser, repair_json
+from schema import validate_extraction
+
+# Akış halinde gelen Gemini yanıtının artımlı ayrıştırılması ve kesilmiş yanıtların onarımı
+
+RESPONSE = json.dumps({
+    "semesters": [
+        {"semester": "1. Yarıyıl", "courses": [{"code": "BM101", "name": "Algoritmalar {I}", "grade": "AA"},
+                                               {"code": "MAT101", "name": "Matematik \"I\" [a]", "grade": "BB"}],
+         "akts": 30},
+        {"semester": "2. Yarıyıl", "courses": [{"code": "BM102", "name": "Algoritmalar\\II", "grade": "CC"}], "akts": 28},
+    ],
+    "gpa": 2.63,
+}, ensure_ascii=False)
+SEMESTERS = json.loads(RESPONSE)["semesters"]
+
+
+def feed_all(parser, chunks):
+    return [item for chunk in chunks for item in parser.feed(chunk)]
+
+
+# Her yarıyıl kapanış parantezi geldiği anda üretilir; ders adlarındaki parantez ve tırnaklar karıştırılmaz
+def test_semesters_are_emitted_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+    first_end = RESPONSE.index('"akts": 30}') + len('"akts": 30}')
+    assert parser.feed(RESPONSE[:first_end - 1]) == []
+    assert parser.feed(RESPONSE[first_end - 1:first_end]) == [SEMESTERS[0]]
+    assert parser.feed(RESPONSE[first_end:]) == [SEMESTERS[1]]
+    assert parser.finish() == json.loads(RESPONSE)
+
+
+def test_random_chunking_gives_same_items():
+    rnd = random.Random(9)
+    for _ in range(200):
+        cuts = sorted(rnd.sample(range(1, len(RESPONSE)), rnd.randint(0, 20)))
+        chunks = [RESPONSE[start:stop] for start, stop in zip([0] + cuts, cuts + [len(RESPONSE)])]
+        parser = IncrementalJSONParser()
+        assert feed_all(parser, chunks) == SEMESTERS
+        assert parser.finish() == json.loads(RESPONSE)
+
+
+# Kod bloğu işaretleri ve nesneden sonraki metin yok sayılır
+def test_fenced_response():
+    parser = IncrementalJSONParser()
+    assert feed_all(parser, ["```json\n", RESPONSE, "\n```\nAçıklama {yok}"]) == SEMESTERS
+    assert parser.finish() == json.loads(RESPONSE)
+
+
+# Yalnızca üst düzeydeki "semesters" dizisi izlenir
+def test_nested_key_is_not_tracked():
+    text = '{"meta": {"semesters": [{"semester": "x"}]}, "semesters": [{"semester": "1. Yarıyıl"}]}'
+    parser = IncrementalJSONParser()
+    assert parser.feed(text) == [{"semester": "1. Yarıyıl"}]
+
+
+def test_truncated_stream_keeps_completed_semesters():
+    parser = IncrementalJSONParser()
+    cut = RESPONSE.index('"2. Yarıyıl"') + 5
+    assert parser.feed(RESPONSE[:cut]) == [SEMESTERS[0]]
+    assert parser.finish()["semesters"][0] == SEMESTERS[0]
+
+
+def test_empty_stream():
+    parser = IncrementalJSONParser()
+    assert parser.feed("Üzgünüm, transkript okunamadı.") == []
+    assert parser.finish() is None
+
+
+TRUNCATED = '{"semesters": [{"semester": "1. Yarıyıl", "courses": [{"code": "BM101", "name": "Algoritmalar", ' \
+            '"grade": "AA"}, {"code": "MAT101", "grade": "BB"}], "akts": 30}, {"semester": "2. Yarıyıl", ' \
+            '"courses": [{"code": "BM102", "grade": "CC"}], "akts": 28}], "gpa": 2.63}'
+
+
+def test_repair_json_complete_and_fenced():
+    expected = json.loads(TRUNCATED)
+    assert repair_json(TRUNCATED) == expected
+    assert repair_json("```json\n" + TRUNCATED + "\n```") == expected
+
+
+# Her kesme noktasında onarılmış yanıt ya None'dır ya da ilk sürümün önekiyle tutarlı bir nesnedir;
+# doğrulama kesilmiş yanıtı sorunlu olarak işaretler
+@pytest.mark.parametrize("cut", range(1, len(TRUNCATED)))
+def test_repair_json_truncated(cut):
+    data = repair_json(TRUNCATED[:cut])
+    if data is None:
+        return
+    assert isinstance(data, dict)
+    assert set(data) <= {"semesters", "gpa"}
+    normalized, problems = validate_extraction(data)
+    assert problems
+    full = json.loads(TRUNCATED)["semesters"]
+    for semester, complete in zip(normalized["semesters"], full):
+        assert semester["semester"] == complete["semester"]
+        assert semester["courses"] == [dict(course, name=course.get("name", ""))
+                                       for course in complete["courses"][:len(semester["courses"])]]
+
+
+@pytest.mark.parametrize("text", ["", "   ", "not json", "[1, 2", "```"])
+def test_repair_json_unusable(text):
+    assert repair_json(text) is None
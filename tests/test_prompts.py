@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import analysis
+from conftest import UPLOADS_DIR, prepared_text
+from prompts import COMPACT_LEGEND, build_prompt, compact_transcript, prepare_prompt, split_semesters
+from transcript_parser import parse_docx
+
+# Prompt sıkıştırma: yarıyıl tablolarına dönüştürme, bilgi kaybı olmaması ve token tasarrufu
+
+SAMPLE = os.path.join(UPLOADS_DIR, "TranscriptReport.docx")
+
+# Üst bilgi, sayfa sonunda tekrarlanan yarıyıl bloğu ve nottan sonra devam eden ders adı içeren metin
+PAGED = ("T.C. ÜNİVERSİTESİ ADI SOYADI Ali Veli ÖĞRENCİ NO 201002225 "
+         "1. Yarıyıl Ders Kodu Ders Adı Kredi AKTS Harf BM101 Algoritmalar ve Programlama I 3.0 5.0 DD "
+         "MAT101 Matematik 4.0 6.0 AA I Toplam Kredi Toplam AKTS Toplam Ağırlıklı Ortalama "
+         "Dönem Sonu 7.0 11.0 26.0 2.36 Genel 7.0 11.0 26.0 2.36 Sayfa 1 / 2 Belge doğrulama kodu X1 "
+         "1. Yarıyıl Ders Kodu Ders Adı Kredi AKTS Harf BM101 Algoritmalar ve Programlama I 3.0 5.0 DD "
+         "MAT101 Matematik 4.0 6.0 AA I Toplam Kredi Toplam AKTS Toplam Ağırlıklı Ortalama "
+         "Dönem Sonu 7.0 11.0 26.0 2.36 Genel 7.0 11.0 26.0 2.36 "
+         "2. Yarıyıl BM102 Algoritmalar II 3.0 5.0 ** FIZ102 Fizik II 3.0 5.0 FF")
+
+
+@pytest.fixture(scope="module")
+def sample_text():
+    return analysis.extract_text(SAMPLE)
+
+
+def test_split_semesters_drops_headers_and_repeated_blocks():
+    semesters = split_semesters(PAGED)
+    assert [(semester["semester"], semester["gpa"]) for semester in semesters] == [("1. Yarıyıl", 2.36),
+                                                                                   ("2. Yarıyıl", None)]
+    assert semesters[0]["text"].split("\n") == [
+        "1. Yarıyıl",
+        "BM101 | Algoritmalar ve Programlama I | 3.0 | 5.0 | DD",
+        "MAT101 | Matematik I | 4.0 | 6.0 | AA",
+        "Toplam AKTS: 11.0",
+        "Genel Ortalama: 2.36",
+    ]
+    # Tanınmayan satır bilgi kaybolmasın diye olduğu gibi kalır
+    assert semesters[1]["text"].split("\n")[1:] == ["BM102 Algoritmalar II 3.0 5.0 **",
+                                                    "FIZ102 | Fizik II | 3.0 | 5.0 | FF"]
+    compact = compact_transcript(PAGED)
+    assert compact.startswith(COMPACT_LEGEND)
+    assert "Ali Veli" not in compact and "201002225" not in compact and "Sayfa" not in compact
+
+
+# Sıkıştırılmış tablo her dersi kod, ad ve notuyla içerir ve prompt belirgin biçimde küçülür
+def test_compaction_keeps_every_course(sample_text):
+    rows = compact_transcript(sample_text).split("\n")
+    data, _ = parse_docx(SAMPLE)
+    for semester in data["semesters"]:
+        for course in semester["courses"]:
+            assert any(row.startswith(f"{course['code']} | {course['name']} |") and row.endswith(f"| {course['grade']}")
+                       for row in rows), course
+    prompt, tokens_before, tokens_after = prepare_prompt(sample_text)
+    assert COMPACT_LEGEND in prompt
+    assert tokens_after < 0.6 * tokens_before
+
+
+def test_prepare_prompt_falls_back_to_full_prompt(sample_text):
+    assert prepare_prompt(sample_text, compact=False)[0] == build_prompt(sample_text)
+    prompt, tokens_before, tokens_after = prepare_prompt("yarıyıl bilgisi olmayan metin")
+    assert prompt == build_prompt("yarıyıl bilgisi olmayan metin")
+    assert tokens_before == tokens_after
+
+
+@pytest.mark.parametrize("compaction", [True, False])
+def test_pipeline_sends_configured_prompt(monkeypatch, llm, compaction):
+    monkeypatch.setattr(analysis, "PROMPT_COMPACTION", compaction)
+    llm.respond = lambda messages: '{"semesters": [], "gpa": 0.0}'
+    analysis.analyze_prepared(prepared_text(PAGED))
+    (_, system), (_, prompt) = llm.calls[0]
+    assert (COMPACT_LEGEND in prompt) is compaction
+    assert ("Ali Veli" in prompt) is not compaction
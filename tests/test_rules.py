@@ -0,0 +1,274 @@
+import copy
+import json
+import os
+import random
+
+import pytest
+
+from catalog import CURRICULA_DIR, load_catalog
+from evaluator import evaluate
+
+# Kural motoru için regresyon testleri.
+# Değerlendirici, ilk sürümdeki upload() içinde satır içi yazılmış kurallarla (legacy_evaluate) rastgele
+# transkriptler üzerinde karşılaştırılır.
+
+BM_PATH = os.path.join(CURRICULA_DIR, "bm.json")
+# evaluate() sonucuna eklenen, eski kurallarda olmayan program alanları
+PROGRAM_FIELDS = ("program", "program_name", "min_gpa")
+GRADES = ["AA", "BA", "BB", "CC", "DC", "DD", "YT", "FF", "FD", "YZ"]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog(BM_PATH, "bm")
+
+
+@pytest.fixture(scope="module")
+def legacy_tables():
+    with open(BM_PATH, encoding="utf-8") as f:
+        doc = json.load(f)
+    course = lambda code: {"code": code, "name": doc["courses"][code]}
+    mandatory = {f"{n}. Yarıyıl": [course(code) for code in codes] for n, codes in doc["mandatory"].items()}
+    electives = {f"{n}. Yarıyıl": [course(code) for code in doc["elective_groups"][rule["group"]]]
+                 for n, rule in doc["electives"].items()}
+    return mandatory, electives
+
+
+# İlk sürümdeki upload() kurallarının birebir kopyası (günlük satırları hariç); girdiyi yerinde değiştirir
+def legacy_evaluate(extracted_data, MANDATORY_COURSES, ELECTIVE_COURSES):
+    if not isinstance(extracted_data, dict):
+        extracted_data = {}
+    extracted_data.setdefault("semesters", [])
+    extracted_data.setdefault("gpa", 0.0)
+
+    available_semesters = [sem["semester"] for sem in extracted_data["semesters"]]
+    last_semester = 0
+    if available_semesters:
+        last_semester = max([int(sem.split('.')[0]) for sem in available_semesters])
+
+    expected_semesters = [f"{i}. Yarıyıl" for i in range(1, 9)]
+    missing_semesters = [sem for sem in expected_semesters if sem not in available_semesters]
+    extracted_data["missing_semesters"] = missing_semesters
+
+    failed_mandatory = []
+    for semester in extracted_data["semesters"]:
+        semester_name = semester["semester"]
+        if semester_name in MANDATORY_COURSES:
+            for course in semester["courses"]:
+                mandatory_course = next(
+                    (mc for mc in MANDATORY_COURSES[semester_name] if
+                     mc["code"].strip() == course["code"].strip()), None)
+                if mandatory_course and course["grade"] in ["FF", "FD", "YZ"]:
+                    failed_mandatory.append({
+                        "semester": semester_name,
+                        "code": course["code"],
+                        "name": course["name"],
+                        "grade": course["grade"]
+                    })
+    extracted_data["failed_mandatory"] = failed_mandatory
+
+    missing_mandatory_codes = set()
+    missing_mandatory = []
+    for semester in extracted_data["semesters"]:
+        semester_name = semester["semester"]
+        if semester_name in MANDATORY_COURSES:
+            semester_course_codes = {course["code"].strip() for course in semester["courses"]}
+            for req_course in MANDATORY_COURSES[semester_name]:
+                if req_course["code"].strip() not in semester_course_codes:
+                    if req_course["code"] not in missing_mandatory_codes:
+                        missing_mandatory.append({
+                            "semester": semester_name,
+                            "code": req_course["code"],
+                            "name": req_course["name"]
+                        })
+                        missing_mandatory_codes.add(req_course["code"])
+
+    for missing_sem in missing_semesters:
+        if missing_sem in MANDATORY_COURSES:
+            for req_course in MANDATORY_COURSES[missing_sem]:
+                if req_course["code"] not in missing_mandatory_codes:
+                    missing_mandatory.append({
+                        "semester": missing_sem,
+                        "code": req_course["code"],
+                        "name": req_course["name"]
+                    })
+                    missing_mandatory_codes.add(req_course["code"])
+    extracted_data["missing_mandatory"] = missing_mandatory
+
+    failed_electives = []
+    failed_elective_codes = set()
+    for semester in extracted_data["semesters"]:
+        semester_name = semester["semester"]
+        if semester_name in ELECTIVE_COURSES:
+            for course in semester["courses"]:
+                elective_course = next(
+                    (ec for ec in ELECTIVE_COURSES[semester_name] if
+                     ec["code"].strip() == course["code"].strip()), None)
+                if elective_course and course["grade"] in ["FF", "FD", "YZ"] and course["code"] not in failed_elective_codes:
+                    failed_electives.append({
+                        "semester": semester_name,
+                        "code": course["code"],
+                        "name": course["name"],
+                        "grade": course["grade"]
+                    })
+                    failed_elective_codes.add(course["code"])
+    extracted_data["failed_electives"] = failed_electives
+
+    akts_issues = []
+    for semester in extracted_data["semesters"]:
+        akts = semester.get("akts", 0)
+        if akts is None:
+            akts = 0
+        if akts < 30:
+            akts_issues.append(f"{semester['semester']}: Toplam AKTS {akts} < 30")
+    for missing_sem in missing_semesters:
+        akts_issues.append(f"{missing_sem}: Toplam AKTS 0 < 30 (Yarıyıl eksik)")
+    extracted_data["akts_issues"] = akts_issues
+
+    elective_issues = []
+    for sem_num in [3, 4]:
+        sem_key = f"{sem_num}. Yarıyıl"
+        if sem_key in available_semesters:
+            us_courses = [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
+                          if c["code"].startswith("US") and c["grade"] not in ["FF", "FD", "YZ"]]
+            if len(us_courses) < 1:
+                elective_issues.append(f"{sem_num}. Yarıyıl'da US kodlu bir ders eksik.")
+        elif sem_key in ELECTIVE_COURSES:
+            elective_issues.append(f"{sem_num}. Yarıyıl'da US kodlu bir ders eksik.")
+
+    for sem_num in [5, 6]:
+        sem_key = f"{sem_num}. Yarıyıl"
+        if sem_key in available_semesters:
+            ms_courses = [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
+                          if c["code"].startswith("MS") and c["grade"] not in ["FF", "FD", "YZ"]]
+            if len(ms_courses) < 1:
+                elective_issues.append(f"{sem_num}. Yarıyıl'da MS kodlu bir ders eksik.")
+        elif sem_key in ELECTIVE_COURSES:
+            elective_issues.append(f"{sem_num}. Yarıyıl'da MS kodlu bir ders eksik.")
+
+    bm_mth_courses = []
+    for sem_num in [7, 8]:
+        sem_key = f"{sem_num}. Yarıyıl"
+        if sem_key in available_semesters:
+            bm_mth_courses += [c for c in extracted_data["semesters"][available_semesters.index(sem_key)]["courses"]
+                               if (c["code"].startswith("BM") or c["code"].startswith("MTH"))
+                               and c["code"] not in ["BM401", "BM499", "BM498"]
+                               and c["grade"] not in ["FF", "FD", "YZ"]]
+    if last_semester >= 7 and len(bm_mth_courses) < 10:
+        elective_issues.append(f"7. ve 8. Yarıyıl'da en az 10 BM/MTH dersi alınmalı (Alınan: {len(bm_mth_courses)})")
+    extracted_data["elective_issues"] = elective_issues
+
+    gpa = extracted_data.get("gpa", 0)
+    if gpa is None:
+        gpa = 0.0
+
+    graduation_reasons = []
+    if last_semester < 8:
+        graduation_reasons.append(f"Eksik yarıyıl sayısı: {8 - last_semester} ({', '.join(missing_semesters)})")
+    if missing_mandatory:
+        graduation_reasons.append(f"Eksik zorunlu ders sayısı: {len(missing_mandatory)}")
+    if failed_mandatory:
+        graduation_reasons.append(f"Başarısız zorunlu ders sayısı: {len(failed_mandatory)}")
+    if failed_electives:
+        graduation_reasons.append(f"Başarısız seçmeli ders sayısı: {len(failed_electives)}")
+    if akts_issues:
+        graduation_reasons.append(f"AKTS eksikliği olan yarıyıl sayısı: {len(akts_issues)}")
+    if elective_issues:
+        graduation_reasons.append(f"Seçmeli ders eksiklikleri: {len(elective_issues)}")
+    if gpa < 2.50:
+        graduation_reasons.append(f"Genel not ortalaması yetersiz: {gpa:.2f} (Gereken: 2.50)")
+
+    if (last_semester >= 8 and
+            not missing_mandatory and
+            not failed_mandatory and
+            not failed_electives and
+            not akts_issues and
+            not elective_issues and
+            gpa >= 2.50):
+        extracted_data["can_graduate"] = True
+        extracted_data["graduation_message"] = "Tebrikler! Tüm mezuniyet şartlarını karşılıyorsunuz."
+    else:
+        extracted_data["can_graduate"] = False
+        extracted_data["graduation_message"] = f"Mezuniyet şartları karşılanmadı:\n- " + "\n- ".join(graduation_reasons)
+    return extracted_data
+
+
+def assert_parity(data, catalog, legacy_tables):
+    expected = legacy_evaluate(copy.deepcopy(data), *legacy_tables)
+    original = copy.deepcopy(data)
+    result = evaluate(data, catalog)
+    assert data == original, "evaluate() girdiyi değiştirmemeli"
+    for field in PROGRAM_FIELDS:
+        result.pop(field)
+    assert result == expected
+    return result
+
+
+# Tüm zorunlu dersleri geçmiş, seçmeli ve üst yarıyıl kurallarını sağlayan bir mezun
+def graduate(legacy_tables):
+    mandatory, electives = legacy_tables
+    semesters = []
+    for n in range(1, 9):
+        name = f"{n}. Yarıyıl"
+        courses = [dict(course, grade="BB") for course in mandatory.get(name, [])]
+        if name in electives:
+            courses.append(dict(electives[name][0], grade="CC"))
+        if n in (7, 8):
+            courses += [{"code": f"BM4{n}{i}", "name": "Seçmeli", "grade": "AA"} for i in range(5)]
+        semesters.append({"semester": name, "courses": courses, "akts": 30})
+    return {"semesters": semesters, "gpa": 3.1}
+
+
+def test_evaluate_graduate(catalog, legacy_tables):
+    data = graduate(legacy_tables)
+    assert assert_parity(data, catalog, legacy_tables)["can_graduate"] is True
+    # Kodlar karşılaştırılırken boşluklar yok sayılır
+    data["semesters"][0]["courses"][0]["code"] = " AIB101 "
+    assert assert_parity(data, catalog, legacy_tables)["can_graduate"] is True
+
+
+@pytest.mark.parametrize("change", [
+    lambda d: d["semesters"][0]["courses"][0].update(grade="FF"),
+    lambda d: d["semesters"][2]["courses"].pop(),
+    lambda d: d["semesters"][4]["courses"].pop(0),
+    lambda d: d["semesters"].pop(5),
+    lambda d: d["semesters"].pop(),
+    lambda d: d["semesters"][7]["courses"].pop(),
+    lambda d: d["semesters"][3].update(akts=None),
+    lambda d: d["semesters"][1].pop("akts"),
+    lambda d: d.update(gpa=2.49),
+    lambda d: d.update(gpa=None),
+])
+def test_evaluate_failures_match_legacy(catalog, legacy_tables, change):
+    data = graduate(legacy_tables)
+    change(data)
+    result = assert_parity(data, catalog, legacy_tables)
+    assert result["can_graduate"] is False
+
+
+@pytest.mark.parametrize("data", [None, [], {}, {"gpa": 3.0}, {"semesters": []}])
+def test_evaluate_empty_input(catalog, legacy_tables, data):
+    assert_parity(data, catalog, legacy_tables)
+
+
+def random_transcript(rnd, codes):
+    semesters = []
+    for n in rnd.sample(range(1, 10), rnd.randint(0, 9)):
+        courses = [{"code": rnd.choice(codes), "name": "x", "grade": rnd.choice(GRADES)}
+                   for _ in range(rnd.randint(0, 14))]
+        semester = {"semester": f"{n}. Yarıyıl" if rnd.random() < 0.95 else f"{n}.Yarıyıl", "courses": courses}
+        if rnd.random() < 0.9:
+            semester["akts"] = rnd.choice([None, 0, 20, 29.5, 30, 35])
+        semesters.append(semester)
+    return {"semesters": semesters, "gpa": rnd.choice([None, 0.0, 1.0, 2.49, 2.5, 3.2])}
+
+
+# Farklılık testi: 3000 rastgele transkript eski ve yeni değerlendiricide aynı sonucu vermeli
+def test_evaluate_differential(catalog, legacy_tables):
+    mandatory, electives = legacy_tables
+    codes = sorted({course["code"] for table in (mandatory, electives) for courses in table.values()
+                    for course in courses})
+    codes += ["BM455", "BM456", "MTH401", "US999", "MS999", "XX101", " BM101 ", "BM101 "]
+    rnd = random.Random(2024)
+    for _ in range(3000):
+        assert_parity(random_transcript(rnd, codes), catalog, legacy_tables)
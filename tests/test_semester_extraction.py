@@ -0,0 +1,130 @@
+import json
+import re
+
+import pytest
+
+import analysis
+from conftest import prepared_text
+
+# Yarıyıl bloklarıyla çıkarma: parçalı mod (her yarıyıl ayrı ve eşzamanlı bir Gemini çağrısı) ve
+# artımlı mod (yalnızca değişen yarıyıllar gönderilir)
+
+TEXT = ("1. Yarıyıl Ders Kodu Ders Adı Kredi AKTS Harf BM101 Algoritmalar ve Programlama I 3.0 5.0 DD "
+        "MAT101 Matematik I 4.0 6.0 AA Dönem Sonu 7.0 30.0 26.0 2.36 Genel 7.0 30.0 26.0 2.36 "
+        "2. Yarıyıl Ders Kodu Ders Adı Kredi AKTS Harf BM102 Algoritmalar ve Programlama II 3.0 5.0 CC "
+        "FIZ102 Fizik II 3.0 5.0 FF Dönem Sonu 6.0 30.0 15.0 2.5 Genel 13.0 60.0 41.0 2.40")
+
+CHUNKS = {
+    "1. Yarıyıl": {"courses": [{"code": "BM101", "name": "Algoritmalar ve Programlama I", "grade": "DD"},
+                               {"code": "MAT101", "name": "Matematik I", "grade": "AA"}], "akts": 30, "gpa": 2.36},
+    "2. Yarıyıl": {"courses": [{"code": "BM102", "name": "Algoritmalar ve Programlama II", "grade": "CC"},
+                               {"code": "FIZ102", "name": "Fizik II", "grade": "FF"}], "akts": 30, "gpa": 2.4},
+    "3. Yarıyıl": {"courses": [{"code": "BM203", "name": "Elektronik", "grade": "BB"}], "akts": 30, "gpa": 2.5},
+}
+# Bir dönem sonra aynı öğrencinin transkripti: ilk iki yarıyıl aynı, üçüncüsü yeni
+NEXT_TEXT = TEXT + (" 3. Yarıyıl Ders Kodu Ders Adı Kredi AKTS Harf BM203 Elektronik 4.0 5.0 BB "
+                    "Dönem Sonu 4.0 30.0 12.0 3.0 Genel 17.0 90.0 53.0 2.50")
+
+
+# Yarıyıl istemine o yarıyılın yanıtını ver; truncate içindeki yarıyılların yanıtı kesilir
+def respond_by_semester(truncate=()):
+    def respond(messages):
+        semester = re.search(r"^(\d+\. Yarıyıl)$", messages[-1][1], re.MULTILINE).group(1)
+        content = json.dumps(CHUNKS[semester], ensure_ascii=False)
+        return content[:-30] if semester in truncate else content
+    return respond
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    monkeypatch.setattr(analysis, "EXTRACTION_MODE", "chunked")
+
+
+def test_merge_semesters_orders_blocks_and_takes_last_gpa():
+    blocks = [{"semester": "2. Yarıyıl", "gpa": None, "hash": "h2"}, {"semester": "1. Yarıyıl", "gpa": 2.36, "hash": None}]
+    merged = analysis.merge_semesters([(blocks[0], CHUNKS["2. Yarıyıl"]), (blocks[1], CHUNKS["1. Yarıyıl"])])
+    assert [semester["semester"] for semester in merged["semesters"]] == ["1. Yarıyıl", "2. Yarıyıl"]
+    assert "block_hash" not in merged["semesters"][0]
+    assert merged["semesters"][1]["block_hash"] == "h2"
+    # Bloğun kendi Genel Ortalama'sı yoksa yanıttaki değer kullanılır
+    assert merged["gpa"] == 2.4
+    assert analysis.merge_semesters([]) == {"semesters": [], "gpa": 0.0}
+
+
+def test_chunked_mode_sends_one_request_per_semester(chunked, llm):
+    llm.respond = respond_by_semester()
+    result = analysis.analyze_prepared(prepared_text(TEXT))
+    assert len(llm.calls) == 2
+    assert [semester["semester"] for semester in result["semesters"]] == ["1. Yarıyıl", "2. Yarıyıl"]
+    assert result["semesters"][1]["courses"] == CHUNKS["2. Yarıyıl"]["courses"]
+    assert result["gpa"] == 2.4
+    assert "extraction_problems" not in result
+    # Birleştirilmiş sonuç önbelleğe yazılır
+    analysis.analyze_prepared(prepared_text(TEXT, "other"))
+    assert len(llm.calls) == 2
+
+
+# Kesilen tek yarıyıl yanıtı tüm sonucu eksik yapar; sonuç önbelleğe ve depoya yazılmaz
+def test_chunked_mode_marks_incomplete_block(chunked, llm):
+    llm.respond = respond_by_semester(truncate={"2. Yarıyıl"})
+    result = analysis.analyze_prepared(prepared_text(TEXT))
+    assert result["extraction_problems"]
+    assert result["graduation_message"] == analysis.INCOMPLETE_EXTRACTION_MESSAGE
+    assert result["semesters"][0]["courses"] == CHUNKS["1. Yarıyıl"]["courses"]
+    assert analysis.analysis_store.get("doc") is None
+    llm.respond = respond_by_semester()
+    analysis.analyze_prepared(prepared_text(TEXT, "other"))
+    assert len(llm.calls) == 4
+
+
+# Yarıyıl sınırı bulunamayan metin tek çağrıyla çıkarılır
+def test_chunked_mode_without_semesters_uses_single_request(chunked, llm):
+    llm.respond = lambda messages: '{"semesters": [], "gpa": 0.0}'
+    analysis.analyze_prepared(prepared_text("yarıyıl bilgisi olmayan metin"))
+    assert len(llm.calls) == 1
+    assert "yarıyıl bilgisi olmayan metin" in llm.calls[0][-1][1]
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    monkeypatch.setattr(analysis, "EXTRACTION_MODE", "incremental")
+
+
+def requested_semesters(llm):
+    return [re.search(r"^(\d+\. Yarıyıl)$", messages[-1][1], re.MULTILINE).group(1) for messages in llm.calls]
+
+
+# Öğrencinin önceki analizindeki değişmemiş yarıyıllar yeniden kullanılır; yalnızca yeni yarıyıl gönderilir
+def test_incremental_mode_reuses_previous_analysis(incremental, llm):
+    llm.respond = respond_by_semester()
+    first = analysis.analyze_prepared(prepared_text(TEXT, "doc1"), student_id="s1")
+    assert all(semester["block_hash"] for semester in first["semesters"])
+    analysis.result_cache.clear()
+    result = analysis.analyze_prepared(prepared_text(NEXT_TEXT, "doc2"), student_id="s1")
+    assert requested_semesters(llm)[2:] == ["3. Yarıyıl"]
+    assert [semester["courses"] for semester in result["semesters"]] == [CHUNKS[f"{n}. Yarıyıl"]["courses"]
+                                                                         for n in (1, 2, 3)]
+    assert result["gpa"] == 2.5
+
+
+# Başka öğrencinin aynı yarıyıl blokları blok önbelleğinden gelir; değişen yarıyıl yeniden gönderilir
+def test_incremental_mode_uses_block_cache(incremental, llm):
+    llm.respond = respond_by_semester()
+    analysis.analyze_prepared(prepared_text(TEXT, "doc1"), student_id="s1")
+    changed = NEXT_TEXT.replace("MAT101 Matematik I 4.0 6.0 AA", "MAT101 Matematik I 4.0 6.0 BA")
+    analysis.analyze_prepared(prepared_text(changed, "doc2"), student_id="s2")
+    assert sorted(requested_semesters(llm)[2:]) == ["1. Yarıyıl", "3. Yarıyıl"]
+
+
+# Doğrulamadan geçmeyen blok özetsiz birleştirilir ve önbelleğe yazılmaz; sonraki çıkarmada yeniden istenir
+def test_incremental_failed_block_is_not_reused(incremental, llm):
+    llm.respond = respond_by_semester(truncate={"2. Yarıyıl"})
+    blocks = analysis.semester_blocks(TEXT)
+    data, problems = analysis.extract_incremental(blocks)
+    assert problems
+    assert [semester.get("block_hash") for semester in data["semesters"]] == [blocks[0]["hash"], None]
+    assert analysis.result_cache.get(blocks[1]["hash"]) is None
+    llm.respond = respond_by_semester()
+    data, problems = analysis.extract_incremental(blocks, {blocks[0]["hash"]: data["semesters"][0]})
+    assert problems == []
+    assert requested_semesters(llm)[2:] == ["2. Yarıyıl"]
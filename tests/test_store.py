@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+import analysis
+from catalog import CURRICULA_DIR, load_catalog
+from conftest import UPLOADS_DIR
+from evaluator import evaluate
+from store import AnalysisStore
+
+# Analiz deposu: çıkarılmış verinin yeniden kullanım kuralları ve rapor sorguları
+
+KEY = "2-compact/gemini-1.5-flash"
+DATA = {"semesters": [{"semester": "1. Yarıyıl", "courses": [{"code": "BM101", "name": "Algoritmalar", "grade": "FF"},
+                                                            {"code": "XYZ101", "name": "Diğer", "grade": "FD"},
+                                                            {"code": "MAT101", "name": "Matematik", "grade": "AA"}],
+                       "akts": 25}],
+        "gpa": 2.0}
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog(os.path.join(CURRICULA_DIR, "bm.json"), "bm")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalysisStore(str(tmp_path / "analyses.sqlite3"))
+
+
+def test_find_extraction_reuse_rules(store, catalog):
+    store.save("doc", catalog, evaluate(DATA, catalog), "s1", "a.docx", KEY)
+    found = store.find_extraction("doc", (KEY, "local"), max_age=60)
+    assert found["data"] == {"semesters": DATA["semesters"], "gpa": DATA["gpa"]}
+    assert found["extraction_key"] == KEY
+    # Prompt sürümü veya model değişmişse kullanılmaz
+    assert store.find_extraction("doc", ("3-compact/gemini-1.5-flash",)) is None
+    assert store.find_extraction("doc", ()) is None
+    assert store.find_extraction("other", (KEY,)) is None
+
+
+def test_find_extraction_respects_ttl(store, catalog):
+    store.save("doc", catalog, evaluate(DATA, catalog), extraction_key=KEY, extracted_at=time.time() - 100)
+    assert store.find_extraction("doc", (KEY,), max_age=50) is None
+    assert store.find_extraction("doc", (KEY,), max_age=200) is not None
+    assert store.find_extraction("doc", (KEY,)) is not None
+
+
+# extraction_key'i olmayan satırlar yalnızca rapordur; yeniden kullanılmaz
+def test_rows_without_extraction_key_are_not_reused(store, catalog):
+    store.save("doc", catalog, evaluate(DATA, catalog), "s1")
+    assert store.get("doc") is not None
+    assert store.find_extraction("doc", (KEY, "local")) is None
+    assert store.latest_for_student("s1", "bm") is None
+
+
+def test_failed_courses_use_catalog_failing_grades(store, catalog):
+    store.save("doc", catalog, evaluate(DATA, catalog), "s1", extraction_key=KEY)
+    assert [row["grade"] for row in store.course_report("BM101")] == ["FF"]
+    # Katalogda olmayan ders de kalma notuyla kalınmış sayılır
+    assert [row["grade"] for row in store.course_report("XYZ101")] == ["FD"]
+    assert store.course_report("MAT101") == []
+    assert [row["semester"] for row in store.course_report("BM102", status="missing")] == ["2. Yarıyıl"]
+
+
+# Raporlar her öğrencinin programdaki yalnızca en yeni analizini sayar
+def test_reports_count_latest_analysis(store, catalog):
+    store.save("old", catalog, evaluate(DATA, catalog), "s1", extraction_key=KEY)
+    passed = {"semesters": [dict(DATA["semesters"][0], courses=[dict(course, grade="AA") for course in
+                                                                 DATA["semesters"][0]["courses"]], akts=30)],
+              "gpa": 3.0}
+    store.save("new", catalog, evaluate(passed, catalog), "s1", extraction_key=KEY)
+    assert store.course_report("BM101") == []
+    assert [record["document_hash"] for record in store.list(student_id="s1")] == ["new", "old"]
+    shortfalls = {row["semester"]: row for row in store.akts_shortfalls("bm")}
+    assert "1. Yarıyıl" not in shortfalls
+    assert shortfalls["2. Yarıyıl"]["students"] == 1
+    assert store.summary("bm")["analyses"] == 1
+
+
+# Sonradan eklenen sütunlar eski veritabanına eklenir; eski satırlar yeniden kullanılmaz
+def test_migrates_legacy_database(tmp_path, catalog):
+    path = str(tmp_path / "legacy.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE analyses (id INTEGER PRIMARY KEY, document_hash TEXT NOT NULL, program TEXT NOT NULL,"
+                     " student_id TEXT, file_name TEXT, can_graduate INTEGER NOT NULL, gpa REAL,"
+                     " last_semester INTEGER NOT NULL, latest INTEGER NOT NULL DEFAULT 1, result TEXT NOT NULL,"
+                     " created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO analyses (document_hash, program, can_graduate, last_semester, result, created_at,"
+                     " updated_at) VALUES ('doc', 'bm', 0, 1, ?, 0, 0)", (json.dumps(DATA),))
+    store = AnalysisStore(path)
+    assert store.find_extraction("doc", (KEY, "local")) is None
+    store.save("doc", catalog, evaluate(DATA, catalog), extraction_key=KEY)
+    assert store.find_extraction("doc", (KEY,)) is not None
+
+
+PDF_PATH = os.path.join(UPLOADS_DIR, "TranscriptReport.pdf")
+RESPONSE = json.dumps(DATA, ensure_ascii=False)
+
+
+# Boş (yarıyılsız) veya sorunlu çıkarmalar saklanmaz; her yüklemede Gemini yeniden çağrılır
+@pytest.mark.parametrize("response", ['{"semesters": [], "gpa": 0.0}', RESPONSE[:-30]])
+def test_pipeline_does_not_store_empty_or_incomplete_extractions(llm, response):
+    llm.respond = lambda messages: response
+    for _ in range(2):
+        analysis.analyze_file(PDF_PATH)
+    assert len(llm.calls) == 2
+    assert analysis.analysis_store.list() == []
+
+
+def test_pipeline_reuses_stored_extraction(llm):
+    llm.respond = lambda messages: RESPONSE
+    first = analysis.analyze_file(PDF_PATH, student_id="s1", file_name="TranscriptReport.pdf")
+    analysis.result_cache.clear()
+    second = analysis.analyze_file(PDF_PATH)
+    assert len(llm.calls) == 1
+    assert second == first
+    assert analysis.analysis_store.list()[0]["file_name"] == "TranscriptReport.pdf"
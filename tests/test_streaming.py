@@ -0,0 +1,96 @@
+import io
+import json
+import os
+
+import pytest
+
+import analysis
+from conftest import UPLOADS_DIR
+
+# Akış modu: stream_analysis olayları ve /upload/stream SSE uç noktası
+
+# Yerel ayrıştırıcının güveni düşük olduğu için Gemini'ye giden örnek transkript
+SAMPLE = os.path.join(UPLOADS_DIR, "TranscriptReport (3).docx")
+RESPONSE = json.dumps({
+    "semesters": [
+        {"semester": "1. Yarıyıl", "courses": [{"code": "BM101", "name": "Algoritmalar ve Programlama I", "grade": "FF"},
+                                               {"code": "MAT101", "name": "Matematik I", "grade": "AA"}], "akts": 30},
+        {"semester": "2. Yarıyıl", "courses": [{"code": "BM102", "name": "Algoritmalar ve Programlama II", "grade": "CC"}],
+         "akts": 30},
+    ],
+    "gpa": 2.4,
+}, ensure_ascii=False)
+
+
+def test_stream_analysis_emits_semesters_then_result(llm):
+    llm.respond = lambda messages: RESPONSE
+    events = list(analysis.stream_analysis(SAMPLE))
+    assert [event for event, _ in events] == ["semester", "semester", "result"]
+    first = events[0][1]
+    assert first["semester"]["semester"] == "1. Yarıyıl"
+    # Yarıyıldaki başarısız zorunlu ders sonuç beklenmeden bildirilir
+    assert "BM101" in json.dumps(first["failed"], ensure_ascii=False)
+    result = events[-1][1]
+    assert [semester["semester"] for semester in result["semesters"]] == ["1. Yarıyıl", "2. Yarıyıl"]
+    assert "extraction_problems" not in result
+    assert len(analysis.analysis_store.list()) == 1
+
+
+# Önbellekteki sonuç da yarıyıl olaylarıyla verilir; Gemini yeniden çağrılmaz
+def test_stream_analysis_replays_cached_result(monkeypatch, llm):
+    monkeypatch.setattr(analysis, "ANALYSIS_STORE_ENABLED", False)
+    llm.respond = lambda messages: RESPONSE
+    list(analysis.stream_analysis(SAMPLE))
+    events = list(analysis.stream_analysis(SAMPLE))
+    assert len(llm.calls) == 1
+    assert [event for event, _ in events] == ["semester", "semester", "result"]
+
+
+def test_stream_analysis_marks_truncated_response(llm):
+    llm.respond = lambda messages: RESPONSE[:RESPONSE.index('"2. Yar') + 5]
+    events = list(analysis.stream_analysis(SAMPLE))
+    assert [event for event, _ in events] == ["semester", "result"]
+    assert events[-1][1]["extraction_problems"]
+    assert analysis.analysis_store.list() == []
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    app = create_app({"UPLOAD_FOLDER": str(tmp_path / "uploads"), "JOBS_DB_PATH": str(tmp_path / "jobs.sqlite3"),
+                      "TESTING": True})
+    return app.test_client()
+
+
+def post_stream(client):
+    with open(SAMPLE, "rb") as f:
+        response = client.post("/upload/stream", data={"file": (io.BytesIO(f.read()), "transkript.docx")})
+    assert response.mimetype == "text/event-stream"
+    events = []
+    for message in response.get_data(as_text=True).strip().split("\n\n"):
+        event, data = message.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_upload_stream_sends_server_sent_events(llm, client):
+    llm.respond = lambda messages: RESPONSE
+    events = post_stream(client)
+    assert [event for event, _ in events] == ["semester", "semester", "result"]
+    assert events[-1][1]["extraction_problems"] == []
+    assert "Eksik Zorunlu Dersler" in events[-1][1]["html"]
+
+
+def test_upload_stream_reports_incomplete_extraction(llm, client):
+    llm.respond = lambda messages: RESPONSE[:-40]
+    result = post_stream(client)[-1][1]
+    assert result["extraction_problems"]
+    assert "Eksik Çıkarma" in result["html"]
+
+
+def test_upload_stream_reports_errors_as_events(llm, client):
+    llm.respond = lambda messages: ValueError("400 API key not valid")
+    assert post_stream(client) == [("error", {"message": "İstek işlenirken hata oluştu: 400 API key not valid",
+                                              "status": 500})]
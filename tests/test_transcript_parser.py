@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import analysis
+from conftest import UPLOADS_DIR
+from transcript_parser import MIN_CONFIDENCE, parse_docx
+
+# Kural tabanlı .docx ayrıştırıcısı ve analiz hattında Gemini yerine kullanılması
+
+STANDARD = os.path.join(UPLOADS_DIR, "TranscriptReport.docx")
+# Ders satırlarının bir kısmı standart yapıda değil
+IRREGULAR = os.path.join(UPLOADS_DIR, "TranscriptReport (3).docx")
+
+
+def test_parse_standard_transcript():
+    data, confidence = parse_docx(STANDARD)
+    assert confidence == 1.0
+    assert [semester["semester"] for semester in data["semesters"]] == [f"{n}. Yarıyıl" for n in range(1, 9)]
+    assert data["gpa"] == 2.63
+    first = data["semesters"][0]
+    assert first["akts"] == 31
+    assert first["courses"][0] == {"code": "AIB101", "name": "Atatürk İlkeleri ve İnkılap Tarihi I", "grade": "BB"}
+    assert {"code": "BM302", "name": "Bilgisayar Ağları II", "grade": "FF"} in data["semesters"][5]["courses"]
+
+
+def test_parse_file_object():
+    with open(STANDARD, "rb") as f:
+        assert parse_docx(f) == parse_docx(STANDARD)
+
+
+@pytest.mark.parametrize("name", ["TranscriptReport (3).docx", "TranscriptReport (4).docx", "1.docx"])
+def test_irregular_transcripts_have_low_confidence(name):
+    _, confidence = parse_docx(os.path.join(UPLOADS_DIR, name))
+    assert confidence < MIN_CONFIDENCE
+
+
+# Yeterli güvenle ayrıştırılan transkript için Gemini çağrılmaz
+def test_pipeline_skips_gemini_for_standard_transcript(llm):
+    prepared = analysis.prepare_file(STANDARD)
+    assert prepared["text"] is None
+    assert prepared["extraction_key"] == analysis.LOCAL_EXTRACTION_KEY
+    result = analysis.analyze_prepared(prepared)
+    assert llm.calls == []
+    assert len(result["semesters"]) == 8
+
+
+def test_pipeline_falls_back_to_gemini(monkeypatch, llm):
+    prepared = analysis.prepare_file(IRREGULAR)
+    assert prepared["data"] is None and prepared["text"]
+    monkeypatch.setattr(analysis, "LOCAL_PARSER_ENABLED", False)
+    prepared = analysis.prepare_file(STANDARD)
+    assert prepared["data"] is None
+    assert prepared["extraction_key"] == analysis.EXTRACTION_KEY
@@ -0,0 +1,119 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from extraction import open_document_xml
+
+# Standart "TranscriptReport.docx" çıktısını LLM kullanmadan ayrıştıran kural tabanlı ayrıştırıcı.
+# Sonuç, Gemini'den beklenen {"semesters": [...], "gpa": ...} yapısıyla aynıdır.
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+SEMESTER_RE = re.compile(r'^(\d+)\.\s*Yarıyıl$')
+COURSE_CODE_RE = re.compile(r'^[A-ZÇĞİÖŞÜ]{2,4}\d{3}$')
+NUMBER_RE = re.compile(r'^\d+(\.\d+)?$')
+VALID_GRADES = frozenset(["AA", "BA", "BB", "CB", "CC", "DC", "DD", "FD", "FF", "YT", "YZ"])
+
+# Bu güvenin altındaki sonuçlar için Gemini'ye geri dönülür
+MIN_CONFIDENCE = 0.95
+
+
+# İç içe tablo içermeyen satırların hücre metinlerini belge sırasıyla döndür.
+# word/document.xml artımlı okunur; işlenen satırlar bellekten bırakılır.
+def _iter_leaf_rows(source):
+    rows = []    # Açık satırlar: [iç içe tablo içermiyor mu, hücreler]
+    cells = []   # Açık hücrelerin metin parçaları
+    with zipfile.ZipFile(source) as archive, open_document_xml(archive) as document:
+        for event, elem in ET.iterparse(document, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == W_NS + 'tr':
+                    rows.append([True, []])
+                elif tag == W_NS + 'tc':
+                    cells.append([])
+                elif tag == W_NS + 'tbl':
+                    for row in rows:
+                        row[0] = False
+            elif tag == W_NS + 't':
+                if cells and elem.text:
+                    cells[-1].append(elem.text)
+            elif tag == W_NS + 'tc':
+                text = ''.join(cells.pop())
+                if rows:
+                    rows[-1][1].append(re.sub(r'\s+', ' ', text).strip())
+            elif tag == W_NS + 'tr':
+                is_leaf, row_cells = rows.pop()
+                elem.clear()
+                if is_leaf:
+                    yield row_cells
+
+
+def _to_number(value):
+    return float(value) if NUMBER_RE.match(value) else None
+
+
+# .docx dosyasını (yol veya dosya nesnesi) tablo yapısından ayrıştır; (veri, güven) döndürür
+def parse_docx(source):
+    semesters = []
+    current = None
+    in_course_table = False
+    course_rows = 0
+    parsed_rows = 0
+    gpa = None
+
+    for cells in _iter_leaf_rows(source):
+        non_empty = [c for c in cells if c]
+        if not non_empty:
+            continue
+
+        match = SEMESTER_RE.match(non_empty[0]) if len(non_empty) == 1 else None
+        if match:
+            current = {"semester": f"{int(match.group(1))}. Yarıyıl", "courses": [], "akts": None}
+            semesters.append(current)
+            in_course_table = False
+            continue
+        if current is None:
+            continue
+
+        if non_empty[0] == "Ders Kodu":
+            in_course_table = True
+            continue
+        if non_empty[0] == "Toplam Kredi":
+            in_course_table = False
+            continue
+        if non_empty[0] == "Dönem Sonu" and len(non_empty) >= 3:
+            akts = _to_number(non_empty[2])
+            current["akts"] = int(akts) if akts is not None and akts.is_integer() else akts
+            continue
+        if non_empty[0] == "Genel" and len(non_empty) >= 2:
+            # Her yarıyıl sonunda kümülatif ortalama var; son yarıyılınki geçerlidir
+            gpa = _to_number(non_empty[-1])
+            continue
+
+        if in_course_table:
+            course_rows += 1
+            code = cells[0] if cells else ""
+            grade = non_empty[-1]
+            if len(cells) >= 5 and COURSE_CODE_RE.match(code) and grade in VALID_GRADES:
+                current["courses"].append({
+                    "code": code,
+                    "name": cells[1].rstrip('*').strip(),
+                    "grade": grade
+                })
+                parsed_rows += 1
+
+    return {"semesters": semesters, "gpa": gpa}, _confidence(semesters, gpa, course_rows, parsed_rows)
+
+
+# Ayrıştırılan satır oranına ve eksik alanlara göre 0-1 arası bir güven değeri hesapla
+def _confidence(semesters, gpa, course_rows, parsed_rows):
+    if not semesters or gpa is None or course_rows == 0:
+        return 0.0
+    confidence = parsed_rows / course_rows
+    if any(not sem["courses"] for sem in semesters):
+        confidence *= 0.5
+    if any(sem["akts"] is None for sem in semesters):
+        confidence *= 0.5
+    numbers = [int(sem["semester"].split('.')[0]) for sem in semesters]
+    if len(set(numbers)) != len(numbers):
+        confidence *= 0.5
+    return confidence